@@ -0,0 +1,112 @@
+"""Compact, token-budgeted game context injected into the game master task.
+
+Without it the manager delegates to the Database Query Specialist just to
+learn who is in the game and what has been found. The bundle carries the
+character roster, location graph, revealed clues and recent timeline so the
+database agent is only needed for deep details.
+"""
+
+import os
+
+from database.repository import repository
+
+
+GAME_CONTEXT_ENABLED = os.getenv("GAME_CONTEXT_ENABLED", "true").lower() == "true"
+GAME_CONTEXT_TOKEN_BUDGET = int(os.getenv("GAME_CONTEXT_TOKEN_BUDGET", "1500"))
+# Return narration plus entity references, diffed into updates without the update crew
+GAME_MASTER_STRUCTURED = os.getenv("GAME_MASTER_STRUCTURED", "false").lower() == "true"
+RECENT_TIMELINE_EVENTS = 8
+DESCRIPTION_CHARS = 160
+# How each lie policy shapes a character's answers (schema.sql CHECK values)
+LIE_POLICY_HINTS = {
+    "honest": "tells the truth",
+    "evasive": "avoids some topics",
+    "deceptive": "misleads when pressed",
+    "pathological": "lies constantly",
+}
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (~4 characters per token for English prose)."""
+    return (len(text) + 3) // 4
+
+
+def _short(text, limit: int = DESCRIPTION_CHARS) -> str:
+    text = " ".join(str(text or "").split())
+    return text if len(text) <= limit else text[:limit - 3].rstrip() + "..."
+
+
+def character_lines(snapshot) -> list:
+    """Roster with lie policy hints. The killer flag and secrets stay with the
+    character and database agents' tool lookups, out of the manager's prompt."""
+    lines = []
+    for c in snapshot.characters:
+        flags = []
+        if c.get("is_victim"):
+            flags.append("victim")
+        if not c.get("is_alive", True) and not c.get("is_victim"):
+            flags.append("dead")
+        status = f" [{', '.join(flags)}]" if flags else ""
+        policy = c.get("lie_policy") or "honest"
+        hint = LIE_POLICY_HINTS.get(policy, policy)
+        lines.append(f"- {c['name']}{status} | lie_policy: {policy} ({hint}) | {_short(c.get('description'))}")
+    return lines
+
+
+def location_lines(snapshot) -> list:
+    lines = []
+    for l in snapshot.locations:
+        access = "" if l.get("is_accessible", True) else " [locked]"
+        connected = ", ".join(l.get("connected_locations") or []) or "none"
+        lines.append(f"- {l['name']}{access} -> {connected}")
+    return lines
+
+
+def clue_lines(snapshot) -> list:
+    return [
+        f"- {c['title']} (in {c.get('location_id') or 'unknown'}, significance {c.get('significance_level', 1)}): {_short(c.get('description'))}"
+        for c in snapshot.clues if c.get("is_revealed")
+    ]
+
+
+def timeline_lines(snapshot) -> list:
+    return [
+        f"- {e.get('event_time')} @ {e.get('location_id') or 'unknown'}: {_short(e.get('event_description'))}"
+        for e in [e for e in snapshot.timeline_events if e.get("is_public", True)][-RECENT_TIMELINE_EVENTS:]
+    ]
+
+
+def build_game_context(game_id: str, token_budget: int = GAME_CONTEXT_TOKEN_BUDGET) -> str:
+    """Assemble the context bundle, filling sections in priority order until the budget runs out."""
+    snapshot = repository.load_world_sync(game_id)
+    sections = [
+        ("CHARACTERS", character_lines(snapshot)),
+        ("LOCATIONS (name -> connected locations)", location_lines(snapshot)),
+        ("REVEALED CLUES", clue_lines(snapshot)),
+        ("RECENT TIMELINE", timeline_lines(snapshot)),
+    ]
+
+    parts = []
+    used = 0
+    truncated = False
+    for title, lines in sections:
+        header = f"{title}:"
+        if used + estimate_tokens(header) > token_budget:
+            truncated = True
+            break
+        parts.append(header)
+        used += estimate_tokens(header)
+        if not lines:
+            parts.append("- none")
+            continue
+        for line in lines:
+            cost = estimate_tokens(line)
+            if used + cost > token_budget:
+                truncated = True
+                break
+            parts.append(line)
+            used += cost
+
+    if truncated:
+        parts.append("(context truncated - ask the Database Query Specialist for anything missing)")
+    return "\n".join(parts)
@@ -1,5 +1,6 @@
 from crewai import Agent, Task, Crew
 from classes import GameSetup
+from agents.tracing import CREW_VERBOSE
 import json
 
 # Define the game creation agent
@@ -11,7 +12,7 @@ game_creator_agent = Agent(
     You design atmospheric locations that enhance the mystery, and you craft clues that lead players 
     through a logical but challenging investigation. Your games are known for their plot twists,
     red herrings, and satisfying conclusions.""",
-    verbose=True,
+    verbose=CREW_VERBOSE,
     allow_delegation=False
 )
 
@@ -77,7 +78,7 @@ def create_murder_mystery_game(title: str, description: str, character_count: st
     game_creation_crew = Crew(
         agents=[game_creator_agent],
         tasks=[creation_task],
-        verbose=True
+        verbose=CREW_VERBOSE
     )
     
     # Execute the task
@@ -0,0 +1,180 @@
+"""CrewAI event handlers feeding turn metrics, traces and SSE streams.
+
+The event bus calls handlers synchronously in the crew thread, which runs
+with a copy of the request's context, so each handler finds the turn's
+TurnMetrics (agents.metrics) and GameMasterStream (agents.streaming) in
+context variables. Importing this module pulls in crewai; the agent registry
+imports it before building the first agent.
+"""
+
+from crewai.utilities.events import (
+    crewai_event_bus,
+    AgentExecutionStartedEvent,
+    AgentExecutionCompletedEvent,
+    AgentExecutionErrorEvent,
+    CrewKickoffStartedEvent,
+    CrewKickoffCompletedEvent,
+    CrewKickoffFailedEvent,
+    LLMCallStartedEvent,
+    LLMCallCompletedEvent,
+    LLMCallFailedEvent,
+    LLMStreamChunkEvent,
+    ToolUsageStartedEvent,
+    ToolUsageFinishedEvent,
+    ToolUsageErrorEvent,
+)
+
+from agents.context import estimate_tokens
+from agents.metrics import MANAGER_ROLE, TurnMetrics, current_metrics
+from agents.streaming import DELEGATION_TOOLS, MANAGER_ROLES, current_stream, describe_delegation
+from agents.tracing import preview, preview_args
+
+
+# Turn metrics and traces
+
+def _role(agent_role) -> str:
+    return MANAGER_ROLE if agent_role in MANAGER_ROLES else agent_role
+
+
+def _tool_kind(tool_name: str) -> str:
+    return "delegation" if tool_name in DELEGATION_TOOLS else "tool"
+
+
+def _message_tokens(messages) -> int:
+    """Estimated prompt tokens (the events carry no provider usage)."""
+    if isinstance(messages, list):
+        return sum(estimate_tokens(str(m.get("content") or "") if isinstance(m, dict) else str(m)) for m in messages)
+    return estimate_tokens(str(messages or ""))
+
+
+@crewai_event_bus.on(CrewKickoffStartedEvent)
+def on_crew_kickoff_started(source, event: CrewKickoffStartedEvent):
+    metrics = current_metrics.get()
+    if metrics:
+        metrics.trace.open("crew", event.crew_name or "crew")
+
+
+@crewai_event_bus.on(CrewKickoffCompletedEvent)
+def on_crew_kickoff_completed(source, event: CrewKickoffCompletedEvent):
+    metrics = current_metrics.get()
+    if metrics:
+        metrics.trace.close("crew")
+
+
+@crewai_event_bus.on(CrewKickoffFailedEvent)
+def on_crew_kickoff_failed(source, event: CrewKickoffFailedEvent):
+    metrics = current_metrics.get()
+    if metrics:
+        metrics.trace.close("crew", error=preview(event.error))
+
+
+@crewai_event_bus.on(AgentExecutionStartedEvent)
+def on_agent_execution_started(source, event: AgentExecutionStartedEvent):
+    metrics = current_metrics.get()
+    if metrics:
+        metrics.trace.open("agent", _role(event.agent.role), llm_calls=0)
+
+
+@crewai_event_bus.on(AgentExecutionCompletedEvent)
+def on_agent_execution_completed(source, event: AgentExecutionCompletedEvent):
+    metrics = current_metrics.get()
+    if metrics:
+        metrics.trace.close("agent")
+
+
+@crewai_event_bus.on(AgentExecutionErrorEvent)
+def on_agent_execution_error(source, event: AgentExecutionErrorEvent):
+    metrics = current_metrics.get()
+    if metrics:
+        metrics.trace.close("agent", error=preview(event.error))
+
+
+@crewai_event_bus.on(LLMCallStartedEvent)
+def on_llm_call_started(source, event: LLMCallStartedEvent):
+    metrics = current_metrics.get()
+    if not metrics:
+        return
+    role = _role(event.agent_role)
+    metrics.use_agent(role)
+    metrics.llm_started(role)
+
+    # Each manager LLM call is one iteration of the orchestration loop
+    agent_span = metrics.trace.current("agent")
+    iteration = 1
+    if agent_span:
+        agent_span["attributes"]["llm_calls"] += 1
+        iteration = agent_span["attributes"]["llm_calls"]
+    name = f"manager iteration {iteration}" if role == MANAGER_ROLE else f"llm call {iteration}"
+    metrics.trace.open("llm", name, role=role, model=event.model, prompt_tokens=_message_tokens(event.messages))
+
+
+def _finish_llm_span(metrics: TurnMetrics, agent_role, **attributes):
+    ms = metrics.llm_finished(_role(agent_role))
+    metrics.trace.close("llm", latency_ms=round(ms, 1) if ms is not None else None, **attributes)
+
+
+@crewai_event_bus.on(LLMCallCompletedEvent)
+def on_llm_call_completed(source, event: LLMCallCompletedEvent):
+    metrics = current_metrics.get()
+    if metrics:
+        _finish_llm_span(metrics, event.agent_role, completion_tokens=estimate_tokens(str(event.response or "")))
+
+
+@crewai_event_bus.on(LLMCallFailedEvent)
+def on_llm_call_failed(source, event: LLMCallFailedEvent):
+    metrics = current_metrics.get()
+    if metrics:
+        _finish_llm_span(metrics, event.agent_role, error=preview(event.error))
+
+
+@crewai_event_bus.on(ToolUsageStartedEvent)
+def on_tool_usage_started(source, event: ToolUsageStartedEvent):
+    metrics = current_metrics.get()
+    if metrics:
+        metrics.trace.open(_tool_kind(event.tool_name), event.tool_name, agent=_role(event.agent_role), args=preview_args(event.tool_args))
+
+
+@crewai_event_bus.on(ToolUsageFinishedEvent)
+def on_tool_usage_finished(source, event: ToolUsageFinishedEvent):
+    metrics = current_metrics.get()
+    if not metrics:
+        return
+    metrics.use_tool(event.tool_name)
+    ms = (event.finished_at - event.started_at).total_seconds() * 1000
+    metrics.add(_tool_kind(event.tool_name), ms)
+    metrics.trace.close(_tool_kind(event.tool_name), from_cache=event.from_cache, output_chars=len(str(event.output or "")))
+
+
+@crewai_event_bus.on(ToolUsageErrorEvent)
+def on_tool_usage_error(source, event: ToolUsageErrorEvent):
+    metrics = current_metrics.get()
+    if metrics:
+        metrics.use_tool(event.tool_name)
+        metrics.trace.close(_tool_kind(event.tool_name), error=preview(event.error))
+
+
+# Streamed game master turns
+
+@crewai_event_bus.on(LLMCallStartedEvent)
+def relay_llm_call_started(source, event: LLMCallStartedEvent):
+    stream = current_stream.get()
+    if stream and event.agent_role in MANAGER_ROLES:
+        stream.start_llm_call()
+
+
+@crewai_event_bus.on(LLMStreamChunkEvent)
+def relay_llm_stream_chunk(source, event: LLMStreamChunkEvent):
+    stream = current_stream.get()
+    if stream and stream.relay_tokens and event.agent_role in MANAGER_ROLES and event.chunk:
+        stream.add_chunk(event.chunk)
+
+
+@crewai_event_bus.on(ToolUsageStartedEvent)
+def relay_tool_usage_started(source, event: ToolUsageStartedEvent):
+    stream = current_stream.get()
+    if not stream:
+        return
+    if event.tool_name in DELEGATION_TOOLS:
+        stream.emit("progress", {"message": describe_delegation(stream.game_id, event.tool_args)})
+    else:
+        stream.emit("progress", {"message": "consulting database", "tool": event.tool_name})
@@ -0,0 +1,86 @@
+"""Bounded thread pool for running blocking CrewAI kickoffs off the event loop."""
+
+import asyncio
+import contextvars
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+
+# Number of crews that may run at the same time on this worker
+CREW_WORKERS = int(os.getenv("CREW_WORKERS", "8"))
+
+
+class CrewExecutor:
+    """Runs synchronous crew calls in a bounded pool and tracks its load."""
+
+    def __init__(self, max_workers: int):
+        self.max_workers = max_workers
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="crew")
+        self._lock = threading.Lock()
+        self._queued = 0
+        self._in_flight = 0
+        self._completed = 0
+        self._failed = 0
+        self._total_wait_ms = 0.0
+        self._total_run_ms = 0.0
+
+    async def run(self, func, *args, **kwargs):
+        """Run func(*args, **kwargs) in the pool and await its result.
+
+        The caller's context variables are copied into the worker thread so
+        per-request state keeps working inside tools and event handlers.
+        """
+        loop = asyncio.get_running_loop()
+        context = contextvars.copy_context()
+        submitted_at = time.perf_counter()
+
+        with self._lock:
+            self._queued += 1
+
+        def call():
+            started_at = time.perf_counter()
+            with self._lock:
+                self._queued -= 1
+                self._in_flight += 1
+                self._total_wait_ms += (started_at - submitted_at) * 1000
+            failed = False
+            try:
+                return context.run(func, *args, **kwargs)
+            except Exception:
+                failed = True
+                raise
+            finally:
+                with self._lock:
+                    self._in_flight -= 1
+                    self._total_run_ms += (time.perf_counter() - started_at) * 1000
+                    if failed:
+                        self._failed += 1
+                    else:
+                        self._completed += 1
+
+        return await loop.run_in_executor(self._pool, call)
+
+    def stats(self) -> dict:
+        """Snapshot of pool size, queue depth, in-flight count and averages."""
+        with self._lock:
+            finished = self._completed + self._failed
+            started = finished + self._in_flight
+            return {
+                "max_workers": self.max_workers,
+                "queue_depth": self._queued,
+                "in_flight": self._in_flight,
+                "completed": self._completed,
+                "failed": self._failed,
+                "avg_wait_ms": round(self._total_wait_ms / started, 1) if started else 0.0,
+                "avg_run_ms": round(self._total_run_ms / finished, 1) if finished else 0.0,
+            }
+
+
+crew_executor = CrewExecutor(CREW_WORKERS)
+
+
+async def run_crew(func, *args, **kwargs):
+    """Run a blocking crew function on the shared crew executor."""
+    return await crew_executor.run(func, *args, **kwargs)
@@ -0,0 +1,156 @@
+"""Deterministic fast path for pure state-lookup player queries.
+
+Queries like "what clues have I found", "where can I go from the library" or
+"list the suspects" only read the world tables. They are recognised with
+anchored rules and answered from the world snapshot with templated narration,
+skipping the hierarchical game master crew entirely.
+"""
+
+import os
+import re
+import threading
+
+from database.repository import repository
+
+
+FAST_PATH_ENABLED = os.getenv("FAST_PATH_ENABLED", "true").lower() == "true"
+# Longer queries almost always carry more intent than a lookup
+FAST_PATH_MAX_QUERY_LENGTH = 80
+
+_PREFIX = r"^(?:please\s+|can you\s+|could you\s+)?"
+
+INTENT_PATTERNS = {
+    "clues_found": [
+        _PREFIX + r"(?:what|which)\s+(?:clues|evidence)\s+(?:have|did)\s+(?:i|we)\s+(?:found|find|discovered|discover|collected|collect|got|gathered)(?:\s+so\s+far)?$",
+        _PREFIX + r"(?:list|show)(?:\s+me)?(?:\s+all)?(?:\s+(?:the|my|our))?\s+(?:clues|evidence)(?:\s+(?:i|we)\s+(?:have\s+)?(?:found|discovered|collected))?(?:\s+so\s+far)?$",
+    ],
+    "exits": [
+        _PREFIX + r"where\s+can\s+(?:i|we)\s+go\s+from\s+(?:the\s+)?(?P<location>.+)$",
+        _PREFIX + r"(?:what|which)\s+(?:rooms|locations|places)\s+(?:are\s+)?(?:connected\s+to|connect\s+to|lead\s+from|are\s+next\s+to)\s+(?:the\s+)?(?P<location>.+)$",
+    ],
+    "locations": [
+        _PREFIX + r"where\s+can\s+(?:i|we)\s+go$",
+        _PREFIX + r"(?:list|show)(?:\s+me)?(?:\s+all)?(?:\s+the)?\s+(?:locations|rooms|places)$",
+        _PREFIX + r"(?:what|which)\s+(?:locations|rooms|places)\s+(?:are\s+there|can\s+(?:i|we)\s+(?:visit|go\s+to|explore))$",
+    ],
+    "suspects": [
+        _PREFIX + r"(?:list|show)(?:\s+me)?(?:\s+all)?(?:\s+the)?\s+(?:suspects|characters|people)$",
+        _PREFIX + r"who\s+are\s+(?:all\s+)?the\s+(?:suspects|characters|people\s+here)$",
+    ],
+}
+
+_COMPILED = {
+    intent: [re.compile(pattern, re.IGNORECASE) for pattern in patterns]
+    for intent, patterns in INTENT_PATTERNS.items()
+}
+
+
+class FastPathStats:
+    """Counts how much query traffic the fast path answers."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.total = 0
+        self.by_intent: dict[str, int] = {}
+
+    def record(self, intent: str | None):
+        with self._lock:
+            self.total += 1
+            if intent:
+                self.by_intent[intent] = self.by_intent.get(intent, 0) + 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            fast = sum(self.by_intent.values())
+            return {
+                "enabled": FAST_PATH_ENABLED,
+                "queries": self.total,
+                "fast_path": fast,
+                "fast_path_ratio": round(fast / self.total, 3) if self.total else 0.0,
+                "by_intent": dict(self.by_intent),
+            }
+
+
+fast_path_stats = FastPathStats()
+
+
+def classify_query(query: str):
+    """Return (intent, params) for a pure lookup query, or (None, {})."""
+    text = re.sub(r"\s+", " ", query or "").strip().rstrip("?.!").strip()
+    if not text or len(text) > FAST_PATH_MAX_QUERY_LENGTH:
+        return None, {}
+    for intent, patterns in _COMPILED.items():
+        for pattern in patterns:
+            match = pattern.match(text)
+            if match:
+                return intent, {k: v.strip() for k, v in match.groupdict().items() if v}
+    return None, {}
+
+
+def answer_clues_found(snapshot, params: dict) -> str:
+    revealed = [c for c in snapshot.clues if c.get("is_revealed")]
+    if not revealed:
+        return "You flip through your notebook, but the pages are still blank. You haven't uncovered any clues yet."
+    lines = [f"You flip through your notebook. You have uncovered {len(revealed)} clue{'s' if len(revealed) != 1 else ''} so far:"]
+    for clue in revealed:
+        where = f" (found in {clue['location_id']})" if clue.get("location_id") else ""
+        lines.append(f"- {clue['title']}{where}: {clue['description']}")
+    return "\n".join(lines)
+
+
+def answer_exits(snapshot, params: dict):
+    match = snapshot.name_index.best(params.get("location", ""), "location")
+    if not match:
+        # Unknown place: let the game master handle it
+        return None
+    location = match["row"]
+    connected = location.get("connected_locations") or []
+    if not connected:
+        return f"You look around the {location['name']}. There seems to be no other way out from here."
+    return f"From the {location['name']} you can make your way to: {', '.join(connected)}."
+
+
+def answer_locations(snapshot, params: dict) -> str:
+    accessible = [l["name"] for l in snapshot.locations if l.get("is_accessible", True)]
+    if not accessible:
+        return "Every door you try is locked. There is nowhere to go right now."
+    return f"You consider your options. You can explore: {', '.join(accessible)}."
+
+
+def answer_suspects(snapshot, params: dict) -> str:
+    lines = ["You review the people caught up in this affair:"]
+    for character in snapshot.characters:
+        if character.get("is_victim"):
+            lines.append(f"- {character['name']} (the victim): {character.get('description') or ''}".rstrip(": "))
+        else:
+            lines.append(f"- {character['name']}: {character.get('description') or ''}".rstrip(": "))
+    if len(lines) == 1:
+        return "There is no one else here to question."
+    return "\n".join(lines)
+
+
+ANSWERS = {
+    "clues_found": answer_clues_found,
+    "exits": answer_exits,
+    "locations": answer_locations,
+    "suspects": answer_suspects,
+}
+
+
+async def try_fast_path(game_id: str, query: str):
+    """Answer a lookup query straight from the world snapshot.
+
+    Returns the narrated answer, or None when the query needs the game master.
+    """
+    if not FAST_PATH_ENABLED:
+        return None
+    intent, params = classify_query(query)
+    answer = None
+    if intent:
+        try:
+            answer = ANSWERS[intent](await repository.load_world(game_id), params)
+        except Exception as e:
+            print(f"❌ Fast path failed for {intent}: {str(e)}")
+            answer = None
+    fast_path_stats.record(intent if answer else None)
+    return answer
@@ -1,12 +1,13 @@
 from crewai import Agent, Task, Crew, Process, LLM
 import os
 from pathlib import Path
-from classes import GetCharacterDataTool, GetLocationDataTool, GetCluesInLocationTool, SearchCharactersTool, GetTimelineEventsTool, GetAllCluesTool, GetAllLocationDataTool
-
+from agents.context import GAME_CONTEXT_ENABLED, build_game_context
+from agents.tracing import CREW_VERBOSE
+from classes import GameMasterOutput, GetCharacterDataTool, GetLocationDataTool, GetCluesInLocationTool, SearchCharactersTool, GetTimelineEventsTool, GetAllCluesTool, GetAllLocationDataTool
 
 
 # Master Agent
-llm = LLM(model="gpt-4o")
+llm = LLM(model="gpt-4o", stream=True) # Streamed so /query/{game_id}/stream can relay the final answer
 
 master_agent = Agent(
     role="Game Master Orchestrator",
@@ -35,7 +36,7 @@ master_agent = Agent(
 
     You coordinate the entire game experience and ensure all interactions are realistic and consistent 
     with the murder mystery story.""",
-    verbose=True,
+    verbose=CREW_VERBOSE,
     max_iter=20,
     llm=llm
     )
@@ -53,7 +54,7 @@ database_agent = Agent(
     GetCharacterDataTool is used to get character data by name and game_id.
     GetLocationDataTool is used to get location data by name and game_id. (Accepts location name as a string)
     GetCluesInLocationTool is used to get clues in a specific location.
-    GetTimelineEventsTool is used to get all timeline events for the game.
+    GetTimelineEventsTool is used to search timeline events (query, time range, characters, locations, event types; page with next_cursor).
     GetAllCluesTool is used to get all clues discovered in the game.
     GetAllLocationDataTool is used to get all location data for the game.
 
@@ -62,7 +63,7 @@ database_agent = Agent(
     Always provide the retrieved data in a clear, structured format that the Game Master can use to 
     coordinate the game experience.
     IMPORTANT: If you cannot find the information, say so and do not make up information.""",
-    verbose=True,
+    verbose=CREW_VERBOSE,
    
     
 )
@@ -84,17 +85,37 @@ character_agent = Agent(
     6. Stay in character throughout the interaction
     
     Your responses should be realistic dialogue and actions that this character would actually say and do.""",
-    verbose=True,
+    verbose=CREW_VERBOSE,
    
 )
 
 # Database Agent - handles all tool-based data retrieval  
 
-
-def handle_query(game_id: str, player_query: str, conversation_history: list = None):
-    """Handle a player query in the game along with the conversation history."""
-
-
+# Output contract of the interaction task in structured mode
+STRUCTURED_INSTRUCTIONS = """
+        Your final answer is a GameMasterOutput:
+        - narration: the full response for the player (the same text you would otherwise return)
+        - clues_revealed: exact titles of clues the player found or was shown in THIS turn
+        - locations_entered: exact names of locations the player moved into in THIS turn, in order
+        - characters_questioned: exact names of characters the player talked to in THIS turn
+        - solved: true if the player solved the mystery in THIS turn
+        Only list entities that exist in the game; leave a list empty when nothing applies.
+        """
+
+
+def build_interaction_crew(game_id: str, player_query: str, conversation_history: list = None, structured: bool = False) -> Crew:
+    """Crew answering one player query; structured=True makes it return a GameMasterOutput."""
+
+    game_context = ""
+    if GAME_CONTEXT_ENABLED:
+        try:
+            game_context = f"""
+        GAME CONTEXT (current game state - use this directly instead of asking the database agent):
+{build_game_context(game_id)}
+        Only delegate to the database agent for details not covered above (full personalities, relationships, clue details, older events).
+        """
+        except Exception as e:
+            print(f"❌ Could not build game context: {str(e)}")
     
     # Task for character interaction
     interaction_task = Task(
@@ -102,6 +123,7 @@ def handle_query(game_id: str, player_query: str, conversation_history: list = N
         Use the game_id: {game_id} to get the game data.
         Player query: {player_query}
         Conversation history: {conversation_history}- Use this to figure out the current context in relation to the players query.
+        {game_context}
         
         Analyze the player query to determine:
         1. What the player wants to do
@@ -122,12 +144,12 @@ def handle_query(game_id: str, player_query: str, conversation_history: list = N
         Do not include game_id or any image urls in the final output to the player.
         Do not answer any direct questions about the killer to the player.
         If u feel the game has been solved via player query, respond with "SOLVED" as the last word and provide a summary of the solved game.
-        
+        {STRUCTURED_INSTRUCTIONS if structured else ""}
 
 
         """,
-        expected_output="Complete response to player query with authentic game world interaction",
-        
+        expected_output="Complete response to player query with authentic game world interaction" + (", in the format of GameMasterOutput" if structured else ""),
+        output_pydantic=GameMasterOutput if structured else None,
         max_retries=3
     )
     
@@ -137,12 +159,22 @@ def handle_query(game_id: str, player_query: str, conversation_history: list = N
         tasks=[interaction_task],
         process=Process.hierarchical,
         manager_agent=master_agent,
-        verbose=True,
+        verbose=CREW_VERBOSE,
         
     )
+    return crew
 
 
-    
-    
-    result = crew.kickoff()
+def handle_query(game_id: str, player_query: str, conversation_history: list = None):
+    """Handle a player query in the game along with the conversation history."""
+    result = build_interaction_crew(game_id, player_query, conversation_history).kickoff()
     return result.raw
+
+
+def handle_query_structured(game_id: str, player_query: str, conversation_history: list = None) -> GameMasterOutput:
+    """Handle a player query and return the narration with the entities it touched."""
+    result = build_interaction_crew(game_id, player_query, conversation_history, structured=True).kickoff()
+    if result.pydantic is None:
+        # The answer could not be parsed; keep the narration and change nothing
+        return GameMasterOutput(narration=result.raw)
+    return result.pydantic
@@ -1,4 +1,6 @@
 import json
+import os
+import time
 from typing import List, Dict
 from classes import ImageTool
 import asyncio
@@ -6,125 +8,130 @@ import asyncio
 # Initialize the image generation tool directly
 image_tool = ImageTool()
 
+# Shared limits for every image generated by this worker (characters, locations and clues)
+IMAGE_CONCURRENCY = int(os.getenv("IMAGE_CONCURRENCY", "8"))
+IMAGE_RATE_PER_MINUTE = float(os.getenv("IMAGE_RATE_PER_MINUTE", "50"))  # Match your OpenAI tier's images/min limit
+IMAGE_RATE_BURST = int(os.getenv("IMAGE_RATE_BURST", "20"))
+IMAGE_MIN_ATTEMPTS = int(os.getenv("IMAGE_MIN_ATTEMPTS", "2"))
+IMAGE_RETRY_BACKOFF_SECONDS = float(os.getenv("IMAGE_RETRY_BACKOFF_SECONDS", "2"))
+
+
+class TokenBucket:
+    """Async token bucket: `rate` tokens per second, holding at most `capacity`."""
+
+    def __init__(self, rate: float, capacity: int):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = float(capacity)
+        self.updated_at = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+                self.updated_at = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+image_semaphore = asyncio.Semaphore(IMAGE_CONCURRENCY)
+image_rate_limiter = TokenBucket(IMAGE_RATE_PER_MINUTE / 60, IMAGE_RATE_BURST)
+
+
+async def generate_item_image(prompts: List[str], image_type: str, subject_name: str, game_id: str):
+    """Generate one image, walking the prompt cascade (most risky to safest) on failure.
+
+    Every attempt takes a slot from the shared semaphore and a token from the
+    shared rate limiter, so all asset kinds of all games share the API budget.
+    """
+    attempts = max(len(prompts), IMAGE_MIN_ATTEMPTS)
+    for attempt in range(attempts):
+        prompt = prompts[min(attempt, len(prompts) - 1)]
+        if attempt:
+            await asyncio.sleep(IMAGE_RETRY_BACKOFF_SECONDS * 2 ** (attempt - 1))
+        try:
+            await image_rate_limiter.acquire()
+            async with image_semaphore:
+                print(f"🎨 Generating image for {image_type}: {subject_name} (attempt {attempt+1})")
+                image_url = await image_tool.agenerate(
+                    prompt=prompt,
+                    image_type=image_type,
+                    subject_name=subject_name,
+                    game_id=game_id
+                )
+            if image_url:
+                print(f"✅ Generated image for {subject_name}")
+                return image_url
+            print(f"❌ Failed to generate image for {subject_name} with prompt no. {attempt+1}")
+        except Exception as e:
+            print(f"❌ Error generating image for {subject_name} with prompt no. {attempt+1}: {str(e)}")
+    return None
+
+
+async def generate_images(jobs: List[tuple], image_type: str, game_id: str) -> Dict:
+    """Run (name, prompts) jobs concurrently and collect the successful URLs."""
+    urls = await asyncio.gather(*[
+        generate_item_image(prompts, image_type, name, game_id) for name, prompts in jobs
+    ])
+    return {name: url for (name, _), url in zip(jobs, urls) if url}
+
+
 async def generate_character_images(characters: List[Dict], game_id: str, game_title: str) -> Dict:
     """Generate images for all characters using direct API calls."""
     print(f"🎨 Starting character image generation for {len(characters)} characters")
-    
-    results = {}
-    
-    # Generate images for each character
+
+    jobs = []
     for character in characters:
         character_name = character.get("name", "Unknown")
         character_description = character.get("description", "")
-        
+
         # Create detailed prompt for character
         prompt = f"Portrait of {character_name}, {character_description}, realistic style, good lighting, detailed facial features, unique appearance, high quality digital art, {game_title} setting"
-        
-        try:
-            print(f"🎨 Generating image for character: {character_name}")
-            
-            # Call the image tool directly
-            image_url = image_tool._run(
-                prompt=prompt,
-                image_type="character",
-                subject_name=character_name,
-                game_id=game_id
-            )
-            
-            if image_url:
-                results[character_name] = image_url
-                print(f"✅ Generated image for {character_name}")
-            else:
-                print(f"❌ Failed to generate image for {character_name}")
-                
-        except Exception as e:
-            print(f"❌ Error generating image for {character_name}: {str(e)}")
-    
+        jobs.append((character_name, [prompt]))
+
+    results = await generate_images(jobs, "character", game_id)
     print(f"🎨 Completed character image generation. Generated {len(results)} images.")
     return results
 
 async def generate_location_images(locations: List[Dict], game_id: str, game_title: str) -> Dict:
     """Generate images for all locations using direct API calls."""
     print(f"🎨 Starting location image generation for {len(locations)} locations")
-    
-    results = {}
-    
-    # Generate images for each location
+
+    jobs = []
     for location in locations:
         location_name = location.get("name", "Unknown")
         location_description = location.get("description", "")
         atmosphere = location.get("atmosphere", "mysterious")
-        
+
         # Create detailed prompt for location (most risky to safest)
         prompt1 = f"{location_name}, {location_description}, {atmosphere} atmosphere, murder mystery setting, dramatic shadows, detailed architecture, realistic style, high quality digital art, {game_title} setting"
         prompt2 = f"{location_name}, {location_description}, {atmosphere} atmosphere, investigation scene, dramatic lighting, detailed architecture, realistic style, high quality digital art, {game_title} setting"
         prompt3 = f"{location_name}, {location_description}, {atmosphere} atmosphere, mysterious location photography, vintage aesthetic, dramatic lighting, detailed architecture, high quality digital art, {game_title} setting"
-        
+        jobs.append((location_name, [prompt1, prompt2, prompt3]))
 
-            
-         
-        for index, prompt in enumerate([prompt1, prompt2, prompt3]):
-
-            try:
-                image_url = image_tool._run(
-                    prompt=prompt,
-                    image_type="location",
-                    subject_name=location_name,
-                    game_id=game_id
-                )
-                
-                if image_url:
-                    results[location_name] = image_url
-                    print(f"✅ Generated image for {location_name}")
-                    break
-                else:
-                    print(f"❌ Failed to generate image for {location_name} with prompt no. {index+1}")
-                
-            except Exception as e:
-                print(f"❌ Error generating image for {location_name} with prompt no. {index+1}: {str(e)}")
-
-    
+    results = await generate_images(jobs, "location", game_id)
     print(f"🎨 Completed location image generation. Generated {len(results)} images.")
     return results
 
 async def generate_clue_images(clues: List[Dict], game_id: str, game_title: str) -> Dict:
     """Generate images for all clues using direct API calls."""
     print(f"🎨 Starting clue image generation for {len(clues)} clues")
-    
-    results = {}
-    
-    # Generate images for each clue
+
+    jobs = []
     for clue in clues:
         clue_name = clue.get("title", "Unknown")
         clue_description = clue.get("description", "")
-        
-        
-        # Create detailed prompt for clue/evidence
+
+        # Create detailed prompt for clue/evidence (most risky to safest)
         prompt1 = f"{clue_name}, {clue_description}, evidence photo, crime scene style, realistic detailed close-up, forensic photography style, high quality digital art, {game_title} setting"
         prompt2 = f"{clue_name}, {clue_description}, investigation documentation, detective scene style, realistic detailed close-up, professional photography style, high quality digital art, {game_title} setting"
         prompt3 = f"{clue_name}, {clue_description}, mysterious object photography, vintage mystery aesthetic, dramatic lighting, detailed close-up, high quality digital art, {game_title} setting"
-        
-        for index, prompt in enumerate([prompt1, prompt2, prompt3]):
-            try:
-                print(f"🎨 Generating image for clue: {clue_name} (attempt {index+1})")
-                
-                # Call the image tool directly
-                image_url = image_tool._run(
-                    prompt=prompt,
-                    image_type="clue",
-                    subject_name=clue_name,
-                    game_id=game_id
-                )
-                
-                if image_url:
-                    results[clue_name] = image_url
-                    print(f"✅ Generated image for {clue_name}")
-                    break
-                else:
-                    print(f"❌ Failed to generate image for {clue_name} with prompt no. {index+1}")
-                    
-            except Exception as e:
-                print(f"❌ Error generating image for {clue_name} with prompt no. {index+1}: {str(e)}")
-        
+        jobs.append((clue_name, [prompt1, prompt2, prompt3]))
+
+    results = await generate_images(jobs, "clue", game_id)
     print(f"🎨 Completed clue image generation. Generated {len(results)} images.")
-    return results
\ No newline at end of file
+    return results
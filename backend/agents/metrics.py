@@ -0,0 +1,158 @@
+"""Per-stage latency of the player query pipeline.
+
+Each turn carries a TurnMetrics in a context variable. The route times its own
+stages (fast path, summary read, crew, interaction insert) and the CrewAI
+event handlers in agents.events, which run in the crew thread with a copy of
+the request's context, add manager and agent LLM calls, delegations and tool
+runs.
+Totals go into the interaction row (response_time_ms, tools_used,
+agent_payload), which GET /debug/latency aggregates across workers, and into
+an in-memory per-worker history.
+The same handlers build the turn's span tree (agents.tracing).
+"""
+
+import contextvars
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+from agents.tracing import Trace
+from database.jobqueue import percentile
+
+
+# Turns kept in memory for the aggregation endpoint
+LATENCY_HISTORY = int(os.getenv("LATENCY_HISTORY", "5000"))
+MANAGER_ROLE = "Game Master Orchestrator"
+
+
+class TurnMetrics:
+    """Timed spans, tools and agents of one player turn."""
+
+    def __init__(self, game_id: str):
+        self.game_id = game_id
+        self.started_at = time.perf_counter()
+        self.stages: dict[str, dict] = {}
+        self.tools: list[str] = []
+        self.agents: list[str] = []
+        self._llm_started: dict[tuple, float] = {}
+        self._lock = threading.Lock()
+        self.trace = Trace(game_id)
+
+    def add(self, stage: str, ms: float):
+        with self._lock:
+            entry = self.stages.setdefault(stage, {"ms": 0.0, "count": 0})
+            entry["ms"] += ms
+            entry["count"] += 1
+
+    @contextmanager
+    def span(self, stage: str):
+        started = time.perf_counter()
+        self.trace.open("stage", stage)
+        try:
+            yield
+        finally:
+            self.trace.close("stage")
+            self.add(stage, (time.perf_counter() - started) * 1000)
+
+    def use_tool(self, name: str):
+        with self._lock:
+            if name not in self.tools:
+                self.tools.append(name)
+
+    def use_agent(self, role: str):
+        with self._lock:
+            if role not in self.agents:
+                self.agents.append(role)
+
+    def llm_started(self, role: str):
+        with self._lock:
+            self._llm_started[(threading.get_ident(), role)] = time.perf_counter()
+
+    def llm_finished(self, role: str) -> float | None:
+        with self._lock:
+            started = self._llm_started.pop((threading.get_ident(), role), None)
+        if started is None:
+            return None
+        ms = (time.perf_counter() - started) * 1000
+        self.add("manager_llm" if role == MANAGER_ROLE else "agent_llm", ms)
+        return ms
+
+    def elapsed_ms(self) -> int:
+        return int((time.perf_counter() - self.started_at) * 1000)
+
+    def payload(self) -> dict:
+        """Stage totals for interactions.agent_payload."""
+        with self._lock:
+            return {
+                "stages": {stage: {"ms": round(e["ms"], 1), "count": e["count"]} for stage, e in self.stages.items()},
+                "agents": list(self.agents),
+            }
+
+
+current_metrics: contextvars.ContextVar[TurnMetrics | None] = contextvars.ContextVar("current_metrics", default=None)
+
+
+@contextmanager
+def span(stage: str):
+    """Time a stage of the current turn (no-op outside an instrumented turn)."""
+    metrics = current_metrics.get()
+    if metrics is None:
+        yield
+        return
+    with metrics.span(stage):
+        yield
+
+
+def stage_percentiles(turns: list, window_seconds: float) -> dict:
+    """p50/p95/p99 per stage over a list of {stage: ms} dicts."""
+    by_stage: dict[str, list] = {}
+    for stages in turns:
+        for stage, ms in stages.items():
+            by_stage.setdefault(stage, []).append(ms)
+    return {
+        "window_seconds": window_seconds,
+        "turns": len(turns),
+        "stages": {
+            stage: {
+                "count": len(values),
+                "p50_ms": round(percentile(values, 50), 1),
+                "p95_ms": round(percentile(values, 95), 1),
+                "p99_ms": round(percentile(values, 99), 1),
+            }
+            for stage, values in sorted(by_stage.items())
+        },
+    }
+
+
+def interaction_stages(row: dict) -> dict:
+    """{stage: ms} of a stored interaction row, with response_time_ms as the total."""
+    payload = row.get("agent_payload") or {}
+    stages = {stage: e["ms"] for stage, e in (payload.get("stages") or {}).items() if isinstance(e, dict) and "ms" in e}
+    if row.get("response_time_ms") is not None:
+        stages["total"] = row["response_time_ms"]
+    return stages
+
+
+class LatencyStats:
+    """Recent finished turns of this worker, aggregated into per-stage percentiles."""
+
+    def __init__(self, history: int):
+        self._turns = deque(maxlen=history)
+        self._lock = threading.Lock()
+
+    def record(self, metrics: TurnMetrics):
+        stages = {stage: e["ms"] for stage, e in metrics.payload()["stages"].items()}
+        stages["total"] = metrics.elapsed_ms()
+        with self._lock:
+            self._turns.append((time.time(), stages))
+
+    def stats(self, window_seconds: float) -> dict:
+        cutoff = time.time() - window_seconds
+        with self._lock:
+            turns = [stages for recorded_at, stages in self._turns if recorded_at >= cutoff]
+        return stage_percentiles(turns, window_seconds)
+
+
+latency_stats = LatencyStats(LATENCY_HISTORY)
@@ -0,0 +1,87 @@
+"""Lazy registry of the CrewAI agents, crews and tools.
+
+Importing crewai (litellm and chromadb come with it) and building the Agent,
+LLM and tool instances of the agent modules is most of the app's cold start.
+Routes and background jobs resolve them by name here instead of importing
+the agent modules, so each module is imported on first use, or up front by
+warm(), and /health answers without them.
+"""
+
+import asyncio
+import importlib
+import threading
+import time
+
+
+# name -> "module:attribute"
+AGENT_ENTRIES = {
+    "create_murder_mystery_game": "agents.creategame:create_murder_mystery_game",
+    "game_creator_agent": "agents.creategame:game_creator_agent",
+    "handle_query": "agents.gamemaster:handle_query",
+    "handle_query_structured": "agents.gamemaster:handle_query_structured",
+    "master_agent": "agents.gamemaster:master_agent",
+    "database_agent": "agents.gamemaster:database_agent",
+    "character_agent": "agents.gamemaster:character_agent",
+    "analyze_turns": "agents.updatecrew:analyze_turns",
+    "update_agent": "agents.updatecrew:update_agent",
+    "fold_interaction": "agents.summarizer:fold_interaction",
+    "fold_chapter": "agents.summarizer:fold_chapter",
+    "summarizer_agent": "agents.summarizer:agent",
+    "diff_references": "agents.statediff:diff_references",
+    "generate_character_images": "agents.imagegen:generate_character_images",
+    "generate_location_images": "agents.imagegen:generate_location_images",
+    "generate_clue_images": "agents.imagegen:generate_clue_images",
+}
+
+
+class AgentRegistry:
+    """Objects from the agent modules by name, imported on first use."""
+
+    def __init__(self, entries: dict):
+        self.entries = entries
+        self._loaded: dict[str, object] = {}
+        self._load_ms: dict[str, float] = {}
+        self._lock = threading.RLock()
+        self.warmed_ms: float | None = None
+
+    def get(self, name: str):
+        """Return the named object, importing its module if needed (blocks)."""
+        loaded = self._loaded.get(name)
+        if loaded is not None:
+            return loaded
+        with self._lock:
+            if name not in self._loaded:
+                started = time.perf_counter()
+                # Handlers must be on the event bus before the first crew runs
+                importlib.import_module("agents.events")
+                module, attribute = self.entries[name].split(":")
+                self._loaded[name] = getattr(importlib.import_module(module), attribute)
+                self._load_ms[name] = (time.perf_counter() - started) * 1000
+            return self._loaded[name]
+
+    async def load(self, name: str):
+        """get() for the event loop; a first import runs in a worker thread."""
+        loaded = self._loaded.get(name)
+        if loaded is not None:
+            return loaded
+        return await asyncio.to_thread(self.get, name)
+
+    def warm(self, names: list = None) -> float:
+        """Import and build everything (or the given names) now; returns ms."""
+        started = time.perf_counter()
+        for name in names or self.entries:
+            self.get(name)
+        self.warmed_ms = (time.perf_counter() - started) * 1000
+        print(f"🔥 Warmed {len(names or self.entries)} agent registry entries in {self.warmed_ms:.0f}ms")
+        return self.warmed_ms
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "loaded": {name: round(ms, 1) for name, ms in self._load_ms.items()},
+                "pending": [name for name in self.entries if name not in self._loaded],
+                "warmed_ms": round(self.warmed_ms, 1) if self.warmed_ms is not None else None,
+            }
+
+
+agent_registry = AgentRegistry(AGENT_ENTRIES)
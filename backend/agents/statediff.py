@@ -0,0 +1,102 @@
+"""Deterministic differ from structured game master output to GameUpdates.
+
+In structured mode the game master names the clues, locations and characters
+a turn touched. Comparing those references with the current world snapshot
+gives the same updates every time, without running the update crew. Since
+they write to the world, references only count when they match a name exactly
+or closely and unambiguously (NameIndex.unambiguous).
+"""
+
+from datetime import datetime, timedelta, timezone
+
+from classes import GameUpdate, GameUpdateAnalysis
+
+
+def next_event_time(timeline_events: list) -> datetime:
+    """One minute after the latest recorded event, so new events sort last."""
+    latest = None
+    for event in timeline_events:
+        try:
+            event_time = datetime.fromisoformat(str(event.get("event_time")))
+        except ValueError:
+            continue
+        if event_time.tzinfo is None:
+            event_time = event_time.replace(tzinfo=timezone.utc)
+        latest = max(latest, event_time) if latest else event_time
+    return latest + timedelta(minutes=1) if latest else datetime.now(timezone.utc)
+
+
+def diff_references(snapshot, references: dict) -> GameUpdateAnalysis:
+    """GameUpdates needed to bring the world in line with a GameMasterOutput."""
+    updates = []
+    unknown = []
+    discovered_at = datetime.now(timezone.utc).isoformat()
+
+    # Revealed clues that the world does not know about yet
+    for title in references.get("clues_revealed") or []:
+        clue = snapshot.name_index.unambiguous(title, "clue")
+        if not clue:
+            unknown.append(title)
+            continue
+        if clue.get("is_revealed") or any(u.data.get("id") == clue["id"] for u in updates):
+            continue
+        updates.append(GameUpdate(
+            table="clues",
+            action="update",
+            data={"id": clue["id"], "is_revealed": True, "discovered_by": "player", "discovered_at": discovered_at},
+            reasoning=f"The game master revealed '{clue['title']}'",
+        ))
+
+    # Entering a location proves it is accessible
+    current_location = None
+    for name in references.get("locations_entered") or []:
+        location = snapshot.name_index.unambiguous(name, "location")
+        if not location:
+            unknown.append(name)
+            continue
+        current_location = location["name"]
+        if not location.get("is_accessible", True):
+            updates.append(GameUpdate(
+                table="locations",
+                action="update",
+                data={"id": location["id"], "is_accessible": True},
+                reasoning=f"The player entered '{location['name']}'",
+            ))
+
+    # One timeline event per questioned character, unless it is among the
+    # snapshot's recent events already
+    recorded = {(event.get("event_description") or "").lower() for event in snapshot.timeline_events}
+    event_time = next_event_time(snapshot.timeline_events)
+    for name in references.get("characters_questioned") or []:
+        character = snapshot.name_index.unambiguous(name, "character")
+        if not character:
+            unknown.append(name)
+            continue
+        description = f"The detective questioned {character['name']}"
+        if current_location:
+            description += f" in the {current_location}"
+        if description.lower() in recorded:
+            continue
+        recorded.add(description.lower())
+        updates.append(GameUpdate(
+            table="timeline_events",
+            action="insert",
+            data={
+                "event_time": event_time.isoformat(),
+                "event_description": description,
+                "location_id": current_location,
+                "character_ids": [character["name"]],
+                "event_type": "conversation",
+            },
+            reasoning=f"The player questioned '{character['name']}'",
+        ))
+        event_time += timedelta(minutes=1)
+
+    if unknown:
+        print(f"🔍 Ignoring unknown references from the game master: {', '.join(unknown)}")
+
+    return GameUpdateAnalysis(
+        updates=updates,
+        has_changes=bool(updates),
+        summary="; ".join(u.reasoning for u in updates) or "No state changes",
+    )
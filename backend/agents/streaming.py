@@ -0,0 +1,84 @@
+"""Relay game master progress and final-answer tokens to an SSE stream.
+
+Crews run in executor threads with a copy of the request's context, and the
+CrewAI event bus calls handlers synchronously in the emitting thread. The
+handlers in agents.events therefore see the current_stream of the request that started
+the crew and forward events to it without mixing concurrent players.
+"""
+
+import asyncio
+import contextvars
+import json
+
+from database.repository import repository
+
+
+FINAL_ANSWER_MARKER = "Final Answer:"
+DELEGATION_TOOLS = ("Delegate work to coworker", "Ask question to coworker")
+MANAGER_ROLES = (None, "Game Master Orchestrator")
+
+
+class GameMasterStream:
+    """Thread-safe bridge from crew event handlers to an asyncio queue."""
+
+    def __init__(self, game_id: str, loop: asyncio.AbstractEventLoop, relay_tokens: bool = True):
+        self.game_id = game_id
+        self.loop = loop
+        self.relay_tokens = relay_tokens
+        self.queue: asyncio.Queue = asyncio.Queue()
+        self._buffer = ""
+        self._in_answer = False
+
+    def emit(self, event: str, data: dict):
+        self.loop.call_soon_threadsafe(self.queue.put_nowait, (event, data))
+
+    def close(self):
+        self.loop.call_soon_threadsafe(self.queue.put_nowait, None)
+
+    def start_llm_call(self):
+        # A new manager call after answer tokens were sent means the answer was retried
+        if self._in_answer:
+            self.emit("reset", {})
+        self._buffer = ""
+        self._in_answer = False
+
+    def add_chunk(self, chunk: str):
+        if self._in_answer:
+            self.emit("token", {"text": chunk})
+            return
+        self._buffer += chunk
+        index = self._buffer.find(FINAL_ANSWER_MARKER)
+        if index >= 0:
+            self._in_answer = True
+            remainder = self._buffer[index + len(FINAL_ANSWER_MARKER):].lstrip()
+            if remainder:
+                self.emit("token", {"text": remainder})
+
+
+current_stream: contextvars.ContextVar[GameMasterStream | None] = contextvars.ContextVar("current_stream", default=None)
+
+
+def format_sse(event: str, data: dict) -> str:
+    """Format one server-sent event."""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+def describe_delegation(game_id: str, tool_args) -> str:
+    """Turn a manager delegation into a player-facing progress message."""
+    if isinstance(tool_args, str):
+        try:
+            tool_args = json.loads(tool_args)
+        except ValueError:
+            tool_args = {"task": tool_args}
+    coworker = str(tool_args.get("coworker", ""))
+    if "Database" in coworker:
+        return "consulting database"
+
+    text = f"{tool_args.get('task', '')} {tool_args.get('context', '')}".lower()
+    try:
+        for character in repository.load_world_sync(game_id).characters:
+            if character["name"] and character["name"].lower() in text:
+                return f"speaking with {character['name']}"
+    except Exception:
+        pass
+    return "speaking with a character"
@@ -1,11 +1,12 @@
 from crewai import Agent, Task, Crew
+from agents.tracing import CREW_VERBOSE
 
 
 agent = Agent(
     role="Game Summarizer",
     goal="Summarize the recent game state",
     backstory="You are an expert in summarizing interaction history. You will be given the recent interactions so far. You will need to summarize them in a way that is easy to understand and use.",
-    verbose=True,
+    verbose=CREW_VERBOSE,
 )
 
 
@@ -23,7 +24,35 @@ def summarize_game_state(interactions: list):
     return result.raw
 
 
+def fold_interaction(rolling_summary: str, player_query: str, agent_response: str):
+    """Fold the newest interaction into the rolling summary of recent turns."""
+    task = Task(
+    description=f"""Update the running summary of the recent game state with the newest interaction.
+    Keep everything important from the current summary, add what the new interaction changed, and keep track of who said what.
+    Keep the result under 250 words.
+    Current summary: {rolling_summary or "(nothing yet)"}
+    Newest interaction:
+    Player: {player_query}
+    AI: {agent_response}""",
+    expected_output="The updated summary of the recent game state",
+    agent=agent,
+)
+    crew = Crew(agents=[agent], tasks=[task])
+    result = crew.kickoff()
+    return result.raw
 
 
-
-
+def fold_chapter(story_summary: str, rolling_summary: str):
+    """Fold a finished chapter of recent turns into the story-so-far summary."""
+    task = Task(
+    description=f"""Merge the latest chapter of play into the story-so-far summary of the murder mystery.
+    Keep discovered clues, suspects questioned, accusations and unresolved leads; drop small talk.
+    Keep the result under 300 words so it stays compact for long sessions.
+    Story so far: {story_summary or "(the game has just started)"}
+    Latest chapter: {rolling_summary}""",
+    expected_output="The updated story-so-far summary",
+    agent=agent,
+)
+    crew = Crew(agents=[agent], tasks=[task])
+    result = crew.kickoff()
+    return result.raw
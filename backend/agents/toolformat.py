@@ -0,0 +1,173 @@
+"""Compact, token-budgeted serialization of agent tool output.
+
+Tools used to json.dumps whole rows (metadata, image URLs, timestamps,
+game_id) into the LLM context. Each tool now projects rows onto the columns
+an agent actually uses, renames them to short keys and drops empty values.
+Lists can be rendered as compact JSON or as a tab-separated table
+(TOOL_OUTPUT_FORMAT). Every output is measured against TOOL_TOKEN_BUDGET; when
+it is over, long texts are shortened first and then whole rows are dropped,
+with a note telling the agent how many were left out.
+"""
+
+import json
+import os
+import threading
+
+from agents.context import estimate_tokens
+
+
+TOOL_OUTPUT_FORMAT = os.getenv("TOOL_OUTPUT_FORMAT", "json").lower()  # json or table
+TOOL_TOKEN_BUDGET = int(os.getenv("TOOL_TOKEN_BUDGET", "1500"))
+# Long free-text values are cut to this many characters when over budget
+TRUNCATED_TEXT_CHARS = 200
+
+# Column -> short key, per entity kind. The update crew writes back with these
+# keys; database.updates.COLUMN_ALIASES maps them to the columns again.
+CHARACTER_COLUMNS = {
+    "id": "id", "name": "name", "description": "desc", "personality": "personality", "lie_policy": "lie_policy",
+    "is_killer": "killer", "is_alive": "alive", "is_victim": "victim", "secrets": "secrets", "relationships": "relations", "observations": "observations",
+}
+LOCATION_COLUMNS = {
+    "id": "id", "name": "name", "description": "desc", "is_accessible": "accessible",
+    "connected_locations": "exits", "atmosphere": "mood",
+}
+LOCATION_LIST_COLUMNS = {k: v for k, v in LOCATION_COLUMNS.items() if k != "id"}
+CLUE_COLUMNS = {
+    "id": "id", "title": "title", "description": "desc", "location_id": "loc", "is_revealed": "revealed",
+    "significance_level": "sig", "discovery_method": "method", "points_to": "points_to", "discovered_by": "found_by",
+}
+CLUE_IN_LOCATION_COLUMNS = {k: CLUE_COLUMNS[k] for k in ("id", "title", "description", "is_revealed", "significance_level", "discovery_method")}
+TIMELINE_COLUMNS = {
+    "event_time": "time", "event_description": "desc", "location_id": "loc", "character_ids": "chars",
+    "event_type": "type", "is_public": "public", "witness_ids": "witnesses", "relevance": "score",
+}
+
+
+class ToolOutputStats:
+    """Token counts and truncations of tool output, per tool."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._tools: dict[str, dict] = {}
+
+    def record(self, tool: str, tokens: int, truncated: bool):
+        with self._lock:
+            entry = self._tools.setdefault(tool, {"calls": 0, "tokens": 0, "max_tokens": 0, "truncated": 0})
+            entry["calls"] += 1
+            entry["tokens"] += tokens
+            entry["max_tokens"] = max(entry["max_tokens"], tokens)
+            entry["truncated"] += int(truncated)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "format": TOOL_OUTPUT_FORMAT,
+                "token_budget": TOOL_TOKEN_BUDGET,
+                "tools": {
+                    tool: {**entry, "avg_tokens": round(entry["tokens"] / entry["calls"], 1)}
+                    for tool, entry in self._tools.items()
+                },
+            }
+
+
+tool_output_stats = ToolOutputStats()
+
+
+def _is_empty(value) -> bool:
+    return value is None or value == "" or value == [] or value == {}
+
+
+def project(row: dict, columns: dict) -> dict:
+    """Keep the listed columns under their short keys, without empty values."""
+    return {short: row[column] for column, short in columns.items() if not _is_empty(row.get(column))}
+
+
+def _shorten(row: dict, limit: int) -> dict:
+    shortened = {}
+    for key, value in row.items():
+        if isinstance(value, (dict, list)):
+            text = json.dumps(value, separators=(",", ":"), ensure_ascii=False)
+            value = value if len(text) <= limit else text[:limit - 3] + "..."
+        elif isinstance(value, str) and len(value) > limit:
+            value = value[:limit - 3].rstrip() + "..."
+        shortened[key] = value
+    return shortened
+
+
+def _cell(value) -> str:
+    if isinstance(value, list):
+        value = "; ".join(str(v) for v in value)
+    elif isinstance(value, dict):
+        value = json.dumps(value, separators=(",", ":"), ensure_ascii=False)
+    return " ".join(str(value).split())
+
+
+def _render(label: str, rows: list, omitted: int, fmt: str, extra: dict = None) -> str:
+    if fmt == "table":
+        keys = list(dict.fromkeys(key for row in rows for key in row))
+        header = f"{label} ({len(rows)} rows{f', {omitted} omitted' if omitted else ''})"
+        header += "".join(f" {key}={value}" for key, value in (extra or {}).items())
+        lines = [header, "\t".join(keys)]
+        lines += ["\t".join(_cell(row.get(key, "")) for key in keys) for row in rows]
+        return "\n".join(lines)
+    payload = {label: rows, **(extra or {})}
+    if omitted:
+        payload["omitted"] = f"{omitted} more not shown, ask for specific items"
+    return json.dumps(payload, separators=(",", ":"), ensure_ascii=False, default=str)
+
+
+def format_rows(tool: str, label: str, rows: list, columns: dict, keep: str = "head", budget: int = None, extra: dict = None) -> str:
+    """Serialize rows for the LLM within the token budget.
+
+    keep="tail" drops the oldest rows first (timelines), "head" the last ones.
+    extra holds scalar fields rendered next to the rows (totals, cursors).
+    """
+    budget = budget or TOOL_TOKEN_BUDGET
+    projected = [project(row, columns) for row in rows]
+    output = _render(label, projected, 0, TOOL_OUTPUT_FORMAT, extra)
+    truncated = estimate_tokens(output) > budget
+
+    if truncated:
+        projected = [_shorten(row, TRUNCATED_TEXT_CHARS) for row in projected]
+        kept = projected
+        output = _render(label, kept, 0, TOOL_OUTPUT_FORMAT, extra)
+        while estimate_tokens(output) > budget and len(kept) > 1:
+            kept = kept[1:] if keep == "tail" else kept[:-1]
+            output = _render(label, kept, len(projected) - len(kept), TOOL_OUTPUT_FORMAT, extra)
+
+    tool_output_stats.record(tool, estimate_tokens(output), truncated)
+    return output
+
+
+def format_record(tool: str, row: dict, columns: dict, budget: int = None, extra: dict = None) -> str:
+    """Serialize a single row as compact JSON within the token budget.
+
+    extra holds fields added after the row's own (such as a match note).
+    """
+    budget = budget or TOOL_TOKEN_BUDGET
+    record = {**project(row, columns), **(extra or {})}
+    output = json.dumps(record, separators=(",", ":"), ensure_ascii=False, default=str)
+    truncated = estimate_tokens(output) > budget
+    limit = TRUNCATED_TEXT_CHARS * 4
+    while estimate_tokens(output) > budget and limit >= 50:
+        output = json.dumps(_shorten(record, limit), separators=(",", ":"), ensure_ascii=False, default=str)
+        limit //= 2
+    tool_output_stats.record(tool, estimate_tokens(output), truncated)
+    return output
+
+
+def match_note(match: dict, query: str) -> dict:
+    """Tell the agent when a name lookup returned a different name than asked for."""
+    if match["score"] >= 1.0:
+        return {}
+    return {"match": f"closest match for '{query}' (score {match['score']}), not an exact match"}
+
+
+def format_text(tool: str, text: str, budget: int = None) -> str:
+    """Measure a plain-text tool answer and cut it at the budget."""
+    budget = budget or TOOL_TOKEN_BUDGET
+    truncated = estimate_tokens(text) > budget
+    if truncated:
+        text = text[:budget * 4 - 30].rstrip() + " ... (truncated)"
+    tool_output_stats.record(tool, estimate_tokens(text), truncated)
+    return text
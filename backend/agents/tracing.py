@@ -0,0 +1,215 @@
+"""Span trees of player turns.
+
+A Trace records what a turn spent its time on as nested spans: the route's
+stages, the crew kickoff, each agent execution, manager iterations (one per
+manager LLM call), delegations to coworkers, tool runs and LLM calls with
+estimated prompt/completion tokens. Spans are fed by the CrewAI event
+handlers in agents.metrics. Finished traces are kept in memory by interaction
+id and served by GET /debug/traces/{interaction_id} as a JSON tree, Chrome
+trace events (chrome://tracing, Perfetto, speedscope) or a text flame graph.
+
+With tracing in place the agents' verbose stdout is off unless CREW_VERBOSE.
+"""
+
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+
+CREW_VERBOSE = os.getenv("CREW_VERBOSE", "false").lower() == "true"
+# Finished traces kept for the debug endpoints
+TRACE_HISTORY = int(os.getenv("TRACE_HISTORY", "200"))
+# Longest tool argument / error preview stored on a span
+TRACE_PREVIEW_CHARS = 200
+# Free-text tool arguments (delegation task and context) can quote the
+# solution, so spans only keep their length
+REDACTED_ARG_KEYS = {"task", "context", "question", "query"}
+
+
+def preview(value) -> str:
+    text = " ".join(str(value).split())
+    return text if len(text) <= TRACE_PREVIEW_CHARS else text[:TRACE_PREVIEW_CHARS - 3] + "..."
+
+
+def preview_args(args) -> str:
+    """Tool arguments for a span: lookup keys as-is, free text only as its length.
+
+    Tool output is never stored on spans; it carries the killer flag,
+    character secrets and clue solutions.
+    """
+    if isinstance(args, str):
+        try:
+            args = json.loads(args)
+        except ValueError:
+            return f"<{len(args)} chars>"
+    if not isinstance(args, dict):
+        return f"<{len(str(args))} chars>"
+    return preview({
+        key: f"<{len(str(value))} chars>" if key in REDACTED_ARG_KEYS else value
+        for key, value in args.items()
+    })
+
+
+class Trace:
+    """Span tree of one turn. Spans opened on a thread nest under that thread's
+    open spans; a thread's first span nests under the latest open span of the
+    turn (the crew thread's spans under the route's crew stage)."""
+
+    def __init__(self, game_id: str):
+        self.game_id = game_id
+        self.started_at = time.perf_counter()
+        self.root = self._new_span("turn", "turn", 0.0, {"game_id": game_id, "started_at": datetime.now(timezone.utc).isoformat()})
+        self._stacks: dict[int, list] = {}
+        self._open: list = []
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _new_span(kind: str, name: str, start_ms: float, attributes: dict) -> dict:
+        return {"name": name, "kind": kind, "start_ms": start_ms, "end_ms": None, "attributes": attributes, "children": []}
+
+    def _now(self) -> float:
+        return round((time.perf_counter() - self.started_at) * 1000, 3)
+
+    def open(self, kind: str, name: str, **attributes) -> dict:
+        with self._lock:
+            stack = self._stacks.setdefault(threading.get_ident(), [])
+            parent = stack[-1] if stack else (self._open[-1] if self._open else self.root)
+            span = self._new_span(kind, name, self._now(), attributes)
+            parent["children"].append(span)
+            stack.append(span)
+            self._open.append(span)
+            return span
+
+    def close(self, kind: str, **attributes):
+        """Close the innermost open span of this kind on this thread, and any left open inside it."""
+        with self._lock:
+            stack = self._stacks.get(threading.get_ident()) or []
+            for index in range(len(stack) - 1, -1, -1):
+                if stack[index]["kind"] == kind:
+                    break
+            else:
+                return None
+            now = self._now()
+            for span in stack[index:]:
+                span["end_ms"] = now
+                self._open.remove(span)
+            span = stack[index]
+            del stack[index:]
+            span["attributes"].update(attributes)
+            return span
+
+    def current(self, kind: str):
+        """Innermost open span of this kind on this thread."""
+        with self._lock:
+            for span in reversed(self._stacks.get(threading.get_ident()) or []):
+                if span["kind"] == kind:
+                    return span
+        return None
+
+    @contextmanager
+    def span(self, kind: str, name: str, **attributes):
+        self.open(kind, name, **attributes)
+        try:
+            yield
+        finally:
+            self.close(kind)
+
+    def finish(self) -> dict:
+        """Close whatever is still open and return the tree."""
+        with self._lock:
+            now = self._now()
+            for span in self._open:
+                span["end_ms"] = now
+                span["attributes"]["unfinished"] = True
+            self._open.clear()
+            self._stacks.clear()
+            self.root["end_ms"] = now
+            return self.root
+
+
+def count_spans(span: dict) -> int:
+    return 1 + sum(count_spans(child) for child in span["children"])
+
+
+def to_chrome(root: dict) -> list:
+    """Chrome trace events ("X" complete events, microseconds)."""
+    events = []
+
+    def walk(span):
+        end_ms = span["end_ms"] if span["end_ms"] is not None else span["start_ms"]
+        events.append({
+            "name": span["name"],
+            "cat": span["kind"],
+            "ph": "X",
+            "ts": int(span["start_ms"] * 1000),
+            "dur": int((end_ms - span["start_ms"]) * 1000),
+            "pid": 1,
+            "tid": 1,
+            "args": span["attributes"],
+        })
+        for child in span["children"]:
+            walk(child)
+
+    walk(root)
+    return events
+
+
+def to_flame_text(root: dict, width: int = 60) -> str:
+    """Indented span list with a bar per span on the turn's timeline."""
+    total = max(root["end_ms"] or 0, 0.001)
+    lines = []
+
+    def walk(span, depth):
+        end_ms = span["end_ms"] if span["end_ms"] is not None else total
+        offset = int(span["start_ms"] / total * width)
+        length = max(1, int((end_ms - span["start_ms"]) / total * width))
+        bar = " " * offset + "█" * min(length, width - offset)
+        label = ("  " * depth + f"{span['kind']}: {span['name']}")[:48]
+        lines.append(f"{label:<48} {end_ms - span['start_ms']:>9.1f} ms |{bar:<{width}}|")
+        for child in span["children"]:
+            walk(child, depth + 1)
+
+    walk(root, 0)
+    return "\n".join(lines)
+
+
+class TraceStore:
+    """Most recent finished traces by interaction id."""
+
+    def __init__(self, history: int):
+        self.history = history
+        self._traces: OrderedDict[str, dict] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def save(self, interaction_id: str, trace: Trace):
+        root = trace.finish()
+        with self._lock:
+            self._traces[str(interaction_id)] = root
+            self._traces.move_to_end(str(interaction_id))
+            while len(self._traces) > self.history:
+                self._traces.popitem(last=False)
+
+    def get(self, interaction_id: str):
+        with self._lock:
+            return self._traces.get(str(interaction_id))
+
+    def recent(self) -> list:
+        with self._lock:
+            items = list(self._traces.items())
+        return [
+            {
+                "interaction_id": interaction_id,
+                "game_id": root["attributes"]["game_id"],
+                "started_at": root["attributes"]["started_at"],
+                "duration_ms": root["end_ms"],
+                "spans": count_spans(root),
+            }
+            for interaction_id, root in reversed(items)
+        ]
+
+
+trace_store = TraceStore(TRACE_HISTORY)
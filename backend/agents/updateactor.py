@@ -0,0 +1,99 @@
+"""Per-game serialized update analysis.
+
+Every game gets at most one actor task. Turns submitted while it is waiting
+are debounced into one batch, analyzed by a single update crew and applied
+before the next batch starts, so overlapping analyses of the same game can no
+longer race each other into duplicate clues.
+"""
+
+import asyncio
+import os
+
+
+UPDATE_DEBOUNCE_SECONDS = float(os.getenv("UPDATE_DEBOUNCE_SECONDS", "2"))
+UPDATE_MAX_BATCH = int(os.getenv("UPDATE_MAX_BATCH", "5"))
+
+
+class UpdateActor:
+    """Mailbox of (query, response) turns per game, drained by one task per game.
+
+    analyze(game_id, turns) returns the raw analysis and apply(game_id,
+    analysis) stores it; submit() resolves with apply's result for the batch
+    that contained the turn.
+    """
+
+    def __init__(self, analyze, apply, debounce: float, max_batch: int):
+        self.analyze = analyze
+        self.apply = apply
+        self.debounce = debounce
+        self.max_batch = max_batch
+        self._mailboxes: dict[str, list] = {}
+        self._wakeups: dict[str, asyncio.Event] = {}
+        self._workers: dict[str, asyncio.Task] = {}
+        self.turns = 0
+        self.batches = 0
+        self.failed_batches = 0
+
+    async def submit(self, game_id: str, player_query: str, ai_response: str):
+        future = asyncio.get_running_loop().create_future()
+        self._mailboxes.setdefault(game_id, []).append((player_query, ai_response, future))
+        self.turns += 1
+        if game_id in self._workers:
+            self._wakeups[game_id].set()
+        else:
+            self._wakeups[game_id] = asyncio.Event()
+            self._workers[game_id] = asyncio.create_task(self._run(game_id))
+        return await future
+
+    async def _run(self, game_id: str):
+        mailbox, wakeup = self._mailboxes[game_id], self._wakeups[game_id]
+        batch = []
+        try:
+            while mailbox:
+                # Debounce: wait until the player pauses or the batch is full
+                while len(mailbox) < self.max_batch:
+                    wakeup.clear()
+                    try:
+                        await asyncio.wait_for(wakeup.wait(), self.debounce)
+                    except asyncio.TimeoutError:
+                        break
+
+                batch = mailbox[:self.max_batch]
+                del mailbox[:self.max_batch]
+                self.batches += 1
+                print(f"🔍 Analyzing {len(batch)} turn(s) for game {game_id}")
+                try:
+                    analysis = await self.analyze(game_id, [(query, response) for query, response, _ in batch])
+                    result = await self.apply(game_id, analysis)
+                except Exception as e:
+                    self.failed_batches += 1
+                    for _, _, future in batch:
+                        if not future.done():
+                            future.set_exception(e)
+                    continue
+                for _, _, future in batch:
+                    if not future.done():
+                        future.set_result(result)
+        except asyncio.CancelledError:
+            # Shutdown: fail the batch in flight and the queued turns instead of leaving submit() hanging
+            for _, _, future in batch + mailbox:
+                if not future.done():
+                    future.set_exception(asyncio.CancelledError())
+            raise
+        finally:
+            # No await between the empty-mailbox check and here, so no turn is stranded
+            del self._workers[game_id]
+            del self._wakeups[game_id]
+            del self._mailboxes[game_id]
+
+    def stats(self) -> dict:
+        return {
+            "debounce_seconds": self.debounce,
+            "max_batch": self.max_batch,
+            "active_games": len(self._workers),
+            "pending_turns": sum(len(m) for m in self._mailboxes.values()),
+            "turns": self.turns,
+            "batches": self.batches,
+            "failed_batches": self.failed_batches,
+            "avg_batch_size": round(self.turns / self.batches, 2) if self.batches else 0.0,
+        }
@@ -1,4 +1,6 @@
 from crewai import Agent, Task, Crew, Process   
+from agents.executor import run_crew
+from agents.tracing import CREW_VERBOSE
 from classes import GameUpdateAnalysis, GetCharacterDataTool, GetLocationDataTool, GetCluesInLocationTool, SearchCharactersTool, GetTimelineEventsTool, GetAllCluesTool, GetAllLocationDataTool, ImageTool
 
 # Update Analysis Agent with database tools
@@ -18,7 +20,7 @@ update_agent = Agent(
     - get_location_data: Get current location information  
     - get_clues_in_location: See what clues already exist in a location
     - search_characters: Find characters by name
-    - get_timeline_events: See all events that have happened in the game so far
+    - get_timeline_events: Search events that have happened in the game so far (pass a query such as 'knife library' to find similar events)
     - get_all_clues: See all clues that have been discovered in the game
     - get_all_location_data: See all location data for the game
     - generate_mystery_image: Generate a mystery image for a clue/location/character
@@ -42,19 +44,37 @@ update_agent = Agent(
     - Don't suggest updates for things that already exist
     - Be conservative - when in doubt, don't update
     - Provide clear reasoning for each suggested update""",
-    verbose=True,
+    verbose=CREW_VERBOSE,
     memory=False
 )
 
-async def analyze_for_updates(game_id: str, player_query: str, ai_response: str) -> GameUpdateAnalysis:
+def format_turns(turns: list) -> str:
+    """Render one or more (player query, AI response) pairs for the analysis task."""
+    if len(turns) == 1:
+        player_query, ai_response = turns[0]
+        return f"PLAYER QUERY: {player_query}\n        AI RESPONSE: {ai_response}"
+    lines = ["INTERACTIONS (oldest first, analyze them together and list updates in the order they happened):"]
+    for i, (player_query, ai_response) in enumerate(turns, 1):
+        lines.append(f"        TURN {i} PLAYER QUERY: {player_query}\n        TURN {i} AI RESPONSE: {ai_response}")
+    return "\n".join(lines)
+
+
+async def analyze_for_updates(game_id: str, player_query: str, ai_response: str) -> str:
     """Analyze a game interaction to determine what database updates are needed."""
+    return await analyze_turns(game_id, [(player_query, ai_response)])
+
+
+async def analyze_turns(game_id: str, turns: list) -> str:
+    """Analyze a batch of consecutive game interactions with one crew run.
+
+    Returns the crew's raw GameUpdateAnalysis JSON, as store_game_update takes it.
+    """
     
     analysis_task = Task(
         description=f"""Analyze this game interaction to determine what database updates are needed.
 
         GAME ID: {game_id}
-        PLAYER QUERY: {player_query}
-        AI RESPONSE: {ai_response}
+        {format_turns(turns)}
         
         STEP 1: MANDATORY - Use your tools to check current game state BEFORE suggesting any updates
         - If interaction mentions characters, use get_character_data or search_characters
@@ -74,6 +94,7 @@ async def analyze_for_updates(game_id: str, player_query: str, ai_response: str)
         7. Were any character relationships/conversations revealed?
         
         STEP 3: Only suggest updates for actual changes between the current state and the interaction
+        If several turns are given, record each change once, even if more than one turn mentions it.
         DUPLICATE PREVENTION EXAMPLES:
         - AI says "You find a bloody knife" → FIRST check get_all_clues for "knife" → If knife already exists, DO NOT INSERT, just UPDATE is_revealed if needed
         - AI says "You discover a letter" → FIRST check get_all_clues for "letter" → If letter already exists, DO NOT INSERT
@@ -113,8 +134,8 @@ async def analyze_for_updates(game_id: str, player_query: str, ai_response: str)
         agents=[update_agent],
         tasks=[analysis_task],
         process=Process.sequential,
-        verbose=True
+        verbose=CREW_VERBOSE
     )
     
-    result = await crew.kickoff_async()
+    result = await run_crew(crew.kickoff)
     return result.raw
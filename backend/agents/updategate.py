@@ -0,0 +1,139 @@
+"""Cheap pre-filter deciding whether a turn needs the update analysis crew.
+
+Most turns (small talk, repeated questions, theory-crafting) change nothing
+in the world. The gate scores a turn with lexical signals matched against the
+game's known entities and only sends it to the tool-using update_agent when
+the score reaches UPDATE_GATE_THRESHOLD. Every decision is logged and the
+recent ones are kept for GET /debug/update-gate.
+"""
+
+import os
+import re
+import threading
+from collections import deque
+
+from database.repository import repository
+
+
+UPDATE_GATE_ENABLED = os.getenv("UPDATE_GATE_ENABLED", "true").lower() == "true"
+UPDATE_GATE_THRESHOLD = float(os.getenv("UPDATE_GATE_THRESHOLD", "2"))
+
+SIGNAL_WEIGHTS = {
+    "discovery": 2.0,        # narration of finding, revealing or unlocking something
+    "state_change": 2.0,     # new deaths ("found dead", not the victim being "dead"), arrests, doors opening or closing
+    "hidden_clue": 3.0,      # an unrevealed clue is mentioned
+    "revelation": 1.0,       # secrets, motives, alibis, relationships
+    "character": 0.5,        # a known character is mentioned
+    "location": 0.5,         # a known location is mentioned
+    "revealed_clue": 0.25,   # an already revealed clue comes up again
+}
+
+SIGNAL_PATTERNS = {
+    "discovery": r"\b(?:you (?:find|found|discover|discovered|notice|spot|uncover|pick up|pocket|pull out)|reveal(?:s|ed|ing)?|hidden|tucked (?:away|inside)|concealed|underneath|scrawled)\b",
+    "state_change": r"\b(?:dies|died|(?:falls?|fell|drops?|dropped|found|now) dead|killed|murdered|collapses|arrested|unlock(?:s|ed)?|(?:is|are|now) (?:locked|open|sealed)|breaks? (?:open|down)|confess(?:es|ed)?|flees|fled)\b",
+    "revelation": r"\b(?:secret(?:ly|s)?|affair|motive|alibi|admits?|admitted|blackmail(?:ed)?|debt|inheritance|witness(?:ed)?|saw (?:him|her|them|someone))\b",
+}
+_COMPILED = {signal: re.compile(pattern, re.IGNORECASE) for signal, pattern in SIGNAL_PATTERNS.items()}
+
+GENERIC_TOKENS = {"the", "of", "and", "a", "an", "old", "room", "mr", "mrs", "ms", "dr", "lady", "lord", "sir", "miss"}
+
+# Recent decisions kept for the debug endpoint
+RECENT_DECISIONS = 50
+
+
+def _tokens(text: str) -> set:
+    return set(re.findall(r"[a-z0-9']+", (text or "").lower()))
+
+
+def mentions(name: str, text: str, text_tokens: set) -> bool:
+    """Whether a known entity name is mentioned (full name, or half its distinctive words)."""
+    name = (name or "").lower().strip()
+    if not name:
+        return False
+    if name in text:
+        return True
+    distinctive = [t for t in _tokens(name) if len(t) > 3 and t not in GENERIC_TOKENS]
+    if not distinctive:
+        return False
+    return sum(t in text_tokens for t in distinctive) * 2 >= len(distinctive)
+
+
+def score_turn(snapshot, player_query: str, ai_response: str) -> tuple[float, dict]:
+    """Score a turn; returns (score, {signal: hits})."""
+    text = f"{player_query or ''}\n{ai_response or ''}".lower()
+    text_tokens = _tokens(text)
+    hits: dict[str, int] = {}
+
+    for signal, pattern in _COMPILED.items():
+        # Discovery and state changes only count when narrated, not when the player asks
+        source = text if signal == "revelation" else (ai_response or "")
+        if pattern.search(source):
+            hits[signal] = 1
+
+    for clue in snapshot.clues:
+        if mentions(clue.get("title"), text, text_tokens):
+            signal = "revealed_clue" if clue.get("is_revealed") else "hidden_clue"
+            hits[signal] = hits.get(signal, 0) + 1
+    for character in snapshot.characters:
+        if mentions(character.get("name"), text, text_tokens):
+            hits["character"] = hits.get("character", 0) + 1
+    for location in snapshot.locations:
+        if mentions(location.get("name"), text, text_tokens):
+            hits["location"] = hits.get("location", 0) + 1
+
+    score = sum(SIGNAL_WEIGHTS[signal] * count for signal, count in hits.items())
+    return round(score, 2), hits
+
+
+class UpdateGate:
+    """Decides per turn whether to run the update analysis and records why."""
+
+    def __init__(self, enabled: bool, threshold: float):
+        self.enabled = enabled
+        self.threshold = threshold
+        self._lock = threading.Lock()
+        self.analyzed = 0
+        self.skipped = 0
+        self.recent = deque(maxlen=RECENT_DECISIONS)
+
+    def should_analyze(self, game_id: str, player_query: str, ai_response: str) -> bool:
+        if not self.enabled:
+            return True
+        try:
+            score, hits = score_turn(repository.load_world_sync(game_id), player_query, ai_response)
+        except Exception as e:
+            # Without the world state we cannot tell; fall back to analyzing
+            print(f"❌ Update gate failed for game {game_id}: {str(e)}")
+            return True
+
+        analyze = score >= self.threshold
+        with self._lock:
+            if analyze:
+                self.analyzed += 1
+            else:
+                self.skipped += 1
+            self.recent.append({
+                "game_id": game_id,
+                "query": (player_query or "")[:80],
+                "score": score,
+                "signals": hits,
+                "analyzed": analyze,
+            })
+        if not analyze:
+            print(f"⏭️ Skipping update analysis for game {game_id} (score {score} < {self.threshold}, signals {hits})")
+        return analyze
+
+    def stats(self) -> dict:
+        with self._lock:
+            total = self.analyzed + self.skipped
+            return {
+                "enabled": self.enabled,
+                "threshold": self.threshold,
+                "analyzed": self.analyzed,
+                "skipped": self.skipped,
+                "skip_ratio": round(self.skipped / total, 3) if total else 0.0,
+                "recent": list(self.recent),
+            }
+
+
+update_gate = UpdateGate(UPDATE_GATE_ENABLED, UPDATE_GATE_THRESHOLD)
@@ -0,0 +1,26 @@
+"""Offline benchmark and load tools (see "Benchmarks" in the README).
+
+Importing the package points the backend's configuration at the stand-ins in
+benchmarks.fakes before any backend module reads it.
+"""
+
+import os
+import tempfile
+
+
+# Background jobs of a run go to a throwaway queue
+JOB_DIR = tempfile.mkdtemp(prefix="bench-jobs-")
+
+for key, value in {
+    "SUPABASE_URL": "https://bench.supabase.local",
+    "SUPABASE_SERVICE_ROLE_KEY": "bench-service-role-key",
+    "OPENAI_API_KEY": "sk-bench",
+    "JOB_QUEUE_PATH": os.path.join(JOB_DIR, "jobs.sqlite3"),
+    "ASSET_RECONCILE_ON_STARTUP": "false",
+    "IMAGE_RATE_PER_MINUTE": "1000000",
+    "IMAGE_RATE_BURST": "1000",
+    "CREWAI_DISABLE_TELEMETRY": "true",
+    "CREWAI_TRACING_ENABLED": "false",
+    "OTEL_SDK_DISABLED": "true",
+}.items():
+    os.environ.setdefault(key, value)
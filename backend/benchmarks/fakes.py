@@ -0,0 +1,621 @@
+"""Offline stand-ins for the services the backend talks to.
+
+- ScriptedLLM: a CrewAI BaseLLM that answers in the ReAct format with a
+  fixed script per agent role (delegate, call a tool, give the final answer),
+  emitting the same LLM call events as the real LLM.
+- FakeSupabase: the surface of the supabase client used by the backend
+  (table select/insert/update/upsert/delete with eq/in_/order/limit, the
+  create_game_world, apply_game_updates and query_timeline RPCs, storage list/upload/
+  get_public_url and auth admin) over in-memory tables. FakeAsyncSupabase
+  is its async face, standing in for the repository's acreate_client client.
+- StubImages / storage_transport: DALL-E stand-ins returning a URL on a fake
+  host, and an httpx transport serving that PNG and accepting storage uploads,
+  so the streaming upload code runs unchanged.
+
+install_fakes() wires them into the backend's module-level clients. Latencies
+are callables returning seconds, usually built by parse_latency().
+"""
+
+import asyncio
+import itertools
+import json
+import random
+import re
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+
+import httpx
+from crewai.llms.base_llm import BaseLLM
+from crewai.utilities.events import crewai_event_bus, LLMCallStartedEvent, LLMCallCompletedEvent
+from crewai.utilities.events.llm_events import LLMCallType
+
+from agents.context import estimate_tokens
+from database.timeline import parse_time
+
+
+IMAGE_HOST = "https://images.bench.local"
+FAKE_PNG = b"\x89PNG\r\n\x1a\n" + bytes(256 * 1024)
+
+UUID_PATTERN = r"[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}"
+
+
+def fixed_latency(ms: float):
+    return lambda: ms / 1000
+
+
+def parse_latency(spec: str):
+    """Latency sampler from a spec in milliseconds.
+
+    "800" or "fixed:800", "uniform:300-1500", "normal:800,200" (mean, stddev),
+    "lognormal:800,0.5" (median, sigma) or "exponential:800" (mean).
+    """
+    kind, _, params = spec.partition(":") if ":" in spec else ("fixed", "", spec)
+    try:
+        if kind == "fixed":
+            return fixed_latency(float(params))
+        if kind == "uniform":
+            low, high = (float(p) for p in params.split("-"))
+            return lambda: random.uniform(low, high) / 1000
+        if kind == "normal":
+            mean, stddev = (float(p) for p in params.split(","))
+            return lambda: max(0.0, random.gauss(mean, stddev)) / 1000
+        if kind == "lognormal":
+            median, sigma = (float(p) for p in params.split(","))
+            return lambda: random.lognormvariate(0, sigma) * median / 1000
+        if kind == "exponential":
+            mean = float(params)
+            return lambda: random.expovariate(1 / mean) / 1000 if mean else 0.0
+    except ValueError:
+        pass
+    raise ValueError(f"Invalid latency spec: {spec}")
+
+
+def _text(messages) -> str:
+    if isinstance(messages, str):
+        return messages
+    return "\n".join(str(m.get("content") or "") for m in messages)
+
+
+def _assistant_turns(messages) -> int:
+    if isinstance(messages, str):
+        return 0
+    return sum(1 for m in messages if m.get("role") == "assistant")
+
+
+def action(thought: str, tool: str, tool_input: dict) -> str:
+    return f"Thought: {thought}\nAction: {tool}\nAction Input: {json.dumps(tool_input)}"
+
+
+def final_answer(answer: str) -> str:
+    return f"Thought: I now know the final answer\nFinal Answer: {answer}"
+
+
+class ScriptedLLM(BaseLLM):
+    """Deterministic LLM following one script per agent role.
+
+    The game master delegates to the Database Query Specialist only when its
+    task carries no game context (as the prompt tells it to), then to the
+    Character Roleplay Specialist when a character is named, then answers.
+    """
+
+    def __init__(self, world: dict, latency=None, role_latency: dict = None):
+        super().__init__(model="scripted-fake")
+        self.world = world
+        self.latency = latency or fixed_latency(0)
+        self.role_latency = role_latency or {}
+        self.names = [c["name"] for c in world["characters"]]
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.delegations = 0
+
+    def supports_function_calling(self) -> bool:
+        return False
+
+    def get_context_window_size(self) -> int:
+        return 128000
+
+    def call(self, messages, tools=None, callbacks=None, available_functions=None, from_task=None, from_agent=None):
+        if isinstance(messages, str):
+            messages = [{"role": "user", "content": messages}]
+        crewai_event_bus.emit(self, event=LLMCallStartedEvent(
+            messages=messages, tools=tools, callbacks=callbacks, available_functions=available_functions,
+            from_task=from_task, from_agent=from_agent, model=self.model,
+        ))
+        # The hierarchical manager runs its task without being the task's agent
+        agent = from_agent or getattr(from_task, "agent", None)
+        role = getattr(agent, "role", "Game Master Orchestrator")
+        time.sleep(self.role_latency.get(role, self.latency)())
+        response = self.respond(role, messages)
+        with self._lock:
+            self.calls += 1
+            self.prompt_tokens += estimate_tokens(_text(messages))
+            self.completion_tokens += estimate_tokens(response)
+            self.delegations += int("coworker\nAction Input" in response)
+        crewai_event_bus.emit(self, event=LLMCallCompletedEvent(
+            messages=messages, response=response, call_type=LLMCallType.LLM_CALL,
+            from_task=from_task, from_agent=from_agent, model=self.model,
+        ))
+        return response
+
+    def counters(self) -> dict:
+        with self._lock:
+            return {"llm_calls": self.calls, "prompt_tokens": self.prompt_tokens,
+                    "completion_tokens": self.completion_tokens, "delegations": self.delegations}
+
+    def named_characters(self, text: str) -> list:
+        lowered = text.lower()
+        return [name for name in self.names if name.lower() in lowered or name.split()[-1].lower() in lowered.split()]
+
+    def respond(self, role: str, messages) -> str:
+        text = _text(messages)
+        step = _assistant_turns(messages)
+        script = {
+            "Game Master Orchestrator": self.game_master,
+            "Database Query Specialist": self.database_agent,
+            "Character Roleplay Specialist": self.character_agent,
+            "Murder Mystery Game Creator": self.game_creator,
+            "Game State Analyzer": self.update_analyzer,
+            "Game Summarizer": self.summarizer,
+        }.get(role)
+        return script(text, step) if script else final_answer("Done.")
+
+    def game_master(self, text: str, step: int) -> str:
+        query = (re.search(r"Player query: (.*)", text) or [None, ""])[1]
+        game_id = (re.search(UUID_PATTERN, text) or [""])[0]
+        characters = self.named_characters(query)
+        plan = []
+        if "GAME CONTEXT" not in text:
+            plan.append(("Database Query Specialist", f"Retrieve the game data relevant to: {query}"))
+        if characters:
+            plan.append(("Character Roleplay Specialist", f"Roleplay {characters[0]} answering: {query}"))
+        if step < len(plan):
+            coworker, task = plan[step]
+            return action(f"I should ask the {coworker}.", "Delegate work to coworker", {
+                "task": task, "context": f"game_id: {game_id}. Player query: {query}", "coworker": coworker,
+            })
+
+        narration = f"The detective considers the question: {query}. The candlelight flickers as the answer takes shape."
+        if "GameMasterOutput" in text:
+            return final_answer(json.dumps({
+                "narration": narration,
+                "clues_revealed": [c["title"] for c in self.world["clues"] if c["location_id"].lower() in query.lower()][:1],
+                "locations_entered": [l["name"] for l in self.world["locations"] if l["name"].lower() in query.lower()][:1],
+                "characters_questioned": characters[:1],
+                "solved": False,
+            }))
+        return final_answer(narration)
+
+    def database_agent(self, text: str, step: int) -> str:
+        if step == 0:
+            game_id = (re.search(UUID_PATTERN, text) or [""])[0]
+            characters = self.named_characters(text.split("Current Task:")[-1])
+            if characters:
+                return action("I need the character's record.", "get_character_data", {"game_id": game_id, "character_name": characters[0]})
+            return action("I need the clues of this game.", "get_all_clues", {"game_id": game_id})
+        observation = text.rsplit("Observation:", 1)[-1].strip()[:400]
+        return final_answer(f"Here is the requested data: {observation}")
+
+    def character_agent(self, text: str, step: int) -> str:
+        return final_answer("I was in the drawing room all evening, I assure you. Ask anyone.")
+
+    def game_creator(self, text: str, step: int) -> str:
+        return final_answer(json.dumps(self.world))
+
+    def update_analyzer(self, text: str, step: int) -> str:
+        return final_answer(json.dumps({
+            "updates": [{
+                "table": "timeline_events",
+                "action": "insert",
+                "data": {"event_time": "1923-10-12T23:00:00Z", "event_description": "The detective questioned a suspect",
+                         "event_type": "conversation", "character_ids": self.names[1:2]},
+                "reasoning": "The player questioned a suspect",
+            }],
+            "has_changes": True,
+            "summary": "Recorded the questioning",
+        }))
+
+    def summarizer(self, text: str, step: int) -> str:
+        return final_answer("The detective has begun questioning the household about the death in the library.")
+
+
+class FakeResponse:
+    def __init__(self, data):
+        self.data = data
+
+
+class FakeQuery:
+    """Chainable table query evaluated against FakeSupabase's rows on execute()."""
+
+    def __init__(self, db: "FakeSupabase", table: str):
+        self.db = db
+        self.table = table
+        self.operation = "select"
+        self.columns = "*"
+        self.payload = None
+        self.on_conflict = None
+        self.filters = []
+        self.order_by = None
+        self.limit_to = None
+
+    def select(self, columns: str = "*", **kwargs):
+        self.operation, self.columns = "select", columns
+        return self
+
+    def insert(self, rows, **kwargs):
+        self.operation, self.payload = "insert", rows
+        return self
+
+    def upsert(self, rows, on_conflict: str = None, **kwargs):
+        self.operation, self.payload, self.on_conflict = "upsert", rows, on_conflict
+        return self
+
+    def update(self, data: dict, **kwargs):
+        self.operation, self.payload = "update", data
+        return self
+
+    def delete(self, **kwargs):
+        self.operation = "delete"
+        return self
+
+    def eq(self, column: str, value):
+        self.filters.append(lambda row: str(row.get(column)) == str(value))
+        return self
+
+    def gte(self, column: str, value):
+        self.filters.append(lambda row: row.get(column) is not None and parse_time(row.get(column)) >= parse_time(value))
+        return self
+
+    def in_(self, column: str, values: list):
+        wanted = {str(v) for v in values}
+        self.filters.append(lambda row: str(row.get(column)) in wanted)
+        return self
+
+    def order(self, column: str, desc: bool = False, **kwargs):
+        self.order_by = (column, desc)
+        return self
+
+    def limit(self, count: int, **kwargs):
+        self.limit_to = count
+        return self
+
+    def _matches(self, row: dict) -> bool:
+        return all(f(row) for f in self.filters)
+
+    def _project(self, row: dict) -> dict:
+        if self.columns.strip() == "*":
+            return dict(row)
+        return {c.strip(): row.get(c.strip()) for c in self.columns.split(",")}
+
+    def execute(self) -> FakeResponse:
+        self.db.roundtrip()
+        return self.evaluate()
+
+    def evaluate(self) -> FakeResponse:
+        with self.db.lock:
+            rows = self.db.tables.setdefault(self.table, [])
+            if self.operation == "select":
+                selected = [r for r in rows if self._matches(r)]
+                if self.order_by:
+                    column, desc = self.order_by
+                    selected.sort(key=lambda r: str(r.get(column) or ""), reverse=desc)
+                if self.limit_to is not None:
+                    selected = selected[:self.limit_to]
+                return FakeResponse([self._project(r) for r in selected])
+            if self.operation == "insert":
+                payload = self.payload if isinstance(self.payload, list) else [self.payload]
+                inserted = [self.db.new_row(row) for row in payload]
+                rows.extend(inserted)
+                return FakeResponse([dict(r) for r in inserted])
+            if self.operation == "upsert":
+                payload = self.payload if isinstance(self.payload, list) else [self.payload]
+                keys = [k.strip() for k in (self.on_conflict or "id").split(",")]
+                written = []
+                for row in payload:
+                    existing = next((r for r in rows if all(str(r.get(k)) == str(row.get(k)) for k in keys)), None)
+                    if existing:
+                        existing.update(row)
+                        written.append(dict(existing))
+                    else:
+                        created = self.db.new_row(row)
+                        rows.append(created)
+                        written.append(dict(created))
+                return FakeResponse(written)
+            if self.operation == "update":
+                updated = []
+                for row in rows:
+                    if self._matches(row):
+                        row.update(self.payload)
+                        updated.append(dict(row))
+                return FakeResponse(updated)
+            deleted = [r for r in rows if self._matches(r)]
+            self.db.tables[self.table] = [r for r in rows if not self._matches(r)]
+            return FakeResponse(deleted)
+
+
+class FakeRpc:
+    def __init__(self, db: "FakeSupabase", name: str, params: dict):
+        self.db, self.name, self.params = db, name, params
+
+    def execute(self) -> FakeResponse:
+        self.db.roundtrip()
+        return self.evaluate()
+
+    def evaluate(self) -> FakeResponse:
+        handler = getattr(self.db, f"rpc_{self.name}", None)
+        if not handler:
+            raise RuntimeError(f"Unknown RPC {self.name}")
+        with self.db.lock:
+            return FakeResponse(handler(**self.params))
+
+
+class AsyncFakeQuery(FakeQuery):
+    async def execute(self) -> FakeResponse:
+        await self.db.async_roundtrip()
+        return self.evaluate()
+
+
+class AsyncFakeRpc(FakeRpc):
+    async def execute(self) -> FakeResponse:
+        await self.db.async_roundtrip()
+        return self.evaluate()
+
+
+class FakeBucket:
+    def __init__(self, db: "FakeSupabase", name: str):
+        self.db, self.name = db, name
+
+    def upload(self, path: str, file, file_options: dict = None):
+        self.db.roundtrip()
+        with self.db.lock:
+            self.db.objects.setdefault(self.name, {})[path] = len(file) if isinstance(file, (bytes, bytearray)) else 0
+        return SimpleNamespace(path=path)
+
+    def list(self, folder: str = "", options: dict = None, roundtrip: bool = True):
+        if roundtrip:
+            self.db.roundtrip()
+        options = options or {}
+        prefix = folder.rstrip("/") + "/" if folder else ""
+        entries = {}
+        with self.db.lock:
+            for path, size in self.db.objects.get(self.name, {}).items():
+                if not path.startswith(prefix):
+                    continue
+                head, _, rest = path[len(prefix):].partition("/")
+                # Folders are listed without an id
+                entries[head] = {"name": head, "id": None} if rest else {"name": head, "id": path, "metadata": {"size": size}}
+        items = sorted(entries.values(), key=lambda e: e["name"])
+        offset = options.get("offset", 0)
+        return items[offset:offset + options.get("limit", 100)]
+
+    def get_public_url(self, path: str) -> str:
+        return f"{self.db.url}/storage/v1/object/public/{self.name}/{path}"
+
+
+class AsyncFakeBucket(FakeBucket):
+    async def list(self, folder: str = "", options: dict = None):
+        await self.db.async_roundtrip()
+        return FakeBucket.list(self, folder, options, roundtrip=False)
+
+
+class FakeStorage:
+    def __init__(self, db: "FakeSupabase"):
+        self.db = db
+
+    def from_(self, bucket: str) -> FakeBucket:
+        return FakeBucket(self.db, bucket)
+
+
+class FakeAuthAdmin:
+    def __init__(self, db: "FakeSupabase"):
+        self.db = db
+
+    def get_user_by_id(self, user_id: str):
+        self.db.roundtrip()
+        user = SimpleNamespace(id=user_id) if user_id in self.db.users else None
+        return SimpleNamespace(user=user)
+
+
+class AsyncFakeAuthAdmin(FakeAuthAdmin):
+    async def get_user_by_id(self, user_id: str):
+        await self.db.async_roundtrip()
+        user = SimpleNamespace(id=user_id) if user_id in self.db.users else None
+        return SimpleNamespace(user=user)
+
+
+class FakeSupabase:
+    """In-memory replacement for the admin supabase client."""
+
+    def __init__(self, url: str, latency=None):
+        self.url = url
+        self.latency = latency or fixed_latency(0)
+        self.lock = threading.RLock()
+        self.tables: dict[str, list] = {}
+        self.objects: dict[str, dict] = {}
+        self.users: set = set()
+        self.storage = FakeStorage(self)
+        self.auth = SimpleNamespace(admin=FakeAuthAdmin(self))
+        self.roundtrips = 0
+        self._clock = itertools.count()
+        self._epoch = datetime.now(timezone.utc)
+
+    def roundtrip(self):
+        with self.lock:
+            self.roundtrips += 1
+        delay = self.latency()
+        if delay:
+            time.sleep(delay)
+
+    async def async_roundtrip(self):
+        with self.lock:
+            self.roundtrips += 1
+        delay = self.latency()
+        if delay:
+            await asyncio.sleep(delay)
+
+    def new_row(self, row: dict) -> dict:
+        # Strictly increasing created_at so ordering matches insertion order
+        created_at = (self._epoch + timedelta(microseconds=next(self._clock))).isoformat()
+        return {"id": str(uuid.uuid4()), "created_at": created_at, **row}
+
+    def table(self, name: str) -> FakeQuery:
+        return FakeQuery(self, name)
+
+    def rpc(self, name: str, params: dict) -> FakeRpc:
+        return FakeRpc(self, name, params)
+
+    def rpc_create_game_world(self, p_game, p_characters, p_locations, p_clues, p_timeline_events):
+        games = self.tables.setdefault("games", [])
+        for game in games:
+            if game.get("user_id") == p_game.get("user_id"):
+                game["is_active"] = False
+        game = self.new_row(p_game)
+        games.append(game)
+        for table, rows in (("characters", p_characters), ("locations", p_locations),
+                            ("clues", p_clues), ("timeline_events", p_timeline_events)):
+            self.tables.setdefault(table, []).extend(self.new_row({**row, "game_id": game["id"]}) for row in rows)
+        return game["id"]
+
+    def rpc_apply_game_updates(self, p_game_id, p_ops):
+        results = []
+        for op in p_ops:
+            rows = self.tables.setdefault(op["table"], [])
+            if op["action"] == "insert":
+                inserted = [self.new_row({**row, "game_id": p_game_id}) for row in op["rows"]]
+                rows.extend(inserted)
+                results.append([r["id"] for r in inserted])
+            elif op["action"] == "update":
+                by_id = {r["id"]: r for r in rows if str(r.get("game_id")) == str(p_game_id)}
+                affected = []
+                for row in op["rows"]:
+                    target = by_id.get(row["id"])
+                    if target:
+                        target.update({c: row[c] for c in op["columns"] if c in row})
+                        affected.append(row["id"])
+                results.append(affected)
+            else:
+                wanted = {str(i) for i in op["ids"]}
+                affected = [r["id"] for r in rows if str(r["id"]) in wanted and str(r.get("game_id")) == str(p_game_id)]
+                self.tables[op["table"]] = [r for r in rows if r["id"] not in affected]
+                results.append(affected)
+        return results
+
+    def rpc_query_timeline(self, p_game_id, p_start=None, p_end=None, p_characters=None, p_locations=None,
+                           p_event_types=None, p_after_created_at=None, p_after_id=None, p_limit=20):
+        def matches(event):
+            people = {n.lower() for n in (event.get("character_ids") or []) + (event.get("witness_ids") or [])}
+            return (
+                str(event.get("game_id")) == str(p_game_id)
+                and (not p_start or parse_time(event["event_time"]) >= parse_time(p_start))
+                and (not p_end or parse_time(event["event_time"]) <= parse_time(p_end))
+                and (not p_event_types or (event.get("event_type") or "").lower() in p_event_types)
+                and (not p_locations or (event.get("location_id") or "").lower() in p_locations)
+                and (not p_characters or bool(people & set(p_characters)))
+            )
+
+        matching = sorted(filter(matches, self.tables.get("timeline_events", [])),
+                          key=lambda e: (e["created_at"], str(e["id"])), reverse=True)
+        page = [e for e in matching if not p_after_created_at or (e["created_at"], str(e["id"])) < (p_after_created_at, p_after_id)]
+        return [{**e, "total_count": len(matching)} for e in page[:p_limit]]
+
+
+class FakeAsyncSupabase:
+    """Async client over the same in-memory tables as a FakeSupabase."""
+
+    def __init__(self, db: FakeSupabase):
+        self.db = db
+        self.auth = SimpleNamespace(admin=AsyncFakeAuthAdmin(db))
+        self.storage = SimpleNamespace(from_=lambda bucket: AsyncFakeBucket(db, bucket))
+
+    def table(self, name: str) -> AsyncFakeQuery:
+        return AsyncFakeQuery(self.db, name)
+
+    def rpc(self, name: str, params: dict) -> AsyncFakeRpc:
+        return AsyncFakeRpc(self.db, name, params)
+
+
+class StubImages:
+    """images.generate stand-in (sync, for ImageTool._run)."""
+
+    def __init__(self, latency=None):
+        self.latency = latency or fixed_latency(0)
+        self.calls = 0
+
+    def generate(self, prompt: str, **kwargs):
+        self.calls += 1
+        time.sleep(self.latency())
+        return SimpleNamespace(data=[SimpleNamespace(url=f"{IMAGE_HOST}/{uuid.uuid4().hex}.png")])
+
+
+class AsyncStubImages(StubImages):
+    """images.generate stand-in for the AsyncOpenAI client."""
+
+    async def generate(self, prompt: str, **kwargs):
+        self.calls += 1
+        await asyncio.sleep(self.latency())
+        return SimpleNamespace(data=[SimpleNamespace(url=f"{IMAGE_HOST}/{uuid.uuid4().hex}.png")])
+
+
+class ImageStream(httpx.SyncByteStream, httpx.AsyncByteStream):
+    """FAKE_PNG in chunks, like a download that has not been read yet."""
+
+    CHUNK = 64 * 1024
+
+    def __iter__(self):
+        for offset in range(0, len(FAKE_PNG), self.CHUNK):
+            yield FAKE_PNG[offset:offset + self.CHUNK]
+
+    async def __aiter__(self):
+        for chunk in self:
+            yield chunk
+
+
+def storage_transport(db: FakeSupabase) -> httpx.MockTransport:
+    """Serves FAKE_PNG from IMAGE_HOST and stores uploads to the storage REST API in db."""
+    upload_prefix = f"{db.url}/storage/v1/object/"
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        url = str(request.url)
+        if url.startswith(IMAGE_HOST):
+            return httpx.Response(200, stream=ImageStream(), headers={"content-length": str(len(FAKE_PNG))})
+        if request.method == "POST" and url.startswith(upload_prefix):
+            bucket, _, path = url[len(upload_prefix):].partition("/")
+            db.roundtrip()
+            with db.lock:
+                objects = db.objects.setdefault(bucket, {})
+                if path in objects:
+                    return httpx.Response(409, json={"error": "Duplicate", "message": "The resource already exists"})
+                objects[path] = len(request.content)
+            return httpx.Response(200, json={"Key": f"{bucket}/{path}"})
+        return httpx.Response(404, text=f"No fake route for {request.method} {url}")
+
+    return httpx.MockTransport(handler)
+
+
+def install_fakes(llm_latency=None, db_latency=None, image_latency=None, role_latency: dict = None):
+    """Point every client the backend uses at the offline stand-ins."""
+    import classes
+    import database.client as client
+    import database.storage as storage
+    from database.repository import repository
+    from agents.registry import agent_registry
+    from benchmarks.fixtures import BENCH_USER_ID, GAME_SETUP
+
+    db = FakeSupabase(client.SUPABASE_URL, db_latency)
+    db.users.add(BENCH_USER_ID)
+    repository._client = repository._rest = FakeAsyncSupabase(db)
+
+    llm = ScriptedLLM(GAME_SETUP, llm_latency, role_latency)
+    for name in ("master_agent", "database_agent", "character_agent", "update_agent", "summarizer_agent", "game_creator_agent"):
+        agent_registry.get(name).llm = llm
+
+    classes.openai = SimpleNamespace(images=StubImages(image_latency), api_key=None)
+    classes._async_openai_client = SimpleNamespace(images=AsyncStubImages(image_latency))
+    transport = storage_transport(db)
+    storage._async_client = httpx.AsyncClient(transport=transport)
+    storage._sync_client = httpx.Client(transport=transport)
+    return db, llm
@@ -0,0 +1,106 @@
+"""Deterministic game world and player queries used by the benchmarks."""
+
+BENCH_USER_ID = "00000000-0000-4000-8000-000000000001"
+
+GAME_REQUEST = {
+    "title": "Death at Ashford Manor",
+    "description": "A stormy night at a country manor in 1923. The host is found dead in the library.",
+    "character_count": "5",
+}
+
+GAME_SETUP = {
+    "title": GAME_REQUEST["title"],
+    "description": GAME_REQUEST["description"],
+    "opening_summary": "Thunder rolls over Ashford Manor as the guests gather. Lord Ashford will not live to see the morning.",
+    "characters": [
+        {
+            "name": "Lord Edmund Ashford", "description": "The wealthy host of the evening, found dead in the library.",
+            "personality": {"traits": ["proud", "secretive"]}, "lie_policy": "honest", "is_killer": False,
+            "is_alive": False, "is_victim": True, "secrets": ["He was about to change his will"],
+            "relationships": {"Lady Margaret Ashford": "wife", "Dr. Henry Blake": "old friend"},
+            "observations": {}, "metadata": {},
+        },
+        {
+            "name": "Lady Margaret Ashford", "description": "The victim's wife, composed and sharp-tongued.",
+            "personality": {"traits": ["controlled", "ambitious"]}, "lie_policy": "evasive", "is_killer": False,
+            "is_alive": True, "is_victim": False, "secrets": ["She has debts her husband knew nothing about"],
+            "relationships": {"Lord Edmund Ashford": "husband", "Thomas Reed": "distrusts him"},
+            "observations": {"library": "Saw the lights on past ten"}, "metadata": {},
+        },
+        {
+            "name": "Dr. Henry Blake", "description": "The family physician and the host's oldest friend.",
+            "personality": {"traits": ["calm", "calculating"]}, "lie_policy": "deceptive", "is_killer": True,
+            "is_alive": True, "is_victim": False, "secrets": ["Lord Ashford discovered he forged prescriptions"],
+            "relationships": {"Lord Edmund Ashford": "old friend", "Clara Finch": "her employer's doctor"},
+            "observations": {"study": "Claims he was reading all evening"}, "metadata": {},
+        },
+        {
+            "name": "Thomas Reed", "description": "The ambitious private secretary.",
+            "personality": {"traits": ["nervous", "loyal"]}, "lie_policy": "honest", "is_killer": False,
+            "is_alive": True, "is_victim": False, "secrets": ["He read the new will"],
+            "relationships": {"Lord Edmund Ashford": "employer"},
+            "observations": {"hallway": "Heard footsteps near the library at 9:40"}, "metadata": {},
+        },
+        {
+            "name": "Clara Finch", "description": "The housemaid who found the body.",
+            "personality": {"traits": ["observant", "shy"]}, "lie_policy": "pathological", "is_killer": False,
+            "is_alive": True, "is_victim": False, "secrets": ["She takes money from the guests' coats"],
+            "relationships": {"Lady Margaret Ashford": "employer"},
+            "observations": {"kitchen": "Noticed the doctor's bag was missing"}, "metadata": {},
+        },
+    ],
+    "locations": [
+        {"name": "Library", "description": "Floor-to-ceiling shelves and a cold fireplace; the body lies by the desk.",
+         "is_accessible": True, "connected_locations": ["Grand Hallway", "Study"], "atmosphere": "dark", "metadata": {}},
+        {"name": "Grand Hallway", "description": "A long portrait-lined hallway joining the wings of the manor.",
+         "is_accessible": True, "connected_locations": ["Library", "Dining Room", "Kitchen"], "atmosphere": "mysterious", "metadata": {}},
+        {"name": "Study", "description": "The host's private study, ledgers stacked on the desk.",
+         "is_accessible": False, "connected_locations": ["Library"], "atmosphere": "tense", "metadata": {}},
+        {"name": "Dining Room", "description": "The remains of an abandoned dinner for six.",
+         "is_accessible": True, "connected_locations": ["Grand Hallway", "Kitchen"], "atmosphere": "cozy", "metadata": {}},
+        {"name": "Kitchen", "description": "Warm and cluttered, with a back door to the garden.",
+         "is_accessible": True, "connected_locations": ["Grand Hallway", "Dining Room"], "atmosphere": "neutral", "metadata": {}},
+    ],
+    "clues": [
+        {"title": "Empty Laudanum Bottle", "description": "A small bottle, wiped clean, hidden behind the books.",
+         "location_id": "Library", "is_revealed": False, "discovery_method": "investigation", "significance_level": 5,
+         "points_to": ["Dr. Henry Blake"], "metadata": {}},
+        {"title": "Torn Page of the Will", "description": "A fragment naming a new beneficiary.",
+         "location_id": "Study", "is_revealed": False, "discovery_method": "investigation", "significance_level": 4,
+         "points_to": ["Thomas Reed", "Lady Margaret Ashford"], "metadata": {}},
+        {"title": "Muddy Footprints", "description": "Prints leading from the garden door toward the hallway.",
+         "location_id": "Kitchen", "is_revealed": True, "discovery_method": "forensics", "significance_level": 2,
+         "points_to": ["Clara Finch"], "metadata": {}},
+        {"title": "Unpaid Dressmaker Bills", "description": "A bundle of overdue bills in Lady Ashford's name.",
+         "location_id": "Dining Room", "is_revealed": False, "discovery_method": "witness", "significance_level": 3,
+         "points_to": ["Lady Margaret Ashford"], "metadata": {}},
+        {"title": "Two Brandy Glasses", "description": "Two glasses on the library desk, one with a bitter residue.",
+         "location_id": "Library", "is_revealed": True, "discovery_method": "investigation", "significance_level": 4,
+         "points_to": ["Dr. Henry Blake"], "metadata": {}},
+        {"title": "Forged Prescription", "description": "A prescription pad with the host's physician's letterhead.",
+         "location_id": "Study", "is_revealed": False, "discovery_method": "investigation", "significance_level": 5,
+         "points_to": ["Dr. Henry Blake"], "metadata": {}},
+    ],
+    "timeline_events": [
+        {"event_time": "1923-10-12T19:00:00Z", "event_description": "Guests arrive for dinner", "location_id": "Grand Hallway",
+         "character_ids": ["Lady Margaret Ashford", "Dr. Henry Blake", "Thomas Reed"], "event_type": "movement", "is_public": True, "witness_ids": ["Clara Finch"], "metadata": {}},
+        {"event_time": "1923-10-12T20:00:00Z", "event_description": "Dinner is served", "location_id": "Dining Room",
+         "character_ids": ["Lord Edmund Ashford", "Lady Margaret Ashford", "Dr. Henry Blake", "Thomas Reed"], "event_type": "general", "is_public": True, "witness_ids": ["Clara Finch"], "metadata": {}},
+        {"event_time": "1923-10-12T21:15:00Z", "event_description": "Lord Ashford and Dr. Blake retire to the library with brandy", "location_id": "Library",
+         "character_ids": ["Lord Edmund Ashford", "Dr. Henry Blake"], "event_type": "conversation", "is_public": False, "witness_ids": [], "metadata": {}},
+        {"event_time": "1923-10-12T21:40:00Z", "event_description": "Footsteps heard near the library", "location_id": "Grand Hallway",
+         "character_ids": ["Thomas Reed"], "event_type": "general", "is_public": False, "witness_ids": ["Thomas Reed"], "metadata": {}},
+        {"event_time": "1923-10-12T21:50:00Z", "event_description": "Lord Ashford is poisoned", "location_id": "Library",
+         "character_ids": ["Lord Edmund Ashford", "Dr. Henry Blake"], "event_type": "murder", "is_public": False, "witness_ids": [], "metadata": {}},
+        {"event_time": "1923-10-12T22:30:00Z", "event_description": "Clara Finch finds the body", "location_id": "Library",
+         "character_ids": ["Clara Finch", "Lord Edmund Ashford"], "event_type": "discovery", "is_public": True, "witness_ids": ["Clara Finch"], "metadata": {}},
+    ],
+}
+
+# name -> player query; fast_path ones are answered without the crew
+QUERIES = {
+    "fast_path": "list the suspects",
+    "question_character": "Ask Lady Margaret Ashford where she was at 9:40",
+    "examine_location": "I examine the Library carefully",
+    "timeline": "What happened around the time of the murder?",
+}
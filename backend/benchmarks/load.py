@@ -0,0 +1,331 @@
+"""Concurrent player sessions against the FastAPI app on one uvicorn worker.
+
+The app runs in this process on a real uvicorn server with its lifespan (job
+queue included), wired to the stand-ins in benchmarks.fakes. Virtual players
+run in a separate thread and event loop so the app's loop only carries the
+app. Each player optionally creates a game, then plays its session's turns
+with think time in between. Sessions are synthetic or replayed from exported
+`interactions` rows (JSON array or JSON lines with game_id, user_query and
+created_at).
+
+    cd backend
+    python -m benchmarks.load --players 50 --turns 10 --think-time uniform:2000-8000 \\
+        --llm-latency lognormal:1200,0.5 --create-ratio 0.1
+
+Reports throughput and p50/p95/p99 latency per request kind, event loop lag,
+background queue depth (job queue, crew executor, update actor) and memory
+over time, and how long the background work takes to drain afterwards.
+Latencies and think times take the specs of benchmarks.fakes.parse_latency.
+"""
+
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import random
+import resource
+import shutil
+import sys
+import threading
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+from benchmarks import JOB_DIR
+from benchmarks.fakes import install_fakes, parse_latency
+from benchmarks.fixtures import BENCH_USER_ID, GAME_REQUEST, GAME_SETUP, QUERIES
+from benchmarks.run import RESULTS_DIR, git_commit
+from database.jobqueue import percentile
+
+
+# How often the lag probe wakes up on the app's event loop
+LAG_PROBE_SECONDS = 0.05
+REQUEST_TIMEOUT_SECONDS = 600
+
+
+def rss_mb() -> float:
+    """Resident memory of this process (peak RSS where /proc is unavailable)."""
+    try:
+        with open("/proc/self/status") as status:
+            for line in status:
+                if line.startswith("VmRSS:"):
+                    return round(int(line.split()[1]) / 1024, 1)
+    except OSError:
+        pass
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def summarize(values: list) -> dict:
+    if not values:
+        return {"p50": 0.0, "p95": 0.0, "p99": 0.0, "max": 0.0}
+    return {
+        "p50": round(percentile(values, 50), 1),
+        "p95": round(percentile(values, 95), 1),
+        "p99": round(percentile(values, 99), 1),
+        "max": round(max(values), 1),
+    }
+
+
+def synthetic_sessions(players: int, turns: int, create_ratio: float) -> list:
+    queries = list(QUERIES.values())
+    return [
+        {"create": random.random() < create_ratio, "queries": [random.choice(queries) for _ in range(turns)]}
+        for _ in range(players)
+    ]
+
+
+def recorded_sessions(path: str, players: int, create_ratio: float) -> list:
+    """Sessions from exported interactions rows, one per recorded game, cycled to fill the players."""
+    text = Path(path).read_text()
+    rows = json.loads(text) if text.lstrip().startswith("[") else [json.loads(line) for line in text.splitlines() if line.strip()]
+    games: dict[str, list] = {}
+    for row in sorted(rows, key=lambda r: r.get("created_at") or ""):
+        if row.get("user_query"):
+            games.setdefault(row.get("game_id"), []).append(row["user_query"])
+    recorded = list(games.values())
+    if not recorded:
+        raise ValueError(f"No interactions with user_query in {path}")
+    return [
+        {"create": random.random() < create_ratio, "queries": recorded[i % len(recorded)]}
+        for i in range(players)
+    ]
+
+
+class Sampler:
+    """Runs on the app's loop: measures its lag and samples queues and memory."""
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self.lags: list[float] = []
+        self.timeline: list[dict] = []
+        self.active_requests = 0
+        self._stopped = asyncio.Event()
+
+    async def run(self):
+        from agents.executor import crew_executor
+        from database.jobqueue import job_queue
+        from routes.games import update_actor
+
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        window: list[float] = []
+        next_sample = started + self.interval
+        while not self._stopped.is_set():
+            probe = loop.time()
+            await asyncio.sleep(LAG_PROBE_SECONDS)
+            lag = max(0.0, (loop.time() - probe - LAG_PROBE_SECONDS) * 1000)
+            self.lags.append(lag)
+            window.append(lag)
+            if loop.time() < next_sample:
+                continue
+            jobs = await asyncio.to_thread(job_queue.stats)
+            crews = crew_executor.stats()
+            self.timeline.append({
+                "t_s": round(loop.time() - started, 1),
+                "loop_lag_ms_max": round(max(window), 1),
+                "loop_lag_ms_p95": round(percentile(window, 95), 1),
+                "rss_mb": rss_mb(),
+                "asyncio_tasks": len(asyncio.all_tasks()),
+                "active_requests": self.active_requests,
+                "jobs_queued": sum(s["queued"] for s in jobs.values()),
+                "jobs_running": sum(s["running"] for s in jobs.values()),
+                "jobs_by_type": {t: s["queued"] + s["running"] for t, s in jobs.items()},
+                "crew_queue_depth": crews["queue_depth"],
+                "crews_in_flight": crews["in_flight"],
+                "update_actor_pending_turns": update_actor.stats()["pending_turns"],
+            })
+            window = []
+            next_sample += self.interval
+
+    def stop(self):
+        self._stopped.set()
+
+
+class LoadClient:
+    """Virtual players; runs on its own thread and event loop."""
+
+    def __init__(self, base_url: str, sessions: list, game_ids: list, think_time, ramp_up: float, sampler: Sampler):
+        self.base_url = base_url
+        self.sessions = sessions
+        self.game_ids = game_ids
+        self.think_time = think_time
+        self.ramp_up = ramp_up
+        self.sampler = sampler
+        self.requests: list[dict] = []
+        self._lock = threading.Lock()
+
+    async def request(self, client, kind: str, path: str, body: dict):
+        started = time.perf_counter()
+        self.sampler.active_requests += 1
+        try:
+            response = await client.post(path, json=body)
+            status, data = response.status_code, (response.json() if response.status_code == 200 else None)
+        except Exception as e:
+            status, data = f"error: {type(e).__name__}", None
+        finally:
+            self.sampler.active_requests -= 1
+        with self._lock:
+            self.requests.append({"kind": kind, "status": status, "ms": (time.perf_counter() - started) * 1000, "finished_at": time.perf_counter()})
+        return data
+
+    async def play(self, client, index: int, session: dict):
+        from agents.fastpath import classify_query
+
+        await asyncio.sleep(self.ramp_up * index / max(1, len(self.sessions)))
+        game_id = self.game_ids[index]
+        if session["create"]:
+            created = await self.request(client, "create", f"/api/games/create/{BENCH_USER_ID}", GAME_REQUEST)
+            if not created:
+                return
+            game_id = created["game_id"]
+        for query in session["queries"]:
+            await asyncio.sleep(self.think_time())
+            kind = "query_fast_path" if classify_query(query)[0] else "query"
+            await self.request(client, kind, f"/api/games/query/{game_id}", {"query": query})
+
+    async def run(self):
+        import httpx
+
+        limits = httpx.Limits(max_connections=len(self.sessions) + 10)
+        async with httpx.AsyncClient(base_url=self.base_url, timeout=REQUEST_TIMEOUT_SECONDS, limits=limits) as client:
+            await asyncio.gather(*[self.play(client, i, session) for i, session in enumerate(self.sessions)])
+
+    def run_in_thread(self) -> float:
+        started = time.perf_counter()
+        asyncio.run(self.run())
+        return time.perf_counter() - started
+
+
+async def run_load(args, sessions: list) -> dict:
+    import uvicorn
+    from agents.executor import crew_executor
+    from database.jobqueue import job_queue
+    from database.repository import repository
+    from main import app
+    from routes.games import update_actor
+
+    # One seeded game per player that does not create its own
+    game_record = {"user_id": BENCH_USER_ID, "title": GAME_SETUP["title"], "status": "CAST_READY",
+                   "opening_summary": GAME_SETUP["opening_summary"], "is_active": True, "in_progress": True}
+    game_ids = [None if session["create"] else await repository.create_game_world(dict(game_record), GAME_SETUP) for session in sessions]
+
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=args.port, log_level="warning", lifespan="on"))
+    serve_task = asyncio.create_task(server.serve())
+    while not server.started:
+        if serve_task.done():
+            serve_task.result()
+        await asyncio.sleep(0.05)
+    port = server.servers[0].sockets[0].getsockname()[1]
+
+    sampler = Sampler(args.sample_interval)
+    sampler_task = asyncio.create_task(sampler.run())
+    client = LoadClient(f"http://127.0.0.1:{port}", sessions, game_ids, parse_latency(args.think_time), args.ramp_up, sampler)
+    duration = await asyncio.to_thread(client.run_in_thread)
+
+    # Let the background work queued by the load finish
+    drain_started = time.perf_counter()
+    drained = False
+    while time.perf_counter() - drain_started < args.drain_timeout:
+        jobs = await asyncio.to_thread(job_queue.stats)
+        if not any(s["queued"] or s["running"] for s in jobs.values()) \
+                and not crew_executor.stats()["in_flight"] and not update_actor.stats()["pending_turns"]:
+            drained = True
+            break
+        await asyncio.sleep(0.5)
+    drain_seconds = time.perf_counter() - drain_started
+
+    sampler.stop()
+    await sampler_task
+    final = {"jobs": await asyncio.to_thread(job_queue.stats), "crew_executor": crew_executor.stats(), "update_actor": update_actor.stats()}
+    server.should_exit = True
+    await serve_task
+
+    requests = client.requests
+    by_kind = {}
+    for kind in sorted({r["kind"] for r in requests}):
+        done = [r for r in requests if r["kind"] == kind]
+        ok = [r["ms"] for r in done if r["status"] == 200]
+        by_kind[kind] = {
+            "count": len(done),
+            "errors": len(done) - len(ok),
+            "throughput_rps": round(len(done) / duration, 2),
+            "latency_ms": summarize(ok),
+        }
+    timeline = sampler.timeline
+    return {
+        "duration_s": round(duration, 2),
+        "throughput_rps": round(len(requests) / duration, 2),
+        "requests": by_kind,
+        "event_loop_lag_ms": summarize(sampler.lags),
+        "jobs_queued_max": max((s["jobs_queued"] for s in timeline), default=0),
+        "crew_queue_depth_max": max((s["crew_queue_depth"] for s in timeline), default=0),
+        "rss_mb": {"start": timeline[0]["rss_mb"] if timeline else rss_mb(), "peak": max((s["rss_mb"] for s in timeline), default=rss_mb()), "end": rss_mb()},
+        "drain": {"drained": drained, "seconds": round(drain_seconds, 1)},
+        "final": final,
+        "timeline": timeline,
+    }
+
+
+def print_report(report: dict):
+    print(f"\n🚦 {report['config']['players']} players, {report['duration_s']} s, {report['throughput_rps']} req/s")
+    for kind, stats in report["requests"].items():
+        latency = stats["latency_ms"]
+        print(f"   {kind:<16} {stats['count']:>6} req  {stats['errors']:>4} err  {stats['throughput_rps']:>7} req/s"
+              f"  p50 {latency['p50']:>9} ms  p95 {latency['p95']:>9} ms  p99 {latency['p99']:>9} ms")
+    lag = report["event_loop_lag_ms"]
+    print(f"   event loop lag   p50 {lag['p50']} ms  p95 {lag['p95']} ms  p99 {lag['p99']} ms  max {lag['max']} ms")
+    print(f"   jobs queued max {report['jobs_queued_max']}, crew queue max {report['crew_queue_depth_max']}, "
+          f"drained {'in ' + str(report['drain']['seconds']) + ' s' if report['drain']['drained'] else 'NO (timeout)'}")
+    print(f"   memory {report['rss_mb']['start']} -> peak {report['rss_mb']['peak']} -> {report['rss_mb']['end']} MB")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--players", type=int, default=50)
+    parser.add_argument("--turns", type=int, default=10, help="Turns per synthetic session")
+    parser.add_argument("--sessions", help="Exported interactions (JSON or JSON lines) to replay instead of synthetic sessions")
+    parser.add_argument("--create-ratio", type=float, default=0.0, help="Share of players that create their game first")
+    parser.add_argument("--think-time", default="exponential:3000", help="Pause before each turn")
+    parser.add_argument("--ramp-up", type=float, default=5.0, help="Seconds over which players join")
+    parser.add_argument("--llm-latency", default="lognormal:1200,0.5", help="Every agent's LLM calls")
+    parser.add_argument("--manager-llm-latency", help="Override for the game master's own LLM calls")
+    parser.add_argument("--db-latency", default="normal:25,8")
+    parser.add_argument("--image-latency", default="normal:8000,2000")
+    parser.add_argument("--sample-interval", type=float, default=1.0)
+    parser.add_argument("--drain-timeout", type=float, default=120.0)
+    parser.add_argument("--port", type=int, default=0)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--out", help="Result file (default benchmarks/results/load-<commit>-<timestamp>.json)")
+    parser.add_argument("--verbose", action="store_true", help="Keep the backend's own logging")
+    args = parser.parse_args()
+
+    random.seed(args.seed)
+    role_latency = {"Game Master Orchestrator": parse_latency(args.manager_llm_latency)} if args.manager_llm_latency else None
+    install_fakes(parse_latency(args.llm_latency), parse_latency(args.db_latency), parse_latency(args.image_latency), role_latency)
+    sessions = recorded_sessions(args.sessions, args.players, args.create_ratio) if args.sessions else synthetic_sessions(args.players, args.turns, args.create_ratio)
+
+    output = io.StringIO()
+    try:
+        with contextlib.redirect_stdout(sys.stdout if args.verbose else output):
+            report = asyncio.run(run_load(args, sessions))
+    finally:
+        shutil.rmtree(JOB_DIR, ignore_errors=True)
+
+    commit = git_commit()
+    report = {
+        "commit": commit,
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "config": {k: v for k, v in vars(args).items() if k not in ("out", "verbose")} | {"sessions_source": args.sessions or "synthetic"},
+        **report,
+    }
+    out = Path(args.out) if args.out else RESULTS_DIR / f"load-{commit}-{datetime.now():%Y%m%d-%H%M%S}.json"
+    out.parent.mkdir(parents=True, exist_ok=True)
+    out.write_text(json.dumps(report, indent=2, default=str))
+    print_report(report)
+    print(f"\n✅ Wrote {out}")
+
+
+if __name__ == "__main__":
+    main()
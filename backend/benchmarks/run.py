@@ -0,0 +1,266 @@
+"""Offline benchmarks of the backend hot paths.
+
+Runs create_game, query_game (fast path and crew turns, with the game context
+on and off), store_game_update, the update analysis crew, every agent tool and
+the image pipeline against the stand-ins in benchmarks.fakes: no OpenAI
+credits, no Supabase project. Results are written as JSON; pass a previous
+result file as --baseline to print the change per benchmark.
+
+    cd backend
+    python -m benchmarks.run --iterations 5 --baseline benchmarks/results/<old>.json
+
+Latencies of the fakes are configurable (--llm-latency-ms, --db-latency-ms,
+--image-latency-ms); at 0 the numbers are the backend's own overhead.
+"""
+
+import argparse
+import asyncio
+import contextlib
+import inspect
+import io
+import json
+import shutil
+import subprocess
+import sys
+import time
+import uuid
+from datetime import datetime, timezone
+from pathlib import Path
+
+from benchmarks import JOB_DIR
+from benchmarks.fakes import FakeSupabase, ScriptedLLM, fixed_latency, install_fakes
+from benchmarks.fixtures import BENCH_USER_ID, GAME_REQUEST, GAME_SETUP, QUERIES
+from database.jobqueue import percentile
+
+
+RESULTS_DIR = Path(__file__).parent / "results"
+# Mean slowdown reported as a regression when comparing with a baseline
+REGRESSION_THRESHOLD = 0.10
+# Tools take well under a millisecond, so they get more iterations
+TOOL_ITERATIONS_FACTOR = 20
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except Exception:
+        return "unknown"
+
+
+class Bench:
+    """Runs benchmarks and collects their timings and per-iteration counters."""
+
+    def __init__(self, db: FakeSupabase, llm: ScriptedLLM, iterations: int, verbose: bool):
+        self.db = db
+        self.llm = llm
+        self.iterations = iterations
+        self.verbose = verbose
+        self.results: dict[str, dict] = {}
+
+    def counters(self) -> dict:
+        return {**self.llm.counters(), "db_roundtrips": self.db.roundtrips}
+
+    async def measure(self, name: str, fn, iterations: int = None):
+        """Time fn(iteration) (sync or async) and record the summary under name."""
+        iterations = iterations or self.iterations
+        samples = []
+        before = self.counters()
+        output = io.StringIO()
+        with contextlib.redirect_stdout(sys.stdout if self.verbose else output):
+            for i in range(iterations):
+                started = time.perf_counter()
+                result = fn(i)
+                if inspect.isawaitable(result):
+                    await result
+                samples.append((time.perf_counter() - started) * 1000)
+        after = self.counters()
+        self.results[name] = {
+            "iterations": iterations,
+            "mean_ms": round(sum(samples) / len(samples), 3),
+            "p50_ms": round(percentile(samples, 50), 3),
+            "p95_ms": round(percentile(samples, 95), 3),
+            "min_ms": round(min(samples), 3),
+            "max_ms": round(max(samples), 3),
+            "first_ms": round(samples[0], 3),
+            **{f"{key}_per_op": round((after[key] - before[key]) / iterations, 2) for key in after},
+        }
+        print(f"⏱️  {name:<48} mean {self.results[name]['mean_ms']:>10.2f} ms  p95 {self.results[name]['p95_ms']:>10.2f} ms")
+
+
+async def run_benchmarks(bench: Bench) -> dict:
+    from agents import gamemaster
+    from agents.imagegen import generate_character_images
+    from agents.updatecrew import analyze_turns
+    from database.imagecache import image_cache
+    from database.repository import repository
+    from routes import games
+    import classes
+
+    # Game creation (one crew run, one transaction, three queued image jobs)
+    created = []
+
+    async def create(i):
+        response = await games.create_game(dict(GAME_REQUEST), BENCH_USER_ID)
+        created.append(response["game_id"])
+
+    await bench.measure("create_game", create)
+    game_id = created[-1]
+
+    # Player turns
+    for scenario, query in QUERIES.items():
+        await bench.measure(f"query_game[{scenario}]", lambda i, q=query: games.query_game(game_id, {"query": q}))
+
+    # The same crew turns without the injected game context
+    context_enabled = gamemaster.GAME_CONTEXT_ENABLED
+    gamemaster.GAME_CONTEXT_ENABLED = not context_enabled
+    for scenario, query in QUERIES.items():
+        if scenario != "fast_path":
+            await bench.measure(f"query_game[{scenario}|context={'on' if not context_enabled else 'off'}]",
+                                lambda i, q=query: games.query_game(game_id, {"query": q}))
+    gamemaster.GAME_CONTEXT_ENABLED = context_enabled
+
+    # Applying one analysis: reveal a clue, unlock a location, record an event
+    snapshot = await repository.load_world(game_id)
+    clue = next(c for c in snapshot.clues if not c.get("is_revealed"))
+    study = next(l for l in snapshot.locations if l["name"] == "Study")
+    analysis = json.dumps({"has_changes": True, "summary": "bench", "updates": [
+        {"table": "clues", "action": "discover", "data": {"id": clue["id"], "is_revealed": True, "discovered_by": "player"}, "reasoning": "bench"},
+        {"table": "locations", "action": "update", "data": {"id": study["id"], "is_accessible": True}, "reasoning": "bench"},
+        {"table": "timeline_events", "action": "insert", "data": {"event_time": "1923-10-12T23:00:00Z", "event_description": "The detective searched the study", "event_type": "discovery"}, "reasoning": "bench"},
+    ]})
+    await bench.measure("store_game_update", lambda i: games.store_game_update(game_id, analysis))
+    await bench.measure("analyze_turns", lambda i: analyze_turns(game_id, [(QUERIES["question_character"], "I was in the drawing room all evening.")]))
+
+    # World snapshot load (every tool and context build reads through it)
+    async def load_snapshot(i):
+        repository.invalidate_world(game_id)
+        await repository.load_world(game_id)
+
+    await bench.measure("world_snapshot[cold]", load_snapshot)
+
+    # Agent tools against a warm snapshot
+    tool_args = {
+        classes.GetCharacterDataTool: {"character_name": "Lady Margaret Ashford"},
+        classes.GetLocationDataTool: {"location_name": "Library"},
+        classes.GetCluesInLocationTool: {"location_name": "Library"},
+        classes.SearchCharactersTool: {"search_term": "ashfrd"},
+        classes.GetTimelineEventsTool: {"query": "library murder"},
+        classes.GetAllCluesTool: {},
+        classes.GetAllLocationDataTool: {},
+    }
+    # Crews call _run from worker threads; on the loop thread repository.run() refuses
+    for tool_class, args in tool_args.items():
+        tool = tool_class()
+        await bench.measure(f"tool[{tool_class.__name__}]", lambda i, t=tool, a=args: run_tool(t, game_id=game_id, **a),
+                            iterations=bench.iterations * TOOL_ITERATIONS_FACTOR)
+
+    image_tool = classes.ImageTool()
+    await bench.measure("tool[ImageTool]", lambda i: run_tool(
+        image_tool, prompt=f"Portrait of bench subject {i}, oil painting", image_type="character", subject_name=f"Bench Subject {i}", game_id=game_id))
+
+    # Image pipeline as the job queue runs it (three item types concurrently)
+    async def image_pipeline(target_game_id: str):
+        await asyncio.gather(*[
+            games.bg_generate_images(target_game_id, GAME_SETUP[item_type], item_type)
+            for item_type in ("characters", "locations", "clues")
+        ])
+
+    cache_policy = image_cache.policy
+    image_cache.policy = "off"
+    fresh_games = [str(uuid.uuid4()) for _ in range(bench.iterations)]
+    await bench.measure("image_pipeline[generate]", lambda i: image_pipeline(fresh_games[i]))
+    await bench.measure("image_pipeline[retry_manifest_hits]", lambda i: image_pipeline(fresh_games[0]))
+    image_cache.policy = "exact"
+    await bench.measure("image_pipeline[cross_game_cache_hits]", lambda i: image_pipeline(str(uuid.uuid4())))
+    image_cache.policy = cache_policy
+    await bench.measure("image_pipeline[characters_only]", lambda i: generate_character_images(GAME_SETUP["characters"], str(uuid.uuid4()), GAME_REQUEST["title"]))
+
+    return context_comparison(bench.results, context_enabled)
+
+
+async def run_tool(tool, **kwargs):
+    """Run a tool in a worker thread, as a crew does; raise if it answers with an error."""
+    output = await asyncio.to_thread(tool._run, **kwargs)
+    error = output is None or (isinstance(output, str) and output.startswith("Error"))
+    if isinstance(output, str) and output.startswith("{"):
+        error = error or "error" in json.loads(output)
+    if error:
+        raise RuntimeError(f"{tool.name} failed: {output}")
+    return output
+
+
+def context_comparison(results: dict, context_enabled: bool) -> dict:
+    """Game context on vs off for each crew scenario."""
+    comparison = {}
+    for scenario in QUERIES:
+        toggled = results.get(f"query_game[{scenario}|context={'on' if not context_enabled else 'off'}]")
+        if not toggled:
+            continue
+        default = results[f"query_game[{scenario}]"]
+        on, off = (default, toggled) if context_enabled else (toggled, default)
+        comparison[scenario] = {
+            key: {"on": on[key], "off": off[key]}
+            for key in ("mean_ms", "llm_calls_per_op", "prompt_tokens_per_op", "delegations_per_op", "db_roundtrips_per_op")
+        }
+    return comparison
+
+
+def compare(report: dict, baseline: dict):
+    """Print mean time per benchmark against a baseline result file."""
+    print(f"\n📊 Compared with {baseline.get('commit')} ({baseline.get('created_at')})")
+    for name, result in report["results"].items():
+        previous = baseline.get("results", {}).get(name)
+        if not previous:
+            print(f"   {name:<48} {result['mean_ms']:>10.2f} ms  (new)")
+            continue
+        change = (result["mean_ms"] - previous["mean_ms"]) / previous["mean_ms"] if previous["mean_ms"] else 0.0
+        flag = "  ❌ REGRESSION" if change > REGRESSION_THRESHOLD else ("  ✅ faster" if change < -REGRESSION_THRESHOLD else "")
+        print(f"   {name:<48} {previous['mean_ms']:>10.2f} -> {result['mean_ms']:>10.2f} ms  ({change:+.1%}){flag}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=5)
+    parser.add_argument("--llm-latency-ms", type=float, default=0)
+    parser.add_argument("--db-latency-ms", type=float, default=0)
+    parser.add_argument("--image-latency-ms", type=float, default=0)
+    parser.add_argument("--out", help="Result file (default benchmarks/results/<commit>-<timestamp>.json)")
+    parser.add_argument("--baseline", help="Earlier result file to compare with")
+    parser.add_argument("--verbose", action="store_true", help="Keep the backend's own logging")
+    args = parser.parse_args()
+
+    db, llm = install_fakes(fixed_latency(args.llm_latency_ms), fixed_latency(args.db_latency_ms), fixed_latency(args.image_latency_ms))
+    bench = Bench(db, llm, args.iterations, args.verbose)
+    started = time.perf_counter()
+    try:
+        comparison = asyncio.run(run_benchmarks(bench))
+    finally:
+        shutil.rmtree(JOB_DIR, ignore_errors=True)
+
+    commit = git_commit()
+    report = {
+        "commit": commit,
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "config": {
+            "iterations": args.iterations,
+            "llm_latency_ms": args.llm_latency_ms,
+            "db_latency_ms": args.db_latency_ms,
+            "image_latency_ms": args.image_latency_ms,
+            "python": sys.version.split()[0],
+        },
+        "duration_s": round(time.perf_counter() - started, 2),
+        "results": bench.results,
+        "game_context_comparison": comparison,
+    }
+
+    out = Path(args.out) if args.out else RESULTS_DIR / f"{commit}-{datetime.now():%Y%m%d-%H%M%S}.json"
+    out.parent.mkdir(parents=True, exist_ok=True)
+    out.write_text(json.dumps(report, indent=2))
+    print(f"\n✅ Wrote {out}")
+
+    if args.baseline:
+        compare(report, json.loads(Path(args.baseline).read_text()))
+
+
+if __name__ == "__main__":
+    main()
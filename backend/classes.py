@@ -1,14 +1,19 @@
 from pydantic import BaseModel, Field
 from typing import Optional, Literal
-from database.client import get_supabase_client
+from database.repository import repository
+from database.assets import asset_manifest
+from database.imagecache import image_cache
+from database.storage import stream_to_storage, stream_to_storage_sync
+from agents.toolformat import (
+    format_record, format_rows, format_text, match_note, CHARACTER_COLUMNS, LOCATION_COLUMNS, LOCATION_LIST_COLUMNS,
+    CLUE_COLUMNS, CLUE_IN_LOCATION_COLUMNS, TIMELINE_COLUMNS,
+)
 from crewai.tools import BaseTool
 from typing import Type
 import json
 import openai
-import requests
+import asyncio
 import os
-from huggingface_hub import InferenceClient
-import io
 
 class Character(BaseModel):
     """Character data for agent creation - matches database schema."""
@@ -56,7 +61,7 @@ class Clue(BaseModel):
 
 class TimelineEvent(BaseModel):
     """Timeline event data - matches database schema."""
-    event_time: str = Field(description="When the event occurred (e.g., '9:00 PM', '2025-01-01T21:00:00')")
+    event_time: str = Field(description="When the event occurred, as an ISO 8601 timestamp (e.g., '1923-10-12T21:00:00')")
     event_description: str = Field(description="What happened during this event")
     location_id: str = Field(default=None, description="Name of location where event occurred")
     character_ids: list = Field(default=[], description="Array of character names involved in this event")
@@ -100,6 +105,14 @@ class SearchCharactersInput(BaseModel):
 
 class TimelineEventsInput(BaseModel):
     game_id: str = Field(..., description="The game ID to get timeline events for")
+    query: Optional[str] = Field(default=None, description="Words to rank events by (e.g. 'knife library argument'); most recent first if empty")
+    start_time: Optional[str] = Field(default=None, description="Only events at or after this ISO timestamp")
+    end_time: Optional[str] = Field(default=None, description="Only events at or before this ISO timestamp")
+    characters: Optional[list[str]] = Field(default=None, description="Only events involving or witnessed by these characters")
+    locations: Optional[list[str]] = Field(default=None, description="Only events in these locations")
+    event_types: Optional[list[str]] = Field(default=None, description="Only these event types (murder, discovery, conversation, movement, general)")
+    limit: int = Field(default=20, description="Maximum number of events to return")
+    cursor: Optional[str] = Field(default=None, description="next_cursor from a previous call, to get the next page")
 
 class AllCluesInput(BaseModel):
     game_id: str = Field(..., description="The game ID to get all clues for")
@@ -130,6 +143,15 @@ class GameUpdateAnalysis(BaseModel):
     summary: str = Field(..., description="Brief summary of what changed in the game")
 
 
+class GameMasterOutput(BaseModel):
+    """Structured game master answer: narration plus the world entities it touched."""
+    narration: str = Field(..., description="The complete response shown to the player")
+    clues_revealed: list[str] = Field(default=[], description="Exact titles of clues the player discovered or was shown in this turn")
+    locations_entered: list[str] = Field(default=[], description="Exact names of locations the player moved into in this turn, in order")
+    characters_questioned: list[str] = Field(default=[], description="Exact names of characters the player talked to or questioned in this turn")
+    solved: bool = Field(default=False, description="Whether the player solved the mystery in this turn")
+
+
 class ImageGenerationOutput(BaseModel):
     name: str = Field(..., description="Name of the resource being generated")
     image_url: str = Field(..., description="URL of the generated image")   
@@ -144,22 +166,10 @@ class GetCharacterDataTool(BaseTool):
     def _run(self, game_id: str, character_name: str) -> str:
         """Get character data from database."""
         try:
-            supabase = get_supabase_client()
-            response = supabase.table("characters").select("*").eq("game_id", game_id).ilike("name", f"%{character_name}%").execute()
+            match = repository.load_world_sync(game_id).find("character", character_name)
             
-            if response.data:
-                character = response.data[0]
-                return json.dumps({
-                    "id": character["id"],  # Include the database ID!
-                    "name": character["name"],
-                    "description": character["description"],
-                    "personality": character["personality"],
-                    "lie_policy": character["lie_policy"],
-                    "is_killer": character["is_killer"],
-                    "secrets": character["secrets"],
-                    "relationships": character["relationships"],
-                    "observations": character["observations"]
-                })
+            if match:
+                return format_record(self.name, match["row"], CHARACTER_COLUMNS, extra=match_note(match, character_name))  # Includes the database ID!
             return "Character not found"
         except Exception as e:
             return f"Error retrieving character: {str(e)}"
@@ -172,22 +182,10 @@ class GetLocationDataTool(BaseTool):
     def _run(self, game_id: str, location_name: str) -> str:
         """Get location data from database."""
         try:
+            match = repository.load_world_sync(game_id).find("location", location_name)
             
-            supabase = get_supabase_client()
-            
-         
-            response = supabase.table("locations").select("*").eq("game_id", game_id).ilike("name", f"%{location_name}%").execute() #partial match
-            
-            if response.data:
-                location = response.data[0]
-                return json.dumps({
-                    "id": location["id"],  # Include the database ID!
-                    "name": location["name"],
-                    "description": location["description"],
-                    "is_accessible": location["is_accessible"],
-                    "connected_locations": location["connected_locations"],
-                    "atmosphere": location["atmosphere"]
-                })
+            if match:
+                return format_record(self.name, match["row"], LOCATION_COLUMNS, extra=match_note(match, location_name))  # Includes the database ID!
             return "Location not found"
         except Exception as e:
             return f"Error retrieving location: {str(e)}"
@@ -203,20 +201,8 @@ class GetCluesInLocationTool(BaseTool):
     def _run(self, game_id: str, location_name: str) -> str:
         """Get clues in specific location."""
         try:
-            supabase = get_supabase_client()
-            response = supabase.table("clues").select("*").eq("game_id", game_id).eq("location_id", location_name).execute()
-            
-            clues = []
-            for clue in response.data:
-                clues.append({
-                    "id": clue["id"],  # Include the database ID!
-                    "title": clue["title"],
-                    "description": clue["description"],
-                    "is_revealed": clue["is_revealed"],
-                    "significance_level": clue["significance_level"],
-                    "discovery_method": clue["discovery_method"]
-                })
-            return json.dumps(clues)
+            clues = repository.load_world_sync(game_id).clues_in_location(location_name)
+            return format_rows(self.name, "clues", clues, CLUE_IN_LOCATION_COLUMNS)  # Includes the database IDs!
         except Exception as e:
             return f"Error retrieving clues: {str(e)}"
 
@@ -228,44 +214,23 @@ class SearchCharactersTool(BaseTool):
     def _run(self, game_id: str, search_term: str) -> str:
         """Search characters with fuzzy matching."""
         try:
-            supabase = get_supabase_client()
-            response = supabase.table("characters").select("name").eq("game_id", game_id).execute()
+            snapshot = repository.load_world_sync(game_id)
+            characters = snapshot.characters
             
-            if not response.data:
+            if not characters:
                 return "No characters found in this game"
             
-            search_lower = search_term.lower().strip()
-            matches = []
-            
-            for character in response.data:
-                char_name = character["name"]
-                char_lower = char_name.lower()
-                
-                # Exact match
-                if search_lower == char_lower:
-                    return f"Found exact match: {char_name}"
-                
-                # Partial matches
-                if search_lower in char_lower:
-                    matches.append(char_name)
-                
-                # First name or last name match
-                name_parts = char_lower.split()
-                search_parts = search_lower.split()
-                
-                for search_part in search_parts:
-                    for name_part in name_parts:
-                        if search_part in name_part:
-                            if char_name not in matches:
-                                matches.append(char_name)
+            matches = snapshot.name_index.search(search_term, "character", limit=5)
             
             if matches:
+                if matches[0]["score"] == 1.0:
+                    return f"Found exact match: {matches[0]['name']}"
                 if len(matches) == 1:
-                    return f"Found match: {matches[0]}"
+                    return f"Found match: {matches[0]['name']} (score {matches[0]['score']})"
                 else:
-                    return f"Multiple matches found: {', '.join(matches[:5])}"  # Limit to 5 results
+                    return f"Multiple matches found: {', '.join(f'{m['name']} (score {m['score']})' for m in matches)}"
             
-            return f"No characters found matching '{search_term}'. Available characters: {', '.join([c['name'] for c in response.data])}"
+            return format_text(self.name, f"No characters found matching '{search_term}'. Available characters: {', '.join([c['name'] for c in characters])}")
             
         except Exception as e:
             return f"Error searching characters: {str(e)}"
@@ -273,19 +238,26 @@ class SearchCharactersTool(BaseTool):
 
 class GetTimelineEventsTool(BaseTool):
     name: str = "get_timeline_events"
-    description: str = "Get all timeline events for a game to see what has happened so far"
+    description: str = "Search the game's timeline events: filter by time range, characters, locations and event types, rank by a query, page with next_cursor"
     args_schema: Type[BaseModel] = TimelineEventsInput
     
-    def _run(self, game_id: str) -> str:
+    def _run(self, game_id: str, query: str = None, start_time: str = None, end_time: str = None,
+             characters: list = None, locations: list = None, event_types: list = None,
+             limit: int = 20, cursor: str = None) -> str:
         try:
-            supabase = get_supabase_client()
-            
-            response = supabase.table("timeline_events").select("*").eq("game_id", game_id).order("created_at", desc=False).execute()
+            page = repository.run(repository.timeline(
+                game_id, query, start_time, end_time, characters, locations, event_types, limit, cursor,
+            ))
             
-            if not response.data:
-                return json.dumps({"message": "No timeline events found for this game yet"})
+            if not page["events"]:
+                return json.dumps({"message": "No matching timeline events found for this game"})
             
-            return json.dumps({"timeline_events": response.data})
+            extra = {"total": page["total"]}
+            if page["next_cursor"]:
+                extra["next_cursor"] = page["next_cursor"]
+            return format_rows(self.name, "timeline_events", page["events"], TIMELINE_COLUMNS, extra=extra)
+        except ValueError as e:
+            return json.dumps({"error": str(e)})
             
         except Exception as e:
             return json.dumps({"error": f"Database error: {str(e)}"})
@@ -297,14 +269,12 @@ class GetAllCluesTool(BaseTool):
     
     def _run(self, game_id: str) -> str:
         try:
-            supabase = get_supabase_client()
+            clues = repository.load_world_sync(game_id).clues
             
-            response = supabase.table("clues").select("*").eq("game_id", game_id).execute()
-            
-            if not response.data:
+            if not clues:
                 return json.dumps({"message": "No clues found for this game yet"})
             
-            return json.dumps({"clues": response.data})
+            return format_rows(self.name, "clues", clues, CLUE_COLUMNS)
             
         except Exception as e:
             return json.dumps({"error": f"Database error: {str(e)}"})
@@ -317,18 +287,10 @@ class GetAllLocationDataTool(BaseTool):
     def _run(self, game_id: str) -> str:
         """Get location data from database."""
         try:
-            supabase = get_supabase_client()
-            response = supabase.table("locations").select("*").eq("game_id", game_id).execute()
+            locations = repository.load_world_sync(game_id).locations
             
-            if response.data:
-                location = response.data
-                return json.dumps({
-                    "name": location["name"],
-                    "description": location["description"],
-                    "is_accessible": location["is_accessible"],
-                    "connected_locations": location["connected_locations"],
-                    "atmosphere": location["atmosphere"]
-                })
+            if locations:
+                return format_rows(self.name, "locations", locations, LOCATION_LIST_COLUMNS)
             return "No location data found for this game"
         except Exception as e:
             return f"Error retrieving location: {str(e)}"
@@ -345,21 +307,20 @@ class ImageTool(BaseTool):  # TODO: Rename to DalleImageTool
         try:
 
 
-            safe_name = f"{subject_name.lower().replace(" ", "-").replace("'", "")}.png"
-            filename = f"{image_type}s/{game_id}/{safe_name}"
-            supabase = get_supabase_client()
+            safe_name, filename = self._image_path(image_type, subject_name, game_id)
 
             #check if image already exists
-            folder = f"{image_type}s/{game_id}"
-            files = supabase.storage.from_("game-images2").list(folder)
-            
-
-            if any(f["name"] == safe_name for f in files):
+            public_url = asset_manifest.lookup(game_id, image_type, safe_name)
+            if public_url:
                 print(f"✅ Image already exists: {filename}")
-                public_url = supabase.storage.from_("game-images2").get_public_url(filename)
                 return public_url
 
-
+            #reuse a matching image generated for another subject or game
+            cached = image_cache.lookup(image_type, prompt, subject_name)
+            if cached:
+                print(f"♻️ Reusing cached image {cached['storage_path']} for {filename}")
+                asset_manifest.record(game_id, image_type, safe_name, cached["storage_path"], cached["public_url"])
+                return cached["public_url"]
 
             
             print(f"🎨 Generating {image_type} image for: {subject_name}")
@@ -387,12 +348,6 @@ class ImageTool(BaseTool):  # TODO: Rename to DalleImageTool
             
             print(f"✅ DALL-E generated image successfully")
             
-            # Download image from temporary URL
-            temp_url = response.data[0].url
-            img_response = requests.get(temp_url, timeout=30)
-            img_response.raise_for_status()
-            image_data = img_response.content
-            
             # # COMMENTED FLUX CODE:
             # # Get HuggingFace API token
             #hf_token = os.getenv("HUGGINGFACE_API_TOKEN")
@@ -417,48 +372,73 @@ class ImageTool(BaseTool):  # TODO: Rename to DalleImageTool
             #image.save(img_bytes, format='PNG')
             #image_data = img_bytes.getvalue()
             
-            # Upload directly to Supabase Storage
-            permanent_url = self._upload_to_supabase(image_data, filename, subject_name)
+            # Stream from the temporary URL straight into Supabase Storage
+            permanent_url, size_bytes = stream_to_storage_sync(response.data[0].url, filename)
+            print(f"✅ Uploaded image in bucket")
+            asset_manifest.record(game_id, image_type, safe_name, filename, permanent_url)
+            image_cache.add(image_type, prompt, subject_name, filename, permanent_url, size_bytes)
             
             print(f"Returning permanent URL: {permanent_url}")
             return permanent_url
             
         except Exception as e:
-            print(f"❌ Flux Error for {subject_name}: {str(e)}")
+            print(f"❌ Image Error for {subject_name}: {str(e)}")
             return None
-    
-    def _upload_to_supabase(self, image_data: bytes, filename: str, subject_name: str) -> str:
-        """Upload image bytes directly to Supabase Storage bucket."""
+
+    async def agenerate(self, prompt: str, image_type: str, subject_name: str, game_id: str) -> str:
+        """Async variant of _run for the image pipeline: pooled clients, no blocking I/O on the loop."""
         try:
-            
-            
-            # Upload to Supabase Storage
-            supabase = get_supabase_client()
-            try:
-                storage_response = supabase.storage.from_("game-images2").upload(
-                filename, 
-                image_data, 
-                {"content-type": "image/png"}
-            )
-                print(f"✅ Uploaded image in bucket")
-            except Exception as e:
-                    print(f"❌ Storage upload error: {str(e)}")
-                    return None
-            
-            # Get public URL
-            public_url = supabase.storage.from_("game-images2").get_public_url(filename)
-            return public_url
-            
-        except Exception as e:
-            print(f"❌ Upload error for {subject_name}: {str(e)}")
-            return None
+            safe_name, filename = self._image_path(image_type, subject_name, game_id)
 
+            # Manifest lookups hit the database at most once per game
+            public_url = await asyncio.to_thread(asset_manifest.lookup, game_id, image_type, safe_name)
+            if public_url:
+                print(f"✅ Image already exists: {filename}")
+                return public_url
 
+            cached = await asyncio.to_thread(image_cache.lookup, image_type, prompt, subject_name)
+            if cached:
+                print(f"♻️ Reusing cached image {cached['storage_path']} for {filename}")
+                await asyncio.to_thread(asset_manifest.record, game_id, image_type, safe_name, cached["storage_path"], cached["public_url"])
+                return cached["public_url"]
 
+            if not os.getenv("OPENAI_API_KEY"):
+                print("❌ OPENAI_API_KEY not found in environment variables")
+                return None
 
+            print(f"🎯 Calling DALL-E API for {image_type}: {subject_name}")
+            response = await get_async_openai_client().images.generate(
+                model="dall-e-3",
+                prompt=prompt,
+                size="1024x1024",
+                quality="standard",
+                n=1
+            )
 
+            # Stream from the temporary URL straight into Supabase Storage
+            permanent_url, size_bytes = await stream_to_storage(response.data[0].url, filename)
+            await asyncio.to_thread(asset_manifest.record, game_id, image_type, safe_name, filename, permanent_url)
+            await asyncio.to_thread(image_cache.add, image_type, prompt, subject_name, filename, permanent_url, size_bytes)
+
+            print(f"Returning permanent URL: {permanent_url}")
+            return permanent_url
+
+        except Exception as e:
+            print(f"❌ Image Error for {subject_name}: {str(e)}")
+            return None
 
+    def _image_path(self, image_type: str, subject_name: str, game_id: str):
+        """Storage file name and full path for a subject's image."""
+        safe_name = f"{subject_name.lower().replace(" ", "-").replace("'", "")}.png"
+        return safe_name, f"{image_type}s/{game_id}/{safe_name}"
 
 
+_async_openai_client = None
 
 
+def get_async_openai_client():
+    """Shared AsyncOpenAI client so image calls reuse one connection pool."""
+    global _async_openai_client
+    if _async_openai_client is None:
+        _async_openai_client = openai.AsyncOpenAI()
+    return _async_openai_client
@@ -0,0 +1,148 @@
+"""Manifest of generated images per game and asset type.
+
+ImageTool used to list the storage folder before every generation to see if
+the image already existed. The manifest answers that in O(1) from memory,
+is persisted in the generated_assets table, and can be rebuilt from storage
+with reconcile_manifest after a restart.
+
+Its queries go through the repository; the methods here are called from
+worker threads (agent tools, asyncio.to_thread) and block on them.
+"""
+
+import threading
+
+from database.repository import repository
+
+
+IMAGE_BUCKET = "game-images2"
+IMAGE_TYPES = ("character", "location", "clue")
+STORAGE_PAGE_SIZE = 1000
+
+
+class AssetManifest:
+    """In-memory index of (game_id, image_type, file_name) -> public URL."""
+
+    def __init__(self):
+        self._entries: dict[tuple, str] = {}
+        self._loaded_games: set[str] = set()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _load_game(self, game_id: str):
+        """Pull a game's manifest rows from the table (once per game per process)."""
+        with self._lock:
+            if game_id in self._loaded_games:
+                return
+        try:
+            rows = repository.run(repository.asset_rows(game_id))
+        except Exception as e:
+            print(f"❌ Could not load asset manifest for {game_id}: {str(e)}")
+            return
+        with self._lock:
+            for row in rows:
+                self._entries[(game_id, row["image_type"], row["file_name"])] = row["public_url"]
+            self._loaded_games.add(game_id)
+
+    def lookup(self, game_id: str, image_type: str, file_name: str):
+        """Public URL of an already generated asset, or None."""
+        self._load_game(game_id)
+        with self._lock:
+            url = self._entries.get((game_id, image_type, file_name))
+            if url:
+                self.hits += 1
+            else:
+                self.misses += 1
+            return url
+
+    def remember(self, rows: list):
+        """Add manifest rows to memory only."""
+        with self._lock:
+            for row in rows:
+                self._entries[(row["game_id"], row["image_type"], row["file_name"])] = row["public_url"]
+
+    def record(self, game_id: str, image_type: str, file_name: str, storage_path: str, public_url: str):
+        """Add an uploaded asset to memory and persist it."""
+        with self._lock:
+            self._entries[(game_id, image_type, file_name)] = public_url
+        try:
+            repository.run(repository.upsert_assets([{
+                "game_id": game_id,
+                "image_type": image_type,
+                "file_name": file_name,
+                "storage_path": storage_path,
+                "public_url": public_url,
+            }]))
+        except Exception as e:
+            # The upload itself succeeded; reconcile_manifest will persist it later
+            print(f"❌ Could not persist asset manifest entry {storage_path}: {str(e)}")
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "games_loaded": len(self._loaded_games),
+                "hits": self.hits,
+                "misses": self.misses,
+            }
+
+
+asset_manifest = AssetManifest()
+
+
+def list_storage_folder(folder: str) -> list:
+    """List every object in a storage folder, following pagination."""
+    items, offset = [], 0
+    while True:
+        page = repository.run(repository.list_storage(IMAGE_BUCKET, folder, STORAGE_PAGE_SIZE, offset))
+        items.extend(page)
+        if len(page) < STORAGE_PAGE_SIZE:
+            return items
+        offset += STORAGE_PAGE_SIZE
+
+
+def reconcile_manifest(game_id: str = None) -> dict:
+    """Rebuild manifest rows from what is actually in storage.
+
+    Scans one game, or every game folder when game_id is None, and upserts
+    all images in bulk (one write per folder).
+    """
+    recorded = 0
+
+    for image_type in IMAGE_TYPES:
+        root = f"{image_type}s"
+        if game_id:
+            game_ids = [game_id]
+        else:
+            try:
+                # Folders come back without an id
+                game_ids = [item["name"] for item in list_storage_folder(root) if not item.get("id")]
+            except Exception as e:
+                print(f"❌ Could not list {root}: {str(e)}")
+                continue
+
+        for folder_game_id in game_ids:
+            folder = f"{root}/{folder_game_id}"
+            try:
+                rows = [
+                    {
+                        "game_id": folder_game_id,
+                        "image_type": image_type,
+                        "file_name": item["name"],
+                        "storage_path": f"{folder}/{item['name']}",
+                        "public_url": repository.public_storage_url(IMAGE_BUCKET, f"{folder}/{item['name']}"),
+                    }
+                    for item in list_storage_folder(folder) if item.get("id")
+                ]
+                if not rows:
+                    continue
+                repository.run(repository.upsert_assets(rows))
+            except Exception as e:
+                # e.g. leftover folder of a deleted game
+                print(f"❌ Could not reconcile {folder}: {str(e)}")
+                continue
+            asset_manifest.remember(rows)
+            recorded += len(rows)
+
+    print(f"✅ Reconciled asset manifest: {recorded} images")
+    return {"recorded": recorded}
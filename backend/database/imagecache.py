@@ -0,0 +1,182 @@
+"""Content-addressable image cache shared across games.
+
+Many games ask DALL-E for the same things (manor libraries, bloody knives,
+stern butlers). Generated images are indexed by a descriptor derived from
+the normalized prompt with the subject's own name removed, so a later
+request with a matching descriptor reuses the existing asset instead of
+paying for a new generation. Reuse points the new game's image_url at the
+cached object; nothing is copied.
+
+Policies (IMAGE_CACHE_POLICY):
+- off: never reuse
+- exact: reuse when the normalized descriptors hash the same
+- similar: reuse when the descriptor token sets have Jaccard similarity of at
+  least IMAGE_CACHE_SIMILARITY (same image type only). Characters only ever
+  reuse exact matches: similar descriptors of two suspects would give them
+  the same face.
+
+The index is bounded by entry count and total bytes. Eviction drops the
+least recently used entries from the index only. The storage objects stay,
+because the games that generated them still reference them.
+"""
+
+import hashlib
+import os
+import re
+import threading
+from datetime import datetime, timezone
+
+from database.repository import repository
+
+
+IMAGE_CACHE_POLICY = os.getenv("IMAGE_CACHE_POLICY", "exact").lower()
+IMAGE_CACHE_SIMILARITY = float(os.getenv("IMAGE_CACHE_SIMILARITY", "0.8"))
+IMAGE_CACHE_MAX_ENTRIES = int(os.getenv("IMAGE_CACHE_MAX_ENTRIES", "5000"))
+IMAGE_CACHE_MAX_BYTES = int(os.getenv("IMAGE_CACHE_MAX_BYTES", str(5 * 1024 * 1024 * 1024)))
+# DALL-E 3, standard quality, 1024x1024
+IMAGE_COST_USD = float(os.getenv("IMAGE_COST_USD", "0.04"))
+
+# Image types never matched by similarity (portraits must stay distinct)
+EXACT_ONLY_TYPES = {"character"}
+
+STOPWORDS = {
+    "a", "an", "the", "of", "and", "or", "in", "on", "at", "with", "to", "for", "by", "from",
+    "is", "are", "was", "were", "be", "his", "her", "their", "its", "this", "that",
+}
+
+
+def descriptor_tokens(prompt: str, subject_name: str = "") -> list:
+    """Normalized content tokens of a prompt, without the subject's own name."""
+    name_tokens = set(re.findall(r"[a-z0-9]+", (subject_name or "").lower()))
+    tokens = re.findall(r"[a-z0-9]+", (prompt or "").lower())
+    return [t for t in tokens if t not in STOPWORDS and t not in name_tokens]
+
+
+def descriptor_hash(image_type: str, tokens: list) -> str:
+    return hashlib.sha256(f"{image_type}:{' '.join(tokens)}".encode()).hexdigest()
+
+
+def jaccard(a: set, b: set) -> float:
+    return len(a & b) / len(a | b) if a or b else 0.0
+
+
+class ImageCache:
+    """Index of cached assets keyed by descriptor hash."""
+
+    def __init__(self, policy: str, similarity: float, max_entries: int, max_bytes: int):
+        self.policy = policy
+        self.similarity = similarity
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries: dict[str, dict] = {}
+        self._loaded = False
+        self._lock = threading.Lock()
+        self.lookups = 0
+        self.hits = 0
+        self.evictions = 0
+
+    def _load(self):
+        with self._lock:
+            if self._loaded:
+                return
+        try:
+            rows = repository.run(repository.image_cache_entries(self.max_entries))
+        except Exception as e:
+            print(f"❌ Could not load image cache index: {str(e)}")
+            rows = []
+        with self._lock:
+            for row in rows:
+                row["token_set"] = set(row.get("tokens") or [])
+                self._entries[row["prompt_hash"]] = row
+            self._loaded = True
+
+    def lookup(self, image_type: str, prompt: str, subject_name: str = ""):
+        """Cached entry matching this prompt under the configured policy, or None."""
+        if self.policy == "off":
+            return None
+        self._load()
+        tokens = descriptor_tokens(prompt, subject_name)
+        key = descriptor_hash(image_type, tokens)
+
+        with self._lock:
+            self.lookups += 1
+            entry = self._entries.get(key)
+            if not entry and self.policy == "similar" and image_type not in EXACT_ONLY_TYPES:
+                token_set = set(tokens)
+                best, best_score = None, self.similarity
+                for candidate in self._entries.values():
+                    if candidate["image_type"] != image_type:
+                        continue
+                    score = jaccard(token_set, candidate["token_set"])
+                    if score >= best_score:
+                        best, best_score = candidate, score
+                entry = best
+            if not entry:
+                return None
+            self.hits += 1
+            entry["hits"] = (entry.get("hits") or 0) + 1
+            entry["last_used_at"] = datetime.now(timezone.utc).isoformat()
+            hit = dict(entry)
+
+        try:
+            repository.run(repository.touch_image_cache_entry(hit["prompt_hash"], hit["hits"], hit["last_used_at"]))
+        except Exception as e:
+            print(f"❌ Could not update image cache entry: {str(e)}")
+        return hit
+
+    def add(self, image_type: str, prompt: str, subject_name: str, storage_path: str, public_url: str, size_bytes: int = 0):
+        """Index a freshly generated asset and evict beyond the size bounds."""
+        if self.policy == "off":
+            return
+        self._load()
+        tokens = descriptor_tokens(prompt, subject_name)
+        now = datetime.now(timezone.utc).isoformat()
+        row = {
+            "prompt_hash": descriptor_hash(image_type, tokens),
+            "image_type": image_type,
+            "tokens": tokens,
+            "storage_path": storage_path,
+            "public_url": public_url,
+            "size_bytes": size_bytes,
+            "hits": 0,
+            "last_used_at": now,
+        }
+        with self._lock:
+            self._entries[row["prompt_hash"]] = {**row, "token_set": set(tokens)}
+            evicted = self._evict()
+
+        try:
+            repository.run(repository.save_image_cache_entry(row, evicted))
+        except Exception as e:
+            print(f"❌ Could not persist image cache entry: {str(e)}")
+
+    def _evict(self) -> list:
+        """Drop least recently used entries beyond the bounds (caller holds the lock)."""
+        total_bytes = sum(e.get("size_bytes") or 0 for e in self._entries.values())
+        if len(self._entries) <= self.max_entries and total_bytes <= self.max_bytes:
+            return []
+        evicted = []
+        for entry in sorted(self._entries.values(), key=lambda e: e["last_used_at"]):
+            if len(self._entries) <= self.max_entries and total_bytes <= self.max_bytes:
+                break
+            del self._entries[entry["prompt_hash"]]
+            total_bytes -= entry.get("size_bytes") or 0
+            evicted.append(entry["prompt_hash"])
+        self.evictions += len(evicted)
+        return evicted
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "policy": self.policy,
+                "entries": len(self._entries),
+                "bytes": sum(e.get("size_bytes") or 0 for e in self._entries.values()),
+                "lookups": self.lookups,
+                "hits": self.hits,
+                "hit_rate": round(self.hits / self.lookups, 3) if self.lookups else 0.0,
+                "evictions": self.evictions,
+                "dollars_saved": round(self.hits * IMAGE_COST_USD, 2),
+            }
+
+
+image_cache = ImageCache(IMAGE_CACHE_POLICY, IMAGE_CACHE_SIMILARITY, IMAGE_CACHE_MAX_ENTRIES, IMAGE_CACHE_MAX_BYTES)
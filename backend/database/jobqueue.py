@@ -0,0 +1,278 @@
+"""Durable background job queue backed by a local SQLite file.
+
+Replaces fire-and-forget asyncio.create_task for image generation, update
+analysis and summary folds. Jobs survive restarts, every job type has its own
+concurrency limit, failures are retried with exponential backoff, and an
+idempotency key per game/item keeps the same work from being queued twice
+(a failed job's key can be queued again).
+
+Several uvicorn workers can share the file. A claimed job is leased to the
+process that runs it, which renews the lease while the job runs; only jobs
+whose lease has expired (their process died) are picked up again by others.
+
+SQLite calls run in worker threads, off the event loop. Handlers are async
+functions registered per job type; they receive the job payload as keyword
+arguments and signal failure by raising.
+"""
+
+import asyncio
+import json
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+
+
+JOB_QUEUE_PATH = os.getenv("JOB_QUEUE_PATH", "jobs.sqlite3")
+JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", "3"))
+JOB_RETRY_BACKOFF_SECONDS = float(os.getenv("JOB_RETRY_BACKOFF_SECONDS", "5"))
+JOB_POLL_SECONDS = float(os.getenv("JOB_POLL_SECONDS", "1"))
+JOB_RETENTION_HOURS = float(os.getenv("JOB_RETENTION_HOURS", "24"))
+JOB_LEASE_SECONDS = float(os.getenv("JOB_LEASE_SECONDS", "60"))
+# Finished jobs considered for the latency figures in stats()
+LATENCY_WINDOW = 200
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    type TEXT NOT NULL,
+    key TEXT UNIQUE,
+    payload TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'queued',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    run_at REAL NOT NULL,
+    created_at REAL NOT NULL,
+    started_at REAL,
+    finished_at REAL,
+    last_error TEXT,
+    owner TEXT,
+    lease_until REAL
+);
+CREATE INDEX IF NOT EXISTS idx_jobs_claim ON jobs(type, status, run_at);
+"""
+# Columns added after the first release of the table
+MIGRATIONS = {"owner": "ALTER TABLE jobs ADD COLUMN owner TEXT", "lease_until": "ALTER TABLE jobs ADD COLUMN lease_until REAL"}
+
+
+def percentile(values: list, pct: float) -> float:
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(pct / 100 * (len(values) - 1))))]
+
+
+class JobQueue:
+    """SQLite job table plus one dispatcher task per registered job type."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._db = None
+        self._lock = threading.Lock()
+        self._handlers: dict[str, dict] = {}
+        self._wakeups: dict[str, asyncio.Event] = {}
+        self._dispatchers: list[asyncio.Task] = []
+        self._running: set[asyncio.Task] = set()
+        self._in_flight: dict[str, int] = {}
+        self._heartbeat: asyncio.Task | None = None
+        # Identifies this process's leases in a file shared by several workers
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+    def _conn(self) -> sqlite3.Connection:
+        if self._db is None:
+            self._db = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+            self._db.row_factory = sqlite3.Row
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute("PRAGMA synchronous=NORMAL")
+            self._db.executescript(SCHEMA)
+            columns = {row["name"] for row in self._db.execute("PRAGMA table_info(jobs)")}
+            for column, statement in MIGRATIONS.items():
+                if column not in columns:
+                    self._db.execute(statement)
+        return self._db
+
+    def register(self, job_type: str, handler, concurrency: int = 2, max_attempts: int = JOB_MAX_ATTEMPTS):
+        """Register the async handler for a job type (env JOB_CONCURRENCY_<TYPE> overrides the limit)."""
+        concurrency = int(os.getenv(f"JOB_CONCURRENCY_{job_type.upper()}", str(concurrency)))
+        self._handlers[job_type] = {"handler": handler, "concurrency": concurrency, "max_attempts": max_attempts}
+        self._in_flight.setdefault(job_type, 0)
+
+    def _insert(self, job_type: str, payload: dict, key: str, delay: float) -> int:
+        now = time.time()
+        with self._lock:
+            # A failed job's key is reused: the row starts over with the new payload
+            return self._conn().execute(
+                """INSERT INTO jobs (type, key, payload, run_at, created_at) VALUES (?, ?, ?, ?, ?)
+                   ON CONFLICT(key) DO UPDATE SET
+                       payload = excluded.payload, status = 'queued', attempts = 0, run_at = excluded.run_at,
+                       created_at = excluded.created_at, started_at = NULL, finished_at = NULL,
+                       last_error = NULL, owner = NULL, lease_until = NULL
+                   WHERE jobs.status = 'failed'""",
+                (job_type, key, json.dumps(payload), now + delay, now),
+            ).rowcount
+
+    async def enqueue(self, job_type: str, payload: dict, key: str = None, delay: float = 0) -> bool:
+        """Queue a job. Returns False when a queued, running or done job has the same idempotency key."""
+        if job_type not in self._handlers:
+            raise ValueError(f"Unknown job type '{job_type}'")
+        inserted = await asyncio.to_thread(self._insert, job_type, payload, key, delay)
+        if job_type in self._wakeups:
+            self._wakeups[job_type].set()
+        if not inserted:
+            print(f"🔁 Job {key} already queued, skipping")
+        return bool(inserted)
+
+    def _claim(self, job_type: str):
+        """Lease the oldest due job of this type to this process and return it.
+
+        Running jobs whose lease expired (or that predate leases) belong to a
+        dead process and are due too.
+        """
+        now = time.time()
+        with self._lock:
+            return self._conn().execute(
+                """UPDATE jobs SET status = 'running', started_at = ?, attempts = attempts + 1, owner = ?, lease_until = ?
+                   WHERE id = (SELECT id FROM jobs WHERE type = ?
+                               AND ((status = 'queued' AND run_at <= ?) OR (status = 'running' AND (lease_until IS NULL OR lease_until < ?)))
+                               ORDER BY run_at, id LIMIT 1)
+                   RETURNING id, key, payload, attempts""",
+                (now, self.owner, now + JOB_LEASE_SECONDS, job_type, now, now),
+            ).fetchone()
+
+    def _renew_leases(self) -> int:
+        with self._lock:
+            return self._conn().execute(
+                "UPDATE jobs SET lease_until = ? WHERE owner = ? AND status = 'running'",
+                (time.time() + JOB_LEASE_SECONDS, self.owner),
+            ).rowcount
+
+    def _release_leases(self) -> int:
+        """Hand this process's running jobs back to the queue (shutdown)."""
+        with self._lock:
+            return self._conn().execute(
+                "UPDATE jobs SET status = 'queued', run_at = ?, owner = NULL, lease_until = NULL WHERE owner = ? AND status = 'running'",
+                (time.time(), self.owner),
+            ).rowcount
+
+    async def _renew(self):
+        while True:
+            await asyncio.sleep(JOB_LEASE_SECONDS / 3)
+            try:
+                await asyncio.to_thread(self._renew_leases)
+            except sqlite3.Error as e:
+                print(f"❌ Could not renew job leases: {str(e)}")
+
+    def _finish(self, job, error: str = None):
+        spec = self._handlers[job["type"]]
+        now = time.time()
+        with self._lock:
+            db = self._conn()
+            # Only while the lease is still ours; otherwise another worker has taken the job over
+            if error is None:
+                db.execute("UPDATE jobs SET status = 'done', finished_at = ?, last_error = NULL, lease_until = NULL WHERE id = ? AND owner = ?",
+                           (now, job["id"], self.owner))
+            elif job["attempts"] < spec["max_attempts"]:
+                retry_at = now + JOB_RETRY_BACKOFF_SECONDS * 2 ** (job["attempts"] - 1)
+                db.execute("UPDATE jobs SET status = 'queued', run_at = ?, last_error = ?, owner = NULL, lease_until = NULL WHERE id = ? AND owner = ?",
+                           (retry_at, error, job["id"], self.owner))
+            else:
+                db.execute("UPDATE jobs SET status = 'failed', finished_at = ?, last_error = ?, lease_until = NULL WHERE id = ? AND owner = ?",
+                           (now, error, job["id"], self.owner))
+
+    async def _execute(self, job_type: str, job: dict):
+        try:
+            await self._handlers[job_type]["handler"](**json.loads(job["payload"]))
+            await asyncio.to_thread(self._finish, job)
+        except asyncio.CancelledError:
+            # Shutdown: stop() hands the job back to the queue
+            raise
+        except Exception as e:
+            print(f"❌ Job {job_type} #{job['id']} failed (attempt {job['attempts']}): {str(e)}")
+            await asyncio.to_thread(self._finish, job, str(e))
+        finally:
+            self._in_flight[job_type] -= 1
+            self._wakeups[job_type].set()
+
+    async def _dispatch(self, job_type: str):
+        wakeup = self._wakeups[job_type]
+        concurrency = self._handlers[job_type]["concurrency"]
+        while True:
+            wakeup.clear()
+            while self._in_flight[job_type] < concurrency:
+                row = await asyncio.to_thread(self._claim, job_type)
+                if row is None:
+                    break
+                job = {**dict(row), "type": job_type}
+                self._in_flight[job_type] += 1
+                task = asyncio.create_task(self._execute(job_type, job))
+                self._running.add(task)
+                task.add_done_callback(self._running.discard)
+            try:
+                # Poll as well, so retries come back once their backoff is over
+                await asyncio.wait_for(wakeup.wait(), JOB_POLL_SECONDS)
+            except asyncio.TimeoutError:
+                pass
+
+    def _prune(self):
+        cutoff = time.time() - JOB_RETENTION_HOURS * 3600
+        with self._lock:
+            self._conn().execute("DELETE FROM jobs WHERE status IN ('done', 'failed') AND finished_at < ?", (cutoff,))
+
+    async def start(self):
+        """Start the dispatchers (application startup).
+
+        Jobs left running by a dead process are picked up once their lease
+        expires; jobs of other live workers are left alone.
+        """
+        await asyncio.to_thread(self._prune)
+        for job_type in self._handlers:
+            self._wakeups[job_type] = asyncio.Event()
+            self._dispatchers.append(asyncio.create_task(self._dispatch(job_type)))
+        self._heartbeat = asyncio.create_task(self._renew())
+
+    async def stop(self):
+        """Stop dispatching, cancel running jobs and release their leases (application shutdown)."""
+        tasks = self._dispatchers + list(self._running) + ([self._heartbeat] if self._heartbeat else [])
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        released = await asyncio.to_thread(self._release_leases)
+        if released:
+            print(f"🔁 Re-queued {released} jobs interrupted by shutdown")
+        self._dispatchers = []
+        self._wakeups = {}
+        self._heartbeat = None
+
+    def stats(self) -> dict:
+        """Queue depth, in-flight count and wait/run latency per job type."""
+        now = time.time()
+        result = {}
+        with self._lock:
+            db = self._conn()
+            for job_type, spec in self._handlers.items():
+                counts = dict(db.execute("SELECT status, COUNT(*) FROM jobs WHERE type = ? GROUP BY status", (job_type,)).fetchall())
+                oldest = db.execute("SELECT MIN(created_at) FROM jobs WHERE type = ? AND status = 'queued'", (job_type,)).fetchone()[0]
+                finished = db.execute(
+                    "SELECT created_at, started_at, finished_at FROM jobs WHERE type = ? AND status = 'done' ORDER BY finished_at DESC LIMIT ?",
+                    (job_type, LATENCY_WINDOW),
+                ).fetchall()
+                waits = [(row["started_at"] - row["created_at"]) * 1000 for row in finished]
+                runs = [(row["finished_at"] - row["started_at"]) * 1000 for row in finished]
+                result[job_type] = {
+                    "concurrency": spec["concurrency"],
+                    "in_flight": self._in_flight[job_type],
+                    "queued": counts.get("queued", 0),
+                    "running": counts.get("running", 0),
+                    "done": counts.get("done", 0),
+                    "failed": counts.get("failed", 0),
+                    "oldest_queued_age_s": round(now - oldest, 1) if oldest else 0.0,
+                    "wait_ms_p50": round(percentile(waits, 50), 1),
+                    "wait_ms_p95": round(percentile(waits, 95), 1),
+                    "run_ms_p50": round(percentile(runs, 50), 1),
+                    "run_ms_p95": round(percentile(runs, 95), 1),
+                }
+        return result
+
+
+job_queue = JobQueue(JOB_QUEUE_PATH)
@@ -0,0 +1,144 @@
+"""Fuzzy name index over a game's characters, locations and clues.
+
+Built once per world snapshot and shared by every name lookup (agent tools,
+the fast path and the structured-output differ). Names are normalized to
+tokens and character trigrams; a query collects candidates through the
+trigram and token postings and ranks them by a blend of trigram similarity
+and per-token edit distance, so "Elenor Ashfrd" still finds
+"Lady Eleanor Ashford".
+"""
+
+import os
+import re
+import unicodedata
+
+
+NAME_MATCH_MIN_SCORE = float(os.getenv("NAME_MATCH_MIN_SCORE", "0.45"))
+# Lookups that write to the world (the structured-output differ) need a close
+# match that clearly beats the runner-up
+NAME_WRITE_MIN_SCORE = float(os.getenv("NAME_WRITE_MIN_SCORE", "0.85"))
+NAME_WRITE_MIN_MARGIN = float(os.getenv("NAME_WRITE_MIN_MARGIN", "0.1"))
+
+# Which column holds the display name of each entity kind
+NAME_COLUMNS = {"character": "name", "location": "name", "clue": "title"}
+KIND_TABLES = {"character": "characters", "location": "locations", "clue": "clues"}
+
+# Words that carry no identity on their own
+NOISE_TOKENS = {"the", "a", "an", "of", "mr", "mrs", "ms", "miss", "dr", "sir", "lady", "lord"}
+
+
+def normalize(text: str) -> str:
+    text = unicodedata.normalize("NFKD", text or "").encode("ascii", "ignore").decode()
+    return " ".join(re.findall(r"[a-z0-9]+", text.lower()))
+
+
+def name_tokens(normalized: str) -> list:
+    tokens = normalized.split()
+    return [t for t in tokens if t not in NOISE_TOKENS] or tokens
+
+
+def trigrams(normalized: str) -> set:
+    padded = f"  {normalized} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def edit_distance(a: str, b: str) -> int:
+    """Levenshtein distance."""
+    if len(a) < len(b):
+        a, b = b, a
+    previous = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        current = [i]
+        for j, cb in enumerate(b, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (ca != cb)))
+        previous = current
+    return previous[-1]
+
+
+def token_similarity(query_token: str, name_token: str) -> float:
+    if query_token == name_token:
+        return 1.0
+    if len(query_token) >= 3 and name_token.startswith(query_token):
+        return 0.9
+    longest = max(len(query_token), len(name_token))
+    return max(0.0, 1 - edit_distance(query_token, name_token) / longest)
+
+
+class NameIndex:
+    """Ranked fuzzy lookup of entity rows by name."""
+
+    def __init__(self, tables: dict):
+        self._entries = []
+        self._trigram_postings: dict[str, set] = {}
+        self._token_postings: dict[str, set] = {}
+        for kind, column in NAME_COLUMNS.items():
+            for row in tables.get(KIND_TABLES[kind], []):
+                normalized = normalize(row.get(column))
+                if not normalized:
+                    continue
+                entry_id = len(self._entries)
+                entry = {
+                    "kind": kind,
+                    "name": row.get(column),
+                    "normalized": normalized,
+                    "tokens": name_tokens(normalized),
+                    "trigrams": trigrams(normalized),
+                    "row": row,
+                }
+                self._entries.append(entry)
+                for gram in entry["trigrams"]:
+                    self._trigram_postings.setdefault(gram, set()).add(entry_id)
+                for token in entry["tokens"]:
+                    self._token_postings.setdefault(token, set()).add(entry_id)
+
+    def _score(self, normalized: str, query_tokens: list, query_trigrams: set, entry: dict) -> float:
+        if normalized == entry["normalized"]:
+            return 1.0
+        shared = len(query_trigrams & entry["trigrams"])
+        trigram_score = 2 * shared / (len(query_trigrams) + len(entry["trigrams"]))
+        # Every query token should match some name token ("ashford" -> "Lady Eleanor Ashford")
+        token_score = sum(max(token_similarity(q, t) for t in entry["tokens"]) for q in query_tokens) / len(query_tokens)
+        score = max(trigram_score, 0.95 * token_score)
+        if normalized in entry["normalized"]:
+            score = max(score, 0.9)
+        return round(score, 3)
+
+    def search(self, query: str, kind: str = None, limit: int = 5, min_score: float = NAME_MATCH_MIN_SCORE) -> list:
+        """Best matches as [{"kind", "name", "score", "row"}], highest score first."""
+        normalized = normalize(query)
+        if not normalized:
+            return []
+        query_tokens = name_tokens(normalized)
+        query_trigrams = trigrams(normalized)
+
+        candidates = set()
+        for gram in query_trigrams:
+            candidates |= self._trigram_postings.get(gram, set())
+        for token in query_tokens:
+            candidates |= self._token_postings.get(token, set())
+
+        results = []
+        for entry_id in candidates:
+            entry = self._entries[entry_id]
+            if kind and entry["kind"] != kind:
+                continue
+            score = self._score(normalized, query_tokens, query_trigrams, entry)
+            if score >= min_score:
+                results.append({"kind": entry["kind"], "name": entry["name"], "score": score, "row": entry["row"]})
+        results.sort(key=lambda r: (-r["score"], r["name"]))
+        return results[:limit]
+
+    def best(self, query: str, kind: str = None):
+        """Best match as {"kind", "name", "score", "row"} (score 1.0 = exact), or None."""
+        matches = self.search(query, kind, limit=1)
+        return matches[0] if matches else None
+
+    def unambiguous(self, query: str, kind: str = None, min_score: float = NAME_WRITE_MIN_SCORE,
+                    margin: float = NAME_WRITE_MIN_MARGIN):
+        """Row of an exact match, or of a close one that beats the runner-up by margin; otherwise None."""
+        matches = self.search(query, kind, limit=2)
+        if not matches or matches[0]["score"] < min_score:
+            return None
+        if matches[0]["score"] < 1.0 and len(matches) > 1 and matches[0]["score"] - matches[1]["score"] < margin:
+            return None
+        return matches[0]["row"]
@@ -0,0 +1,59 @@
+"""Row builders for persisting generated game worlds (see GameRepository.create_game_world)."""
+
+
+def build_character_record(character: dict) -> dict:
+    """Map a generated character onto the characters table columns."""
+    return {
+        "name": character.get("name"),
+        "description": character.get("description"),
+        "personality": character.get("personality", {}),
+        "lie_policy": character.get("lie_policy", "honest"),
+        "is_killer": character.get("is_killer", False),
+        "is_alive": character.get("is_alive", not character.get("is_victim", False)),
+        "is_victim": character.get("is_victim", False),
+        "secrets": character.get("secrets", []),
+        "relationships": character.get("relationships", {}),
+        "observations": character.get("observations", {}),
+        "metadata": character.get("metadata", {})
+    }
+
+
+def build_location_record(location: dict) -> dict:
+    """Map a generated location onto the locations table columns."""
+    return {
+        "name": location.get("name"),
+        "description": location.get("description"),
+        "is_accessible": location.get("is_accessible", True),
+        "connected_locations": location.get("connected_locations", []),
+        "atmosphere": location.get("atmosphere", "neutral"),
+        "metadata": location.get("metadata", {})
+    }
+
+
+def build_clue_record(clue: dict) -> dict:
+    """Map a generated clue onto the clues table columns."""
+    return {
+        "title": clue.get("title"),
+        "description": clue.get("description"),
+        "location_id": clue.get("location_id"),
+        "is_revealed": clue.get("is_revealed", False),
+        "discovered_by": clue.get("discovered_by"),
+        "discovery_method": clue.get("discovery_method", "investigation"),
+        "significance_level": clue.get("significance_level", 1),
+        "points_to": clue.get("points_to", []),
+        "metadata": clue.get("metadata", {})
+    }
+
+
+def build_timeline_record(event: dict) -> dict:
+    """Map a generated timeline event onto the timeline_events table columns."""
+    return {
+        "event_time": event.get("event_time"),
+        "event_description": event.get("event_description"),
+        "location_id": event.get("location_id"),
+        "character_ids": event.get("character_ids", []),
+        "event_type": event.get("event_type", "general"),
+        "is_public": event.get("is_public", True),
+        "witness_ids": event.get("witness_ids", []),
+        "metadata": event.get("metadata", {})
+    }
@@ -0,0 +1,287 @@
+"""Async data access for games, their worlds and interactions.
+
+Routes, tools and background jobs go through the repository instead of
+building PostgREST queries inline. Table queries and RPCs go through an
+async PostgREST client whose HTTP connection pool is shared by every request,
+so database round trips no longer block the event loop; auth and storage use
+the async Supabase client (acreate_client), with connections of their own.
+World reads are served from the snapshot cache in database.worldcache.
+
+Crew tools run in worker threads; they use the *_sync methods, or run(), which
+run the query on the app's event loop and wait for it.
+"""
+
+import asyncio
+import os
+
+import httpx
+from postgrest import AsyncPostgrestClient
+from postgrest.constants import DEFAULT_POSTGREST_CLIENT_HEADERS
+from supabase import AsyncClientOptions, acreate_client
+
+from database.client import SUPABASE_URL, SUPABASE_SERVICE_ROLE_KEY
+from database.persistence import build_character_record, build_location_record, build_clue_record, build_timeline_record
+from database.timeline import (
+    TIMELINE_DEFAULT_LIMIT, TIMELINE_MAX_LIMIT, TIMELINE_RANK_WINDOW,
+    query_tokens, rank_page, recent_cursor, recent_page, timeline_params,
+)
+from database.updates import apply_game_updates
+from database.worldcache import GameSnapshot, WORLD_TABLES, world_cache
+
+
+SUPABASE_POOL_SIZE = int(os.getenv("SUPABASE_POOL_SIZE", "20"))
+SUPABASE_TIMEOUT_SECONDS = float(os.getenv("SUPABASE_TIMEOUT_SECONDS", "30"))
+# Most recent timeline events kept in a world snapshot (context bundle, differ)
+WORLD_CACHE_TIMELINE_EVENTS = int(os.getenv("WORLD_CACHE_TIMELINE_EVENTS", "100"))
+
+# Column holding the name an image is generated for, per table
+IMAGE_NAME_COLUMNS = {"characters": "name", "locations": "name", "clues": "title"}
+
+
+class GameRepository:
+    """Typed queries over the game tables on a pooled async Supabase client."""
+
+    def __init__(self, url: str, key: str, pool_size: int, timeout: float):
+        self.url = url
+        self.key = key
+        self.pool_size = pool_size
+        self.timeout = timeout
+        self._client = None
+        self._rest = None
+        self._http: httpx.AsyncClient | None = None
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._connect_lock: asyncio.Lock | None = None
+
+    async def connect(self):
+        """Create the client on the running loop (the app's, from the lifespan).
+
+        The client and its pool belong to that loop; worker threads reach it
+        through run().
+        """
+        self._connect_lock = self._connect_lock or asyncio.Lock()
+        async with self._connect_lock:
+            self._loop = asyncio.get_running_loop()
+            if self._client is not None and self._rest is not None:
+                return
+            limits = httpx.Limits(max_connections=self.pool_size, max_keepalive_connections=self.pool_size)
+            self._http = httpx.AsyncClient(limits=limits, timeout=self.timeout, http2=True, follow_redirects=True)
+            # The sub-clients point the base_url of an httpx client handed to
+            # them at their own service, so the pooled one goes to PostgREST only
+            headers = {**DEFAULT_POSTGREST_CLIENT_HEADERS, "apiKey": self.key, "Authorization": f"Bearer {self.key}"}
+            self._rest = AsyncPostgrestClient(f"{self.url}/rest/v1", headers=headers, http_client=self._http)
+            self._client = await acreate_client(self.url, self.key, AsyncClientOptions(
+                postgrest_client_timeout=self.timeout, storage_client_timeout=self.timeout,
+            ))
+
+    async def close(self):
+        if self._http is not None:
+            await self._http.aclose()
+            self._http = None
+        self._rest = None
+        self._client = None
+        self._loop = None
+
+    async def client(self):
+        """Supabase client for auth and storage."""
+        if self._client is None or self._loop is None:
+            await self.connect()
+        return self._client
+
+    async def rest(self):
+        """PostgREST client on the pooled connections, for tables and RPCs."""
+        if self._rest is None or self._loop is None:
+            await self.connect()
+        return self._rest
+
+    def run(self, coro):
+        """Run a repository coroutine from a worker thread and return its result."""
+        loop = self._loop
+        try:
+            on_loop = asyncio.get_running_loop() is loop
+        except RuntimeError:
+            on_loop = False
+        if loop is None or loop.is_closed() or on_loop:
+            coro.close()
+            raise RuntimeError("No repository event loop to run this call on from here; await the async method instead")
+        return asyncio.run_coroutine_threadsafe(coro, loop).result(self.timeout)
+
+    # Users and games
+
+    async def user_exists(self, user_id: str) -> bool:
+        client = await self.client()
+        response = await client.auth.admin.get_user_by_id(user_id)
+        return bool(response.user)
+
+    async def create_game_world(self, game_record: dict, game_data: dict) -> str:
+        """Write the game row and its whole world in a single transaction.
+
+        Calls the create_game_world stored procedure (see schema.sql), which
+        deactivates the user's previous games, inserts the game and does one
+        multi-row insert per world table. Any failure rolls the whole thing back,
+        including the games row. Returns the new game id.
+        """
+        client = await self.rest()
+        payload = {
+            "p_game": game_record,
+            "p_characters": [build_character_record(c) for c in game_data.get("characters", [])],
+            "p_locations": [build_location_record(l) for l in game_data.get("locations", [])],
+            "p_clues": [build_clue_record(c) for c in game_data.get("clues", [])],
+            "p_timeline_events": [build_timeline_record(e) for e in game_data.get("timeline_events", [])],
+        }
+        response = await client.rpc("create_game_world", payload).execute()
+        if not response.data:
+            raise RuntimeError("create_game_world returned no game id")
+        return response.data
+
+    async def get_game(self, game_id: str, columns: str = "*") -> dict:
+        """The games row (only the given columns), or {} if there is none."""
+        client = await self.rest()
+        response = await client.table("games").select(columns).eq("id", game_id).execute()
+        return response.data[0] if response.data else {}
+
+    async def update_game(self, game_id: str, changes: dict):
+        client = await self.rest()
+        await client.table("games").update(changes).eq("id", game_id).execute()
+
+    # Interactions
+
+    async def insert_interaction(self, record: dict) -> str:
+        """Log one turn; returns the interaction id."""
+        client = await self.rest()
+        response = await client.table("interactions").insert(record).execute()
+        return response.data[0]["id"]
+
+    async def recent_interactions(self, game_id: str, limit: int = 5) -> list:
+        """The last turns of a game (user_query, agent_response), oldest first."""
+        client = await self.rest()
+        response = await (
+            client.table("interactions").select("user_query, agent_response")
+            .eq("game_id", game_id).order("created_at", desc=True).limit(limit).execute()
+        )
+        return list(reversed(response.data or []))
+
+    async def interaction_timings(self, since: str, limit: int) -> list:
+        """response_time_ms and agent_payload of the newest turns since an ISO time, across all games."""
+        client = await self.rest()
+        response = await (
+            client.table("interactions").select("response_time_ms, agent_payload")
+            .gte("created_at", since).order("created_at", desc=True).limit(limit).execute()
+        )
+        return response.data or []
+
+    # World state
+
+    async def load_world(self, game_id: str) -> GameSnapshot:
+        """The game's world snapshot, loaded once per game on a cache miss."""
+        return await world_cache.aget(game_id, self._fetch_world)
+
+    def load_world_sync(self, game_id: str) -> GameSnapshot:
+        """load_world() for worker threads; cache hits never leave the thread."""
+        return world_cache.get(game_id, lambda g: self.run(self._fetch_world(g)))
+
+    def invalidate_world(self, game_id: str):
+        world_cache.invalidate(game_id)
+
+    async def find_by_name(self, game_id: str, kind: str, name: str):
+        """Best fuzzy match for a character, location or clue name ({"name", "score", "row"}), or None."""
+        return (await self.load_world(game_id)).find(kind, name)
+
+    async def clues_in_location(self, game_id: str, location_name: str) -> list:
+        return (await self.load_world(game_id)).clues_in_location(location_name)
+
+    async def timeline(self, game_id: str, query: str = None, start_time: str = None, end_time: str = None,
+                       characters: list = None, locations: list = None, event_types: list = None,
+                       limit: int = TIMELINE_DEFAULT_LIMIT, cursor: str = None) -> dict:
+        """One page of matching timeline events: {"events", "total", "next_cursor"}.
+
+        Filters, ordering and paging run in the query_timeline RPC; a free text
+        query ranks the most recent matching window (see database.timeline).
+        """
+        limit = max(1, min(limit or TIMELINE_DEFAULT_LIMIT, TIMELINE_MAX_LIMIT))
+        snapshot = await self.load_world(game_id)
+        params = timeline_params(game_id, snapshot.name_index, start_time, end_time, characters, locations, event_types)
+        client = await self.rest()
+        if query_tokens(query):
+            response = await client.rpc("query_timeline", {**params, "p_limit": TIMELINE_RANK_WINDOW}).execute()
+            events = [{k: v for k, v in row.items() if k != "total_count"} for row in response.data or []]
+            return rank_page(events, query, limit, cursor)
+        after_created_at, after_id = recent_cursor(cursor) if cursor else (None, None)
+        response = await client.rpc("query_timeline", {
+            **params, "p_after_created_at": after_created_at, "p_after_id": after_id, "p_limit": limit + 1,
+        }).execute()
+        return recent_page(response.data or [], limit)
+
+    async def set_image_url(self, game_id: str, table: str, item_name: str, image_url: str):
+        """Attach a generated image to the character, location or clue with that name."""
+        client = await self.rest()
+        column = IMAGE_NAME_COLUMNS[table]
+        await client.table(table).update({"image_url": image_url}).eq("game_id", game_id).eq(column, item_name).execute()
+        world_cache.patch_rows(game_id, table, {column: item_name}, {"image_url": image_url})
+
+    # Generated images
+
+    async def asset_rows(self, game_id: str) -> list:
+        """A game's generated_assets manifest rows."""
+        client = await self.rest()
+        response = await client.table("generated_assets").select("image_type, file_name, public_url").eq("game_id", game_id).execute()
+        return response.data or []
+
+    async def upsert_assets(self, rows: list):
+        client = await self.rest()
+        await client.table("generated_assets").upsert(rows, on_conflict="game_id,image_type,file_name").execute()
+
+    async def image_cache_entries(self, limit: int) -> list:
+        """Most recently used rows of the cross-game image cache index."""
+        client = await self.rest()
+        response = await client.table("image_cache").select("*").order("last_used_at", desc=True).limit(limit).execute()
+        return response.data or []
+
+    async def touch_image_cache_entry(self, prompt_hash: str, hits: int, last_used_at: str):
+        client = await self.rest()
+        await client.table("image_cache").update({"hits": hits, "last_used_at": last_used_at}).eq("prompt_hash", prompt_hash).execute()
+
+    async def save_image_cache_entry(self, row: dict, evicted: list):
+        """Upsert an image cache entry and delete the entries it evicted."""
+        client = await self.rest()
+        await client.table("image_cache").upsert(row, on_conflict="prompt_hash").execute()
+        if evicted:
+            await client.table("image_cache").delete().in_("prompt_hash", evicted).execute()
+
+    async def list_storage(self, bucket: str, folder: str, limit: int, offset: int) -> list:
+        """One page of the objects and folders in a storage folder."""
+        client = await self.client()
+        return await client.storage.from_(bucket).list(folder, {"limit": limit, "offset": offset})
+
+    def public_storage_url(self, bucket: str, path: str) -> str:
+        return f"{self.url}/storage/v1/object/public/{bucket}/{path}"
+
+    async def apply_updates(self, game_id: str, updates: list) -> dict:
+        """Apply GameUpdate dicts in one transaction; returns the outcome report."""
+        try:
+            return await apply_game_updates(game_id, updates, self._apply_ops)
+        finally:
+            # Reload the world on next lookup
+            world_cache.invalidate(game_id)
+
+    async def _apply_ops(self, game_id: str, ops: list) -> list:
+        client = await self.rest()
+        response = await client.rpc("apply_game_updates", {"p_game_id": game_id, "p_ops": ops}).execute()
+        return response.data or []
+
+    async def _fetch_world(self, game_id: str) -> GameSnapshot:
+        client = await self.rest()
+
+        async def fetch(table: str) -> list:
+            query = client.table(table).select("*").eq("game_id", game_id)
+            if table == "timeline_events":
+                # Only the recent tail; timeline searches go through timeline()
+                query = query.order("created_at", desc=True).limit(WORLD_CACHE_TIMELINE_EVENTS)
+                return list(reversed((await query.execute()).data or []))
+            return (await query.execute()).data or []
+
+        # The four tables are fetched concurrently over the pool
+        rows = await asyncio.gather(*[fetch(table) for table in WORLD_TABLES])
+        return GameSnapshot(game_id, dict(zip(WORLD_TABLES, rows)))
+
+
+repository = GameRepository(SUPABASE_URL, SUPABASE_SERVICE_ROLE_KEY, SUPABASE_POOL_SIZE, SUPABASE_TIMEOUT_SECONDS)
@@ -14,7 +14,10 @@ CREATE TABLE games (
     updated_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
     opening_summary TEXT DEFAULT NULL,
     is_active BOOLEAN NOT NULL DEFAULT TRUE,
-    in_progress BOOLEAN NOT NULL DEFAULT TRUE
+    in_progress BOOLEAN NOT NULL DEFAULT TRUE,
+    story_summary TEXT DEFAULT NULL, -- chapter-level summary of the whole session
+    rolling_summary TEXT DEFAULT NULL, -- incremental summary of the current chapter
+    summary_turns INTEGER NOT NULL DEFAULT 0 -- turns folded into rolling_summary
 );
 
 -- 2. Characters table
@@ -30,6 +33,7 @@ CREATE TABLE characters (
     is_victim BOOLEAN NOT NULL DEFAULT FALSE,
     secrets JSONB DEFAULT '[]',
     relationships JSONB DEFAULT '{}',
+    observations JSONB DEFAULT '{}',
     metadata JSONB DEFAULT '{}',
     created_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
     image_url TEXT DEFAULT NULL
@@ -104,8 +108,8 @@ CREATE INDEX idx_characters_is_killer ON characters(is_killer);
 CREATE INDEX idx_locations_game_id ON locations(game_id);
 CREATE INDEX idx_clues_game_id ON clues(game_id);
 CREATE INDEX idx_clues_revealed ON clues(is_revealed);
-CREATE INDEX idx_timeline_game_id ON timeline_events(game_id);
-CREATE INDEX idx_timeline_event_time ON timeline_events(event_time);
+CREATE INDEX idx_timeline_game_event_time ON timeline_events(game_id, event_time);
+CREATE INDEX idx_timeline_game_created_at ON timeline_events(game_id, created_at);
 CREATE INDEX idx_interactions_game_id ON interactions(game_id);
 CREATE INDEX idx_interactions_created_at ON interactions(created_at);
 
@@ -186,3 +190,205 @@ $$ language 'plpgsql';
 
 CREATE TRIGGER update_games_updated_at BEFORE UPDATE ON games 
     FOR EACH ROW EXECUTE FUNCTION update_updated_at_column();
+
+
+-- Transactional world creation used by POST /api/games/create.
+-- One call writes the game row plus one multi-row insert per world table;
+-- any failure rolls everything back, including the games row.
+CREATE OR REPLACE FUNCTION create_game_world(
+    p_game JSONB,
+    p_characters JSONB,
+    p_locations JSONB,
+    p_clues JSONB,
+    p_timeline_events JSONB
+)
+RETURNS UUID AS $$
+DECLARE
+    new_game_id UUID;
+BEGIN
+    UPDATE games SET is_active = FALSE WHERE user_id = p_game->>'user_id';
+
+    INSERT INTO games (user_id, title, status, opening_summary, is_active, in_progress)
+    VALUES (
+        p_game->>'user_id',
+        COALESCE(p_game->>'title', 'Untitled Mystery'),
+        COALESCE(p_game->>'status', 'INIT'),
+        p_game->>'opening_summary',
+        COALESCE((p_game->>'is_active')::BOOLEAN, TRUE),
+        COALESCE((p_game->>'in_progress')::BOOLEAN, TRUE)
+    )
+    RETURNING id INTO new_game_id;
+
+    INSERT INTO characters (game_id, name, description, personality, lie_policy, is_killer, is_alive, is_victim, secrets, relationships, observations, metadata)
+    SELECT new_game_id, c.name, c.description, COALESCE(c.personality, '{}'), COALESCE(c.lie_policy, 'honest'),
+           COALESCE(c.is_killer, FALSE), COALESCE(c.is_alive, TRUE), COALESCE(c.is_victim, FALSE),
+           COALESCE(c.secrets, '[]'), COALESCE(c.relationships, '{}'), COALESCE(c.observations, '{}'), COALESCE(c.metadata, '{}')
+    FROM jsonb_to_recordset(p_characters) AS c(
+        name TEXT, description TEXT, personality JSONB, lie_policy TEXT, is_killer BOOLEAN, is_alive BOOLEAN,
+        is_victim BOOLEAN, secrets JSONB, relationships JSONB, observations JSONB, metadata JSONB
+    );
+
+    INSERT INTO locations (game_id, name, description, is_accessible, connected_locations, atmosphere, metadata)
+    SELECT new_game_id, l.name, l.description, COALESCE(l.is_accessible, TRUE), COALESCE(l.connected_locations, '{}'),
+           COALESCE(l.atmosphere, 'neutral'), COALESCE(l.metadata, '{}')
+    FROM jsonb_to_recordset(p_locations) AS l(
+        name TEXT, description TEXT, is_accessible BOOLEAN, connected_locations TEXT[], atmosphere TEXT, metadata JSONB
+    );
+
+    INSERT INTO clues (game_id, title, description, location_id, is_revealed, discovered_by, discovery_method, significance_level, points_to, metadata)
+    SELECT new_game_id, cl.title, cl.description, cl.location_id, COALESCE(cl.is_revealed, FALSE), cl.discovered_by,
+           COALESCE(cl.discovery_method, 'investigation'), COALESCE(cl.significance_level, 1), COALESCE(cl.points_to, '{}'),
+           COALESCE(cl.metadata, '{}')
+    FROM jsonb_to_recordset(p_clues) AS cl(
+        title TEXT, description TEXT, location_id TEXT, is_revealed BOOLEAN, discovered_by TEXT, discovery_method TEXT,
+        significance_level INTEGER, points_to TEXT[], metadata JSONB
+    );
+
+    INSERT INTO timeline_events (game_id, event_time, event_description, location_id, character_ids, event_type, is_public, witness_ids, metadata)
+    SELECT new_game_id, t.event_time, t.event_description, t.location_id, COALESCE(t.character_ids, '{}'),
+           COALESCE(t.event_type, 'general'), COALESCE(t.is_public, TRUE), COALESCE(t.witness_ids, '{}'), COALESCE(t.metadata, '{}')
+    FROM jsonb_to_recordset(p_timeline_events) AS t(
+        event_time TIMESTAMPTZ, event_description TEXT, location_id TEXT, character_ids TEXT[], event_type TEXT,
+        is_public BOOLEAN, witness_ids TEXT[], metadata JSONB
+    );
+
+    RETURN new_game_id;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Migration for existing projects: rolling game summaries
+ALTER TABLE games ADD COLUMN IF NOT EXISTS story_summary TEXT DEFAULT NULL;
+ALTER TABLE games ADD COLUMN IF NOT EXISTS rolling_summary TEXT DEFAULT NULL;
+ALTER TABLE games ADD COLUMN IF NOT EXISTS summary_turns INTEGER NOT NULL DEFAULT 0;
+
+-- Manifest of generated images (one row per uploaded file in the game-images2 bucket)
+CREATE TABLE IF NOT EXISTS generated_assets (
+    id UUID PRIMARY KEY DEFAULT uuid_generate_v4(),
+    game_id UUID NOT NULL REFERENCES games(id) ON DELETE CASCADE,
+    image_type TEXT NOT NULL CHECK (image_type IN ('character', 'location', 'clue')),
+    file_name TEXT NOT NULL,
+    storage_path TEXT NOT NULL,
+    public_url TEXT NOT NULL,
+    created_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    UNIQUE (game_id, image_type, file_name)
+);
+ALTER TABLE generated_assets ENABLE ROW LEVEL SECURITY;
+
+-- Content-addressable image cache shared across games (see database/imagecache.py)
+CREATE TABLE IF NOT EXISTS image_cache (
+    prompt_hash TEXT PRIMARY KEY,
+    image_type TEXT NOT NULL CHECK (image_type IN ('character', 'location', 'clue')),
+    tokens TEXT[] NOT NULL DEFAULT '{}',
+    storage_path TEXT NOT NULL,
+    public_url TEXT NOT NULL,
+    size_bytes INTEGER NOT NULL DEFAULT 0,
+    hits INTEGER NOT NULL DEFAULT 0,
+    created_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    last_used_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+CREATE INDEX IF NOT EXISTS idx_image_cache_last_used ON image_cache(last_used_at);
+ALTER TABLE image_cache ENABLE ROW LEVEL SECURITY;
+
+-- Batched application of a turn's GameUpdateAnalysis (see database/updates.py).
+-- p_ops is a list of {table, action, columns, rows, ids} groups; each group runs
+-- as one bulk statement and the whole call is a single transaction. Inserted rows
+-- carry the id the caller generated for them. Returns one array of affected ids
+-- per group, in order.
+CREATE OR REPLACE FUNCTION apply_game_updates(p_game_id UUID, p_ops JSONB)
+RETURNS JSONB AS $$
+DECLARE
+    op JSONB;
+    tbl TEXT;
+    cols TEXT;
+    assignments TEXT;
+    affected JSONB;
+    results JSONB := '[]'::JSONB;
+BEGIN
+    FOR op IN SELECT value FROM jsonb_array_elements(p_ops) LOOP
+        tbl := op->>'table';
+        IF tbl NOT IN ('characters', 'locations', 'clues', 'timeline_events') THEN
+            RAISE EXCEPTION 'Table % cannot be updated', tbl;
+        END IF;
+
+        SELECT string_agg(format('%I', c), ', '), string_agg(format('%1$I = r.%1$I', c), ', ')
+        INTO cols, assignments
+        FROM jsonb_array_elements_text(COALESCE(op->'columns', '[]'::JSONB)) AS c;
+
+        IF op->>'action' = 'insert' THEN
+            EXECUTE format(
+                'WITH w AS (INSERT INTO %1$I (game_id, %2$s) SELECT $1, %2$s FROM jsonb_populate_recordset(NULL::%1$I, $2) RETURNING id)
+                 SELECT COALESCE(jsonb_agg(id), ''[]'') FROM w',
+                tbl, cols)
+            INTO affected USING p_game_id, op->'rows';
+        ELSIF op->>'action' = 'update' THEN
+            EXECUTE format(
+                'WITH w AS (UPDATE %1$I t SET %2$s FROM jsonb_populate_recordset(NULL::%1$I, $2) r
+                            WHERE t.id = r.id AND t.game_id = $1 RETURNING t.id)
+                 SELECT COALESCE(jsonb_agg(id), ''[]'') FROM w',
+                tbl, assignments)
+            INTO affected USING p_game_id, op->'rows';
+        ELSIF op->>'action' = 'delete' THEN
+            EXECUTE format(
+                'WITH w AS (DELETE FROM %1$I WHERE game_id = $1 AND id::TEXT IN (SELECT jsonb_array_elements_text($2)) RETURNING id)
+                 SELECT COALESCE(jsonb_agg(id), ''[]'') FROM w',
+                tbl)
+            INTO affected USING p_game_id, op->'ids';
+        ELSE
+            RAISE EXCEPTION 'Unknown action %', op->>'action';
+        END IF;
+
+        results := results || jsonb_build_array(affected);
+    END LOOP;
+
+    RETURN results;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Migration for existing projects: composite timeline access paths
+-- (per-game reads ordered by created_at, windowed reads by event_time)
+CREATE INDEX IF NOT EXISTS idx_timeline_game_event_time ON timeline_events(game_id, event_time);
+CREATE INDEX IF NOT EXISTS idx_timeline_game_created_at ON timeline_events(game_id, created_at);
+DROP INDEX IF EXISTS idx_timeline_game_id;
+DROP INDEX IF EXISTS idx_timeline_event_time;
+
+-- Windowed timeline reads (see database/timeline.py). timeline_matches applies
+-- the optional filters (NULL = any, names and types compared case-insensitively);
+-- query_timeline returns one most-recent-first keyset page of it after
+-- (p_after_created_at, p_after_id), each row carrying the total match count.
+-- Both are plain SQL so the planner inlines them and uses the
+-- (game_id, created_at) and (game_id, event_time) indexes.
+CREATE OR REPLACE FUNCTION timeline_matches(
+    p_game_id UUID, p_start TIMESTAMPTZ, p_end TIMESTAMPTZ,
+    p_characters TEXT[], p_locations TEXT[], p_event_types TEXT[]
+)
+RETURNS SETOF timeline_events AS $$
+    SELECT * FROM timeline_events t
+    WHERE t.game_id = p_game_id
+      AND (p_start IS NULL OR t.event_time >= p_start)
+      AND (p_end IS NULL OR t.event_time <= p_end)
+      AND (p_event_types IS NULL OR lower(t.event_type) = ANY(p_event_types))
+      AND (p_locations IS NULL OR lower(t.location_id) = ANY(p_locations))
+      AND (p_characters IS NULL OR EXISTS (
+          SELECT 1 FROM unnest(COALESCE(t.character_ids, '{}') || COALESCE(t.witness_ids, '{}')) AS name
+          WHERE lower(name) = ANY(p_characters)
+      ))
+$$ LANGUAGE sql STABLE;
+
+CREATE OR REPLACE FUNCTION query_timeline(
+    p_game_id UUID, p_start TIMESTAMPTZ DEFAULT NULL, p_end TIMESTAMPTZ DEFAULT NULL,
+    p_characters TEXT[] DEFAULT NULL, p_locations TEXT[] DEFAULT NULL, p_event_types TEXT[] DEFAULT NULL,
+    p_after_created_at TIMESTAMPTZ DEFAULT NULL, p_after_id UUID DEFAULT NULL, p_limit INTEGER DEFAULT 20
+)
+RETURNS TABLE (
+    id UUID, game_id UUID, event_time TIMESTAMPTZ, event_description TEXT, location_id TEXT,
+    character_ids TEXT[], event_type TEXT, is_public BOOLEAN, witness_ids TEXT[], metadata JSONB,
+    created_at TIMESTAMPTZ, total_count BIGINT
+) AS $$
+    SELECT m.id, m.game_id, m.event_time, m.event_description, m.location_id, m.character_ids, m.event_type,
+           m.is_public, m.witness_ids, m.metadata, m.created_at,
+           (SELECT count(*) FROM timeline_matches(p_game_id, p_start, p_end, p_characters, p_locations, p_event_types))
+    FROM timeline_matches(p_game_id, p_start, p_end, p_characters, p_locations, p_event_types) m
+    WHERE p_after_created_at IS NULL OR (m.created_at, m.id) < (p_after_created_at, p_after_id)
+    ORDER BY m.created_at DESC, m.id DESC
+    LIMIT p_limit
+$$ LANGUAGE sql STABLE;
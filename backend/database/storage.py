@@ -0,0 +1,120 @@
+"""Streaming transfer of generated images into Supabase Storage.
+
+Images are piped chunk by chunk from the source URL (DALL-E's temporary
+URL) into the storage REST API, so a full PNG is never held in memory.
+Both directions share keep-alive connection pools instead of opening a
+fresh TLS connection per image.
+"""
+
+import os
+import threading
+
+import httpx
+
+from database.assets import IMAGE_BUCKET
+from database.client import SUPABASE_URL, SUPABASE_SERVICE_ROLE_KEY
+from database.repository import repository
+
+
+TRANSFER_CHUNK_SIZE = 64 * 1024
+TRANSFER_TIMEOUT = httpx.Timeout(60.0, connect=10.0)
+TRANSFER_LIMITS = httpx.Limits(
+    max_connections=int(os.getenv("IMAGE_HTTP_MAX_CONNECTIONS", "20")),
+    max_keepalive_connections=int(os.getenv("IMAGE_HTTP_MAX_KEEPALIVE", "10")),
+)
+
+_async_client: httpx.AsyncClient | None = None
+_sync_client: httpx.Client | None = None
+_sync_client_lock = threading.Lock()
+
+
+def get_async_http_client() -> httpx.AsyncClient:
+    """Shared pooled async client (created on first use, bound to the running loop)."""
+    global _async_client
+    if _async_client is None or _async_client.is_closed:
+        _async_client = httpx.AsyncClient(limits=TRANSFER_LIMITS, timeout=TRANSFER_TIMEOUT)
+    return _async_client
+
+
+def get_sync_http_client() -> httpx.Client:
+    """Shared pooled client for synchronous callers (agent tools in crew threads)."""
+    global _sync_client
+    with _sync_client_lock:
+        if _sync_client is None or _sync_client.is_closed:
+            _sync_client = httpx.Client(limits=TRANSFER_LIMITS, timeout=TRANSFER_TIMEOUT)
+        return _sync_client
+
+
+async def close_http_clients():
+    """Close the shared clients (application shutdown)."""
+    global _async_client, _sync_client
+    if _async_client is not None:
+        await _async_client.aclose()
+        _async_client = None
+    if _sync_client is not None:
+        _sync_client.close()
+        _sync_client = None
+
+
+def _upload_request(storage_path: str, content_length: str | None):
+    url = f"{SUPABASE_URL}/storage/v1/object/{IMAGE_BUCKET}/{storage_path}"
+    headers = {
+        "Authorization": f"Bearer {SUPABASE_SERVICE_ROLE_KEY}",
+        "apikey": SUPABASE_SERVICE_ROLE_KEY,
+        "Content-Type": "image/png",
+        "x-upsert": "false",
+    }
+    if content_length:
+        headers["Content-Length"] = content_length
+    return url, headers
+
+
+def _is_duplicate(response: httpx.Response) -> bool:
+    return response.status_code == 409 or "Duplicate" in response.text or "already exists" in response.text
+
+
+def public_url(storage_path: str) -> str:
+    return repository.public_storage_url(IMAGE_BUCKET, storage_path)
+
+
+async def stream_to_storage(source_url: str, storage_path: str) -> tuple[str, int]:
+    """Pipe source_url into the image bucket at storage_path.
+
+    Returns the public URL and the number of bytes transferred.
+    """
+    client = get_async_http_client()
+    transferred = 0
+
+    async def chunks(source):
+        nonlocal transferred
+        async for chunk in source.aiter_raw(TRANSFER_CHUNK_SIZE):
+            transferred += len(chunk)
+            yield chunk
+
+    async with client.stream("GET", source_url) as source:
+        source.raise_for_status()
+        url, headers = _upload_request(storage_path, source.headers.get("content-length"))
+        response = await client.post(url, content=chunks(source), headers=headers)
+    if response.status_code >= 400 and not _is_duplicate(response):
+        raise RuntimeError(f"Storage upload failed ({response.status_code}): {response.text}")
+    return public_url(storage_path), transferred
+
+
+def stream_to_storage_sync(source_url: str, storage_path: str) -> tuple[str, int]:
+    """Blocking variant of stream_to_storage for synchronous tool calls."""
+    client = get_sync_http_client()
+    transferred = 0
+
+    def chunks(source):
+        nonlocal transferred
+        for chunk in source.iter_raw(TRANSFER_CHUNK_SIZE):
+            transferred += len(chunk)
+            yield chunk
+
+    with client.stream("GET", source_url) as source:
+        source.raise_for_status()
+        url, headers = _upload_request(storage_path, source.headers.get("content-length"))
+        response = client.post(url, content=chunks(source), headers=headers)
+    if response.status_code >= 400 and not _is_duplicate(response):
+        raise RuntimeError(f"Storage upload failed ({response.status_code}): {response.text}")
+    return public_url(storage_path), transferred
@@ -0,0 +1,141 @@
+"""Windowed, relevance-ranked queries over a game's timeline.
+
+The timeline grows with every analyzed turn, so neither agents nor the API
+read it whole any more. The query_timeline stored procedure (see schema.sql)
+filters a game's events by event time range, characters, locations and event
+types in the database and returns them most recent first, one keyset page at
+a time, over the (game_id, created_at) and (game_id, event_time) indexes.
+
+Without a free text query that page is the result. With one, only the most
+recent TIMELINE_RANK_WINDOW matching events are fetched and ranked here
+against it; pages of the ranking are cut from that window. Cursors are opaque
+to callers either way.
+"""
+
+import base64
+import json
+import math
+import os
+import re
+from datetime import datetime, timezone
+
+
+TIMELINE_DEFAULT_LIMIT = 20
+TIMELINE_MAX_LIMIT = 100
+# Most recent matching events ranked against a free text query
+TIMELINE_RANK_WINDOW = int(os.getenv("TIMELINE_RANK_WINDOW", "200"))
+
+STOPWORDS = {"the", "a", "an", "of", "and", "or", "in", "on", "at", "to", "was", "is", "did", "what", "who", "when", "where", "about"}
+
+
+def query_tokens(text: str) -> list:
+    return [t for t in re.findall(r"[a-z0-9]+", (text or "").lower()) if t not in STOPWORDS]
+
+
+def parse_time(value):
+    """Event time as an aware datetime, or None for free-form times like '9:00 PM'."""
+    if not value:
+        return None
+    try:
+        parsed = datetime.fromisoformat(str(value))
+    except ValueError:
+        return None
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+
+
+def encode_cursor(key: tuple) -> str:
+    return base64.urlsafe_b64encode(json.dumps(key).encode()).decode()
+
+
+def decode_cursor(cursor: str) -> tuple:
+    try:
+        return tuple(json.loads(base64.urlsafe_b64decode(cursor.encode())))
+    except Exception:
+        raise ValueError("Invalid cursor")
+
+
+def _event_text(event: dict) -> str:
+    people = " ".join(event.get("character_ids") or []) + " " + " ".join(event.get("witness_ids") or [])
+    return f"{event.get('event_description') or ''} {event.get('location_id') or ''} {people} {event.get('event_type') or ''}"
+
+
+def timeline_params(game_id: str, name_index, start_time: str = None, end_time: str = None,
+                    characters: list = None, locations: list = None, event_types: list = None) -> dict:
+    """query_timeline RPC filters, with player-facing names resolved to the stored ones."""
+    start, end = parse_time(start_time), parse_time(end_time)
+    if (start_time and not start) or (end_time and not end):
+        raise ValueError("start_time and end_time must be ISO timestamps")
+    # Typos included; matching in the database is case-insensitive
+    wanted_characters = sorted({(name_index.best(name, "character") or {"name": name})["name"].lower() for name in characters or []})
+    wanted_locations = sorted({(name_index.best(name, "location") or {"name": name})["name"].lower() for name in locations or []})
+    wanted_types = sorted({t.lower() for t in event_types or []})
+    return {
+        "p_game_id": game_id,
+        "p_start": start.isoformat() if start else None,
+        "p_end": end.isoformat() if end else None,
+        "p_characters": wanted_characters or None,
+        "p_locations": wanted_locations or None,
+        "p_event_types": wanted_types or None,
+    }
+
+
+def _is_after(key: tuple, cursor: tuple) -> bool:
+    """Whether a ranked event's (-score, created_at, id) key sorts after the cursor.
+
+    Score ascends (it is negated) while created_at and id descend.
+    """
+    if key[0] != cursor[0]:
+        return key[0] > cursor[0]
+    return (key[1], key[2]) < (cursor[1], cursor[2])
+
+
+def rank_page(events: list, query: str, limit: int, cursor: str = None) -> dict:
+    """Rank a window of events (most recent first) against query and cut one page."""
+    terms = query_tokens(query)
+    documents = [set(query_tokens(_event_text(event))) for event in events]
+    weights = {}
+    for token in set(terms):
+        frequency = sum(token in document for document in documents)
+        weights[token] = math.log(1 + (len(documents) - frequency + 0.5) / (frequency + 0.5))
+
+    # BM25-like term weights; the window's order (recency) breaks ties
+    scored = []
+    for event, document in zip(events, documents):
+        score = sum(weights[token] for token in terms if token in document)
+        if score:
+            scored.append(((-round(score, 4), event["created_at"], str(event["id"])), score, event))
+    scored.sort(key=lambda item: item[0][0])
+    total = len(scored)
+
+    if cursor:
+        kind, *after = decode_cursor(cursor)
+        if kind != "rank":
+            raise ValueError("Invalid cursor")
+        scored = [item for item in scored if _is_after(item[0], tuple(after))]
+
+    page = scored[:limit]
+    return {
+        "events": [{**event, "relevance": round(score, 3)} for _, score, event in page],
+        "total": total,
+        "next_cursor": encode_cursor(("rank", *page[-1][0])) if len(scored) > limit else None,
+    }
+
+
+def recent_page(rows: list, limit: int) -> dict:
+    """Page of a keyset fetch of limit + 1 rows, most recent first."""
+    total = rows[0].get("total_count", len(rows)) if rows else 0
+    events = [{k: v for k, v in row.items() if k != "total_count"} for row in rows]
+    page = events[:limit]
+    return {
+        "events": page,
+        "total": total,
+        "next_cursor": encode_cursor(("recent", page[-1]["created_at"], str(page[-1]["id"]))) if len(events) > limit else None,
+    }
+
+
+def recent_cursor(cursor: str) -> tuple:
+    """(created_at, id) to continue a most-recent-first listing after."""
+    kind, *after = decode_cursor(cursor)
+    if kind != "recent" or len(after) != 2:
+        raise ValueError("Invalid cursor")
+    return tuple(after)
@@ -0,0 +1,211 @@
+"""Batched, transactional application of GameUpdateAnalysis results.
+
+Updates are validated against the table schema (columns and CHECK
+constraints) up front, so a bad value only rejects its own update. They are
+then grouped by
+(table, action, columns) and sent to the apply_game_updates stored procedure
+(see schema.sql) in a single call. That call runs one bulk statement per
+group inside one transaction, so a turn is either fully applied or not at
+all. The call itself is made by database.repository.
+"""
+
+import time
+import uuid
+
+from database.timeline import parse_time
+
+
+# Writable columns per table (id, game_id and created_at are managed here)
+TABLE_COLUMNS = {
+    "characters": {
+        "name", "description", "personality", "lie_policy", "is_killer", "is_alive", "is_victim",
+        "secrets", "relationships", "observations", "metadata", "image_url",
+    },
+    "locations": {
+        "name", "description", "is_accessible", "connected_locations", "atmosphere", "metadata", "image_url",
+    },
+    "clues": {
+        "title", "description", "location_id", "is_revealed", "discovered_by", "discovery_method",
+        "significance_level", "points_to", "metadata", "discovered_at", "image_url",
+    },
+    "timeline_events": {
+        "event_time", "event_description", "location_id", "character_ids", "event_type", "is_public",
+        "witness_ids", "metadata",
+    },
+}
+
+# Short keys of the agent tool output (agents.toolformat) -> column, per table.
+# The update crew often copies them from tool results into its updates.
+COLUMN_ALIASES = {
+    "characters": {
+        "desc": "description", "killer": "is_killer", "alive": "is_alive", "victim": "is_victim",
+        "relations": "relationships",
+    },
+    "locations": {"desc": "description", "accessible": "is_accessible", "exits": "connected_locations", "mood": "atmosphere"},
+    "clues": {
+        "desc": "description", "loc": "location_id", "revealed": "is_revealed", "sig": "significance_level",
+        "method": "discovery_method", "found_by": "discovered_by",
+    },
+    "timeline_events": {
+        "time": "event_time", "desc": "event_description", "loc": "location_id", "chars": "character_ids",
+        "type": "event_type", "public": "is_public", "witnesses": "witness_ids",
+    },
+}
+
+# NOT NULL columns without a default, required on insert
+REQUIRED_ON_INSERT = {
+    "characters": {"name"},
+    "locations": {"name", "description"},
+    "clues": {"title", "description"},
+    "timeline_events": {"event_time", "event_description"},
+}
+
+# Values allowed by the CHECK constraints in schema.sql
+LIE_POLICIES = {"honest", "evasive", "deceptive", "pathological"}
+EVENT_TYPES = {"murder", "discovery", "conversation", "movement", "general"}
+
+# The update agent sometimes uses the verbs from the GameUpdate field description
+ACTION_ALIASES = {"add": "insert", "discover": "update", "change_status": "update"}
+
+
+def _choice(column: str, value, allowed: set) -> str:
+    choice = str(value).strip().lower()
+    if choice not in allowed:
+        raise ValueError(f"{column} must be one of {', '.join(sorted(allowed))}, not '{value}'")
+    return choice
+
+
+def coerce_values(table: str, data: dict) -> dict:
+    """Bring values into the column types and CHECK ranges, or raise ValueError."""
+    data = dict(data)
+    if table == "characters" and "lie_policy" in data:
+        data["lie_policy"] = _choice("lie_policy", data["lie_policy"], LIE_POLICIES)
+    if table == "clues" and "significance_level" in data:
+        value = data["significance_level"]
+        try:
+            level = None if isinstance(value, bool) else int(str(value).strip())
+        except ValueError:
+            level = None
+        if level is None or not 1 <= level <= 5:
+            raise ValueError(f"significance_level must be a whole number from 1 to 5, not '{value}'")
+        data["significance_level"] = level
+    if table == "timeline_events":
+        if "event_time" in data:
+            event_time = parse_time(data["event_time"])
+            if event_time is None:
+                raise ValueError(f"event_time must be an ISO 8601 timestamp, not '{data['event_time']}'")
+            data["event_time"] = event_time.isoformat()
+        if "event_type" in data:
+            data["event_type"] = _choice("event_type", data["event_type"], EVENT_TYPES)
+    return data
+
+
+def validate_update(update: dict):
+    """Normalize one update. Returns (table, action, record_id, data, dropped_columns) or raises ValueError."""
+    table = update.get("table")
+    if table not in TABLE_COLUMNS:
+        raise ValueError(f"unknown table '{table}'")
+
+    action = ACTION_ALIASES.get(update.get("action"), update.get("action"))
+    if action not in ("insert", "update", "delete"):
+        raise ValueError(f"unknown action '{update.get('action')}'")
+
+    aliases = COLUMN_ALIASES[table]
+    data = {aliases.get(k, k): v for k, v in (update.get("data") or {}).items()}
+    record_id = data.pop("id", None)
+    data.pop("game_id", None)
+    dropped = sorted(set(data) - TABLE_COLUMNS[table])
+    data = {k: v for k, v in data.items() if k in TABLE_COLUMNS[table]}
+
+    if action in ("update", "delete"):
+        if not record_id:
+            raise ValueError(f"{action} needs the record id")
+        try:
+            record_id = str(uuid.UUID(str(record_id)))
+        except ValueError:
+            raise ValueError(f"'{record_id}' is not a record id")
+    if action == "update" and not data:
+        raise ValueError(f"no valid columns to update (dropped: {', '.join(dropped) or 'none'})")
+    if action == "insert":
+        missing = REQUIRED_ON_INSERT[table] - set(data)
+        if missing:
+            raise ValueError(f"insert is missing required columns: {', '.join(sorted(missing))}")
+        # Inserted rows get their id here, so outcomes never depend on the
+        # order the database returns them in
+        record_id = str(uuid.uuid4())
+
+    return table, action, record_id, coerce_values(table, data), dropped
+
+
+async def apply_game_updates(game_id: str, updates: list, apply_ops) -> dict:
+    """Validate, group and apply updates in one transaction.
+
+    apply_ops(game_id, ops) runs the stored procedure and returns the affected
+    ids per op. Returns a report with one outcome per input update (applied, not_found,
+    rejected or failed) plus timings; "error" is set when the transaction failed.
+    """
+    started = time.perf_counter()
+    outcomes = [None] * len(updates)
+    groups: dict[tuple, dict] = {}
+
+    # 1. Validate everything before touching the database
+    for index, update in enumerate(updates):
+        try:
+            table, action, record_id, data, dropped = validate_update(update)
+        except ValueError as e:
+            outcomes[index] = {"index": index, "table": update.get("table"), "action": update.get("action"), "status": "rejected", "reason": str(e)}
+            continue
+
+        columns = tuple(sorted(data)) + (("id",) if action == "insert" else ())
+        group = groups.setdefault((table, action, columns), {
+            "table": table, "action": action, "columns": list(columns), "rows": [], "ids": [], "indexes": [],
+        })
+        if action == "delete":
+            group["ids"].append(record_id)
+        else:
+            group["rows"].append({**data, "id": record_id})
+        group["indexes"].append(index)
+        outcomes[index] = {"index": index, "table": table, "action": action, "status": "pending", "id": record_id}
+        if dropped:
+            outcomes[index]["dropped_columns"] = dropped
+
+    validated = time.perf_counter()
+
+    # 2. One round trip, one transaction, one statement per group
+    ops = list(groups.values())
+    error = None
+    if ops:
+        try:
+            results = await apply_ops(game_id, [{k: op[k] for k in ("table", "action", "columns", "rows", "ids")} for op in ops])
+            for op, affected_ids in zip(ops, results):
+                affected_ids = {str(i) for i in affected_ids or []}
+                for index in op["indexes"]:
+                    outcome = outcomes[index]
+                    if outcome["id"] in affected_ids:
+                        outcome["status"] = "applied"
+                    else:
+                        outcome["status"] = "failed" if op["action"] == "insert" else "not_found"
+        except Exception as e:
+            # The transaction rolled back: nothing from this batch was applied
+            error = str(e)
+            for op in ops:
+                for index in op["indexes"]:
+                    outcomes[index]["status"] = "failed"
+                    outcomes[index]["reason"] = str(e)
+
+    finished = time.perf_counter()
+    statuses = [o["status"] for o in outcomes]
+    return {
+        "outcomes": outcomes,
+        "applied": statuses.count("applied"),
+        "rejected": statuses.count("rejected"),
+        "failed": statuses.count("failed"),
+        "not_found": statuses.count("not_found"),
+        "statements": len(ops),
+        "error": error,
+        "timing_ms": {
+            "validate": round((validated - started) * 1000, 2),
+            "apply": round((finished - validated) * 1000, 2),
+            "total": round((finished - started) * 1000, 2),
+        },
+    }
@@ -0,0 +1,195 @@
+"""In-process snapshot cache of each game's world state.
+
+The agent tools read characters, locations and clues many times per turn. A
+snapshot loads those tables, plus the most recent timeline events, once per
+game and serves every lookup from memory until a write invalidates or patches
+it. Timeline searches run in the database (see database.timeline). Loading
+goes through database.repository, which owns the cache.
+"""
+
+import asyncio
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from database.nameindex import NameIndex
+
+
+WORLD_CACHE_MAX_GAMES = int(os.getenv("WORLD_CACHE_MAX_GAMES", "256"))
+WORLD_CACHE_MAX_BYTES = int(os.getenv("WORLD_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+# Safety net for writes made outside this process (other workers, dashboard edits)
+WORLD_CACHE_TTL_SECONDS = float(os.getenv("WORLD_CACHE_TTL_SECONDS", "300"))
+
+WORLD_TABLES = ("characters", "locations", "clues", "timeline_events")
+
+
+class GameSnapshot:
+    """Immutable-by-convention view of one game's world tables."""
+
+    def __init__(self, game_id: str, tables: dict):
+        self.game_id = game_id
+        self.characters = tables.get("characters", [])
+        self.locations = tables.get("locations", [])
+        self.clues = tables.get("clues", [])
+        # Most recent events only, oldest first
+        self.timeline_events = tables.get("timeline_events", [])
+        self.loaded_at = time.monotonic()
+        self.size_bytes = len(json.dumps(tables, default=str))
+        # Shared by every name lookup against this version of the world
+        self.name_index = NameIndex(tables)
+
+    def table(self, name: str) -> list:
+        return getattr(self, name)
+
+    def find(self, kind: str, name: str):
+        """Best fuzzy match for a character, location or clue name ({"name", "score", "row"}), or None."""
+        return self.name_index.best(name, kind)
+
+    def clues_in_location(self, location_name: str) -> list:
+        location = self.find("location", location_name)
+        location_name = location["name"] if location else location_name
+        return [clue for clue in self.clues if (clue["location_id"] or "").lower() == location_name.lower()]
+
+    def replace_table(self, name: str, rows: list) -> "GameSnapshot":
+        """Return a copy of this snapshot with one table swapped out."""
+        tables = {t: self.table(t) for t in WORLD_TABLES}
+        tables[name] = rows
+        return GameSnapshot(self.game_id, tables)
+
+
+class WorldStateCache:
+    """LRU cache of GameSnapshots bounded by game count and approximate memory."""
+
+    def __init__(self, max_games: int, max_bytes: int, ttl_seconds: float):
+        self.max_games = max_games
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self._snapshots: OrderedDict[str, GameSnapshot] = OrderedDict()
+        self._lock = threading.Lock()
+        self._load_locks: dict[str, threading.Lock] = {}
+        # Loads started on the event loop, shared by every coroutine waiting for the game
+        self._async_loads: dict[str, asyncio.Future] = {}
+        self._generations: dict[str, int] = {}
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def get(self, game_id: str, loader) -> GameSnapshot:
+        """Return the game's snapshot, loading it once with loader(game_id) on a miss."""
+        snapshot = self._lookup(game_id)
+        if snapshot:
+            return snapshot
+
+        # One loader per game; concurrent tool calls wait for the same load
+        with self._lock:
+            load_lock = self._load_locks.setdefault(game_id, threading.Lock())
+        with load_lock:
+            snapshot = self._lookup(game_id, count=False)
+            if snapshot:
+                return snapshot
+            with self._lock:
+                self.misses += 1
+                generation = self._generations.get(game_id, 0)
+            snapshot = loader(game_id)
+            self._store(snapshot, generation)
+            return snapshot
+
+    async def aget(self, game_id: str, loader) -> GameSnapshot:
+        """get() for the event loop; loader is a coroutine function."""
+        snapshot = self._lookup(game_id)
+        if snapshot:
+            return snapshot
+        load = self._async_loads.get(game_id)
+        if load is None:
+            load = asyncio.ensure_future(self._aload(game_id, loader))
+            self._async_loads[game_id] = load
+        # A cancelled waiter must not cancel the load the others are waiting for
+        return await asyncio.shield(load)
+
+    async def _aload(self, game_id: str, loader) -> GameSnapshot:
+        try:
+            with self._lock:
+                self.misses += 1
+                generation = self._generations.get(game_id, 0)
+            snapshot = await loader(game_id)
+            self._store(snapshot, generation)
+            return snapshot
+        finally:
+            self._async_loads.pop(game_id, None)
+
+    def invalidate(self, game_id: str):
+        """Drop a game's snapshot so the next lookup reloads it."""
+        with self._lock:
+            self._generations[game_id] = self._generations.get(game_id, 0) + 1
+            snapshot = self._snapshots.pop(game_id, None)
+            if snapshot:
+                self._bytes -= snapshot.size_bytes
+                self.invalidations += 1
+
+    def patch_rows(self, game_id: str, table: str, match: dict, changes: dict):
+        """Apply changes to cached rows whose columns equal every value in match."""
+        with self._lock:
+            snapshot = self._snapshots.get(game_id)
+            if not snapshot:
+                return
+            rows = [
+                {**row, **changes} if all(row.get(k) == v for k, v in match.items()) else row
+                for row in snapshot.table(table)
+            ]
+            patched = snapshot.replace_table(table, rows)
+            patched.loaded_at = snapshot.loaded_at
+            self._snapshots[game_id] = patched
+            self._bytes += patched.size_bytes - snapshot.size_bytes
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "games": len(self._snapshots),
+                "bytes": self._bytes,
+                "max_games": self.max_games,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+            }
+
+    def _lookup(self, game_id: str, count: bool = True):
+        with self._lock:
+            snapshot = self._snapshots.get(game_id)
+            if snapshot and time.monotonic() - snapshot.loaded_at > self.ttl_seconds:
+                self._snapshots.pop(game_id)
+                self._bytes -= snapshot.size_bytes
+                snapshot = None
+            if snapshot:
+                self._snapshots.move_to_end(game_id)
+                if count:
+                    self.hits += 1
+            return snapshot
+
+    def _store(self, snapshot: GameSnapshot, generation: int):
+        with self._lock:
+            self._load_locks.pop(snapshot.game_id, None)
+            if self._generations.get(snapshot.game_id, 0) != generation:
+                # Invalidated while loading; serve this caller but don't cache stale data
+                return
+            previous = self._snapshots.pop(snapshot.game_id, None)
+            if previous:
+                self._bytes -= previous.size_bytes
+            self._snapshots[snapshot.game_id] = snapshot
+            self._bytes += snapshot.size_bytes
+            while len(self._snapshots) > 1 and (
+                len(self._snapshots) > self.max_games or self._bytes > self.max_bytes
+            ):
+                _, evicted = self._snapshots.popitem(last=False)
+                self._bytes -= evicted.size_bytes
+                self.evictions += 1
+
+
+world_cache = WorldStateCache(WORLD_CACHE_MAX_GAMES, WORLD_CACHE_MAX_BYTES, WORLD_CACHE_TTL_SECONDS)
@@ -1,17 +1,56 @@
+from startup import startup_timer  # first, so the timer starts before the app's imports
 from fastapi import FastAPI, Request
+from contextlib import asynccontextmanager
 from fastapi.responses import JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 from dotenv import load_dotenv
 import os
+import asyncio
 
 # Import routers
 from routes.games import router as games_router
 from routes.agents import router as agents_router
+from routes.debug import DEBUG_ROUTES_ENABLED, router as debug_router
+from database.assets import reconcile_manifest
+from database.storage import close_http_clients
+from database.repository import repository
+from database.jobqueue import job_queue
+from agents.registry import agent_registry
 
 # Load environment variables
 load_dotenv()
 
-app = FastAPI(title="Murder Mystery AI Backend", version="1.0.0")
+# off: agents are built on first use; background: build them after startup; startup: before serving
+AGENT_WARMUP = os.getenv("AGENT_WARMUP", "off").lower()
+
+startup_timer.mark("imports")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Pooled async database client, shared by routes, tools and background jobs
+    await repository.connect()
+    # Rebuild the image manifest from storage without delaying startup
+    if os.getenv("ASSET_RECONCILE_ON_STARTUP", "false").lower() == "true":
+        app.state.reconcile_task = asyncio.create_task(asyncio.to_thread(reconcile_manifest))
+    await job_queue.start()
+    if AGENT_WARMUP == "startup":
+        await warm_agents()
+    elif AGENT_WARMUP == "background":
+        app.state.warmup_task = asyncio.create_task(warm_agents())
+    startup_timer.mark("ready")
+    yield
+    await job_queue.stop()
+    await repository.close()
+    await close_http_clients()
+
+
+async def warm_agents():
+    """Import crewai and build every agent and tool off the event loop."""
+    await asyncio.to_thread(agent_registry.warm)
+    startup_timer.mark("warmup")
+
+
+app = FastAPI(title="Murder Mystery AI Backend", version="1.0.0", lifespan=lifespan)
 
 # Configure CORS for Next.js frontend
 app.add_middleware(
@@ -29,6 +68,9 @@ app.add_middleware(
 # Include routers
 app.include_router(games_router, prefix="/api/games", tags=["games"])
 app.include_router(agents_router, prefix="/api/agents", tags=["agents"])
+# Debug routes expose queue internals and turn traces; off unless enabled
+if DEBUG_ROUTES_ENABLED:
+    app.include_router(debug_router, prefix="/debug", tags=["debug"])
 
 @app.get("/")
 async def root():
@@ -0,0 +1,157 @@
+"""Operational debug routes (load, queues, caches).
+
+Only mounted when DEBUG_ROUTES_ENABLED; with DEBUG_ADMIN_TOKEN set every
+route also requires it in the X-Debug-Token header.
+"""
+
+import asyncio
+import os
+import secrets
+from datetime import datetime, timedelta, timezone
+from fastapi import APIRouter, Depends, Header, HTTPException
+from fastapi.responses import PlainTextResponse
+from agents.executor import crew_executor
+from agents.fastpath import fast_path_stats
+from database.worldcache import world_cache
+from database.assets import asset_manifest, reconcile_manifest
+from database.imagecache import image_cache
+from database.jobqueue import job_queue
+from database.repository import repository
+from routes.games import update_actor
+from agents.updategate import update_gate
+from agents.toolformat import tool_output_stats
+from agents.metrics import interaction_stages, latency_stats, stage_percentiles
+from agents.tracing import trace_store, to_chrome, to_flame_text
+from agents.registry import agent_registry
+from startup import startup_timer, import_profile
+
+DEBUG_ROUTES_ENABLED = os.getenv("DEBUG_ROUTES_ENABLED", "false").lower() == "true"
+DEBUG_ADMIN_TOKEN = os.getenv("DEBUG_ADMIN_TOKEN", "")
+# Newest interaction rows aggregated by /debug/latency
+LATENCY_QUERY_MAX_ROWS = int(os.getenv("LATENCY_QUERY_MAX_ROWS", "5000"))
+
+
+async def require_debug_token(x_debug_token: str = Header(default="")):
+    if DEBUG_ADMIN_TOKEN and not secrets.compare_digest(x_debug_token, DEBUG_ADMIN_TOKEN):
+        raise HTTPException(403, "Invalid debug token")
+
+
+router = APIRouter(dependencies=[Depends(require_debug_token)])
+
+
+@router.get("/executor")
+async def executor_stats():
+    """Queue depth and in-flight count of the crew executor."""
+    return crew_executor.stats()
+
+
+@router.get("/world-cache")
+async def world_cache_stats():
+    """Size, hit/miss counters and evictions of the world snapshot cache."""
+    return world_cache.stats()
+
+
+@router.get("/fast-path")
+async def fast_path_metrics():
+    """Fraction of player queries answered by the deterministic fast path."""
+    return fast_path_stats.stats()
+
+
+@router.get("/assets")
+async def asset_manifest_stats():
+    """Size and hit/miss counters of the generated image manifest."""
+    return asset_manifest.stats()
+
+
+@router.get("/image-cache")
+async def image_cache_stats():
+    """Hit rate and estimated dollars saved by the cross-game image cache."""
+    return image_cache.stats()
+
+
+@router.get("/jobs")
+async def job_queue_stats():
+    """Depth, in-flight count and wait/run latency of the background job queue."""
+    return await asyncio.to_thread(job_queue.stats)
+
+
+@router.get("/update-actor")
+async def update_actor_stats():
+    """Turns per update analysis and pending turns of the per-game update actors."""
+    return update_actor.stats()
+
+
+@router.get("/update-gate")
+async def update_gate_stats():
+    """Share of turns skipped by the update gate, with the recent decisions and their signals."""
+    return update_gate.stats()
+
+
+@router.get("/tool-output")
+async def tool_output_metrics():
+    """Average and maximum tokens of agent tool output, and how often it was truncated."""
+    return tool_output_stats.stats()
+
+
+@router.get("/latency")
+async def latency_percentiles(minutes: float = 15, source: str = "interactions"):
+    """p50/p95/p99 per query pipeline stage over the last `minutes`.
+
+    source=interactions reads the stored interaction rows of every worker (the
+    newest LATENCY_QUERY_MAX_ROWS); source=process only this worker's memory.
+    """
+    if source == "process":
+        return {**latency_stats.stats(minutes * 60), "source": "process"}
+    if source != "interactions":
+        raise HTTPException(400, "source must be interactions or process")
+    since = (datetime.now(timezone.utc) - timedelta(minutes=minutes)).isoformat()
+    rows = await repository.interaction_timings(since, LATENCY_QUERY_MAX_ROWS)
+    stats = stage_percentiles([interaction_stages(row) for row in rows], minutes * 60)
+    return {**stats, "source": "interactions", "capped": len(rows) >= LATENCY_QUERY_MAX_ROWS}
+
+
+@router.get("/traces")
+async def recent_traces():
+    """Interaction ids, durations and span counts of the most recent traced turns."""
+    return trace_store.recent()
+
+
+@router.get("/traces/{interaction_id}")
+async def get_trace(interaction_id: str, format: str = "json"):
+    """Span tree of one turn: json, chrome (trace events for chrome://tracing or
+    Perfetto) or flame (text flame graph)."""
+    root = trace_store.get(interaction_id)
+    if not root:
+        raise HTTPException(404, "Trace not found (only recent turns are kept)")
+    if format == "chrome":
+        return {"traceEvents": to_chrome(root), "displayTimeUnit": "ms"}
+    if format == "flame":
+        return PlainTextResponse(to_flame_text(root))
+    return root
+
+
+@router.get("/startup")
+async def startup_report():
+    """Time from process start to imports done, ready and warm-up, and which agents are built."""
+    return {**startup_timer.report(), "agent_registry": agent_registry.stats()}
+
+
+@router.get("/startup/imports")
+async def startup_imports(top: int = 30):
+    """-X importtime breakdown of importing main in a fresh interpreter (takes seconds)."""
+    try:
+        return await import_profile(min(max(top, 1), 200))
+    except RuntimeError as e:
+        raise HTTPException(500, str(e))
+
+
+@router.post("/warmup")
+async def warmup_agents():
+    """Import crewai and build every agent and tool now."""
+    return {"warmed_ms": round(await asyncio.to_thread(agent_registry.warm), 1), **agent_registry.stats()}
+
+
+@router.post("/assets/reconcile")
+async def reconcile_assets(game_id: str = None):
+    """Rebuild the image manifest from storage for one game or all games."""
+    return await asyncio.to_thread(reconcile_manifest, game_id)
@@ -1,15 +1,22 @@
 """Game management routes."""
 
-from fastapi import APIRouter, HTTPException
-from database.client import get_supabase_client
-from agents.creategame import create_murder_mystery_game
+from fastapi import APIRouter, HTTPException, Query
+from fastapi.responses import StreamingResponse
+from database.repository import repository
+from database.jobqueue import job_queue
 from datetime import datetime
 import json
-from agents.gamemaster import handle_query
-from agents.updatecrew import analyze_for_updates
+from agents.context import GAME_MASTER_STRUCTURED
+from agents.registry import agent_registry
+from agents.updateactor import UpdateActor, UPDATE_DEBOUNCE_SECONDS, UPDATE_MAX_BATCH
+from agents.updategate import update_gate
 import asyncio
-from agents.summarizer import summarize_game_state
-from agents.imagegen import generate_character_images, generate_location_images, generate_clue_images
+import os
+from agents.executor import run_crew
+from agents.fastpath import try_fast_path
+from agents.metrics import TurnMetrics, current_metrics, latency_stats, span
+from agents.tracing import trace_store
+from agents.streaming import GameMasterStream, current_stream, format_sse
 
 router = APIRouter()
 
@@ -26,10 +33,7 @@ async def create_game(game_request: dict, user_id: str):
             raise HTTPException(400, "Missing required input fields")
         
         # Validate user exists (security check)
-        supabase = get_supabase_client()
-        
-        user_response = supabase.auth.admin.get_user_by_id(user_id)
-        if not user_response.user:
+        if not await repository.user_exists(user_id):
                 raise HTTPException(400, "Invalid user ID")
       
         
@@ -40,112 +44,42 @@ async def create_game(game_request: dict, user_id: str):
         opening_summary = game_request.get("opening_summary")
         
         # Generate game using agent
-        agent_result = create_murder_mystery_game(title, description, character_count)
+        create_murder_mystery_game = await agent_registry.load("create_murder_mystery_game")
+        agent_result = await run_crew(create_murder_mystery_game, title, description, character_count)
         game_data = json.loads(agent_result.raw)
 
         
-        supabase.table("games").update({"is_active": False}).eq("user_id", user_id).execute()
+        # 1. Validate the world before touching the database (single killer)
+        characters = game_data["characters"]
+        locations = game_data["locations"]
+        clues = game_data["clues"]
+        timeline_events = game_data["timeline_events"]
+
+        killers = [char for char in characters if char.get("is_killer", False)]
         
-        # 1. Create the game record first
+        if len(killers) != 1:
+            raise HTTPException(400, f"Exactly one character must be the killer, found {len(killers)}")
+        
+        # 2. Write the game record and the whole world in one transaction
         game_record = {
             "user_id": user_id,
             "title": title,
             "status": "CAST_READY",
-            "created_at": datetime.now().isoformat(),
-            "updated_at": datetime.now().isoformat(),
             "opening_summary": game_data.get("opening_summary", ""),
             "is_active": True,
             "in_progress": True,
         }
         
-        game_response = supabase.table("games").insert(game_record).execute()
-        if not game_response.data:
-            raise HTTPException(500, "Failed to create game record")
-        game_id = game_response.data[0]["id"]
-        
-        # 2. Insert characters (validate single killer)
-        characters = game_data["characters"]
-
-        
-        killers = [char for char in characters if char.get("is_killer", False)]
-        
-        if len(killers) != 1:
-            raise HTTPException(400, f"Exactly one character must be the killer, found {len(killers)}")
-        
-        for character in characters:
-            char_record = {
-                "game_id": game_id,
-                "name": character.get("name"),
-                "description": character.get("description"),
-                "personality": character.get("personality", {}),
-                "lie_policy": character.get("lie_policy", "honest"),
-                "is_killer": character.get("is_killer", False),
-                "is_alive": True if character.get("is_victim", False) else False,
-                "is_victim": character.get("is_victim", False),
-                "secrets": character.get("secrets", []),
-                "relationships": character.get("relationships", {}),
-                "observations": character.get("observations", {}),
-                "metadata": character.get("metadata", {})
-            }
-            supabase.table("characters").insert(char_record).execute()
-        
-        # 3. Insert locations
-        
-        locations = game_data["locations"]
-       
-        for location in locations:
-            loc_record = {
-                "game_id": game_id,
-                "name": location.get("name"),
-                "description": location.get("description"),
-                "is_accessible": location.get("is_accessible", True),
-                "connected_locations": location.get("connected_locations", []),
-                "atmosphere": location.get("atmosphere", "neutral"),
-                "metadata": location.get("metadata", {})
-            }
+        game_id = await repository.create_game_world(game_record, game_data)
 
-            
-            supabase.table("locations").insert(loc_record).execute()
-        
-        # 4. Insert clues
-        clues = game_data["clues"]
-        for clue in clues:
-            clue_record = {
-                "game_id": game_id,
-                "title": clue.get("title"),
-                "description": clue.get("description"),
-                "location_id": clue.get("location_id"),
-                "is_revealed": clue.get("is_revealed", False),
-                "discovered_by": clue.get("discovered_by"),
-                "discovery_method": clue.get("discovery_method", "investigation"),
-                "significance_level": clue.get("significance_level", 1),
-                "points_to": clue.get("points_to", []),
-                "metadata": clue.get("metadata", {})
-            }
-            supabase.table("clues").insert(clue_record).execute()
-        
-        # 5. Insert timeline events
-        timeline_events = game_data["timeline_events"]
-        for event in timeline_events:
-            event_record = {
-                "game_id": game_id,
-                "event_time": event.get("event_time"),
-                "event_description": event.get("event_description"),
-                "location_id": event.get("location_id"),
-                "character_ids": event.get("character_ids", []),
-                "event_type": event.get("event_type", "general"),
-                "is_public": event.get("is_public", True),
-                "witness_ids": event.get("witness_ids", []),
-                "metadata": event.get("metadata", {})
-            }
-            supabase.table("timeline_events").insert(event_record).execute()
         
-
-        
-        # 🎨 START BACKGROUND IMAGE GENERATION (DON'T AWAIT)
-        asyncio.create_task(bg_generate_images(game_id, game_data.get("characters", []), "characters"))
-        asyncio.create_task(bg_generate_images(game_id, game_data.get("locations", []), "locations"))
-        asyncio.create_task(bg_generate_images(game_id, game_data.get("clues", []), "clues"))
+        # 🎨 QUEUE BACKGROUND IMAGE GENERATION (DON'T AWAIT)
+        for item_type in ("characters", "locations", "clues"):
+            await job_queue.enqueue(
+                "generate_images",
+                {"game_id": game_id, "items": game_data.get(item_type, []), "item_type": item_type},
+                key=f"images:{game_id}:{item_type}",
+            )
 
         
         return {
@@ -174,44 +108,178 @@ async def create_game(game_request: dict, user_id: str):
 @router.post("/query/{game_id}")
 async def query_game(game_id: str, query: dict):
     """Handle a player query in a game."""
+    # Crew threads copy this context, so LLM and tool events land in this turn's metrics
+    metrics_token = current_metrics.set(TurnMetrics(game_id))
     try:
         query_text = query.get("query") 
         print(game_id, query_text)
-        
-        # Fetch recent conversation history for context
-        supabase = get_supabase_client()
-        history_response = supabase.table("interactions").select("user_query, agent_response, created_at").eq("game_id", game_id).order("created_at", desc=True).limit(5).execute()
-        
-        conversation_history = history_response.data if history_response.data else []
-
-        converstation_text=""
-        for interaction in conversation_history:
-            converstation_text += f"Player: {interaction['user_query']}\nAI: {interaction['agent_response']}\n"
 
-        summary = summarize_game_state(conversation_history)
+        # Pure lookups are answered straight from the world state
+        with span("fast_path"):
+            fast_answer = await try_fast_path(game_id, query_text)
+        if fast_answer:
+            await finish_turn(game_id, query_text, fast_answer, analyze=False)
+            return {"response": fast_answer}
         
-        # Get AI response with conversation context
-        result = handle_query(game_id, query_text, summary)
-        
-
+        # Read the precomputed summary (folded in the background after each turn)
+        with span("summary"):
+            summary = await get_game_summary(game_id)
         
-        # Log this interaction
-        supabase.table("interactions").insert({
-            "game_id": game_id,
-            "user_query": query_text,
-            "agent_response": result,
-            "created_at": datetime.now().isoformat()
-        }).execute()
+        # Get AI response with conversation context
+        with span("crew"):
+            result, references = await run_game_master(game_id, query_text, summary)
         
-        # Analyze for updates and store game update in background DONT AWAIT THIS
-        asyncio.create_task(bg_process(game_id, query_text, result)) 
-        if "SOLVED" in result:
-            supabase.table("games").update({"status": "DONE"}).eq("id", game_id).execute()
-
+        await finish_turn(game_id, query_text, result, references=references)
 
         return {"response": result}
     except Exception as e:
         raise HTTPException(500, f"Failed to handle query: {str(e)}")
+    finally:
+        current_metrics.reset(metrics_token)
+
+
+@router.post("/query/{game_id}/stream")
+async def query_game_stream(game_id: str, query: dict):
+    """Handle a player query, streaming progress and the answer as server-sent events.
+
+    Events: progress {message}, token {text}, reset {} (discard streamed tokens,
+    the answer is being retried), done {response} with the authoritative text,
+    error {detail}.
+    """
+    query_text = query.get("query")
+    if not query_text:
+        raise HTTPException(400, "Missing query")
+
+    metrics_token = current_metrics.set(TurnMetrics(game_id))
+    try:
+        return await start_streamed_turn(game_id, query_text)
+    finally:
+        current_metrics.reset(metrics_token)
+
+
+async def start_streamed_turn(game_id: str, query_text: str) -> StreamingResponse:
+    """Start the turn behind query_game_stream and return its event stream."""
+    with span("fast_path"):
+        fast_answer = await try_fast_path(game_id, query_text)
+    if fast_answer:
+        await finish_turn(game_id, query_text, fast_answer, analyze=False)
+
+        async def fast_events():
+            yield format_sse("done", {"response": fast_answer})
+
+        return StreamingResponse(fast_events(), media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
+
+    with span("summary"):
+        summary = await get_game_summary(game_id)
+
+    # A structured final answer is JSON, so only progress events are relayed
+    stream = GameMasterStream(game_id, asyncio.get_running_loop(), relay_tokens=not GAME_MASTER_STRUCTURED)
+
+    async def run_turn():
+        try:
+            with span("crew"):
+                result, references = await run_game_master(game_id, query_text, summary)
+            # Runs even if the client disconnected mid-stream
+            await finish_turn(game_id, query_text, result, references=references)
+            return result
+        finally:
+            stream.close()
+
+    # The crew task copies this context, so event handlers find this stream
+    token = current_stream.set(stream)
+    turn = asyncio.create_task(run_turn())
+    current_stream.reset(token)
+
+    async def events():
+        yield format_sse("progress", {"message": "reading the case file"})
+        while True:
+            event = await stream.queue.get()
+            if event is None:
+                break
+            yield format_sse(*event)
+        try:
+            yield format_sse("done", {"response": await turn})
+        except Exception as e:
+            yield format_sse("error", {"detail": f"Failed to handle query: {str(e)}"})
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+async def run_game_master(game_id: str, query_text: str, summary: str):
+    """Run the game master crew. Returns (narration, entity references or None)."""
+    if not GAME_MASTER_STRUCTURED:
+        return await run_crew(await agent_registry.load("handle_query"), game_id, query_text, summary), None
+    output = await run_crew(await agent_registry.load("handle_query_structured"), game_id, query_text, summary)
+    narration = output.narration
+    if output.solved and "SOLVED" not in narration:
+        narration += "\n\nSOLVED"
+    return narration, output.model_dump(exclude={"narration"})
+
+
+@router.get("/timeline/{game_id}")
+async def get_timeline(
+    game_id: str,
+    query: str = None,
+    start_time: str = None,
+    end_time: str = None,
+    characters: list[str] = Query(None),
+    locations: list[str] = Query(None),
+    event_types: list[str] = Query(None),
+    limit: int = 20,
+    cursor: str = None,
+):
+    """Filtered, relevance-ranked page of a game's timeline events."""
+    try:
+        return await repository.timeline(
+            game_id, query=query, start_time=start_time, end_time=end_time, characters=characters,
+            locations=locations, event_types=event_types, limit=limit, cursor=cursor,
+        )
+    except ValueError as e:
+        raise HTTPException(400, str(e))
+
+
+async def finish_turn(game_id: str, query_text: str, result: str, analyze: bool = True, references: dict = None):
+    """Log the interaction and kick off the per-turn background work.
+
+    Fast-path lookups pass analyze=False: they cannot change the world and add
+    nothing worth folding into the summary. Structured game master turns pass
+    their entity references, which are diffed instead of analyzed.
+    """
+    metrics = current_metrics.get()
+
+    # Log this interaction
+    record = {
+        "game_id": game_id,
+        "user_query": query_text,
+        "agent_response": result,
+        "created_at": datetime.now().isoformat()
+    }
+    if metrics:
+        record["response_time_ms"] = metrics.elapsed_ms()
+        record["tools_used"] = metrics.tools
+        record["agent_payload"] = metrics.payload()
+    with span("insert"):
+        interaction_id = await repository.insert_interaction(record)
+    if metrics:
+        latency_stats.record(metrics)
+        trace_store.save(interaction_id, metrics.trace)
+    
+    if not analyze:
+        return
+
+    # Analyze for updates and fold the summary in background DONT AWAIT THIS
+    payload = {"game_id": game_id, "query_text": query_text, "result": result}
+    if references is not None:
+        await job_queue.enqueue("apply_references", {"game_id": game_id, "references": references}, key=f"updates:{interaction_id}")
+    else:
+        await job_queue.enqueue("process_updates", payload, key=f"updates:{interaction_id}")
+    await job_queue.enqueue("update_summary", payload, key=f"summary:{interaction_id}")
+    if "SOLVED" in result:
+        await repository.update_game(game_id, {"status": "DONE"})
 
 
 #------------------------------------------------------------------------------------------------
@@ -220,20 +288,16 @@ async def bg_generate_images(game_id: str, items: list, item_type: str):
     """Background process for generating images for characters, locations, or clues."""
     try:
         print(f"🎨 Starting background {item_type} image generation for game {game_id}")
-        supabase = get_supabase_client()
-        game_title = supabase.table("games").select("title").eq("id", game_id).execute()
+        game = await repository.get_game(game_id, "title")
+        game_title = game.get("title", "")
         
         # Generate images based on type
-        urls = {}
-        if item_type == "characters":
-            urls = await generate_character_images(items, game_id, game_title)
-        elif item_type == "locations":
-            urls = await generate_location_images(items, game_id, game_title)
-        elif item_type == "clues":
-            urls = await generate_clue_images(items, game_id, game_title)
-        else:
+        if item_type not in ("characters", "locations", "clues"):
             print(f"❌ Unknown item type: {item_type}")
             return False
+        # generate_character_images, generate_location_images or generate_clue_images
+        generate = await agent_registry.load(f"generate_{item_type[:-1]}_images")
+        urls = await generate(items, game_id, game_title)
 
         
         # Update database with generated image URLs
@@ -249,27 +313,14 @@ async def bg_generate_images(game_id: str, items: list, item_type: str):
         
     except Exception as e:
         print(f"❌ ERROR in bg_generate_{item_type}_images: {str(e)}")
-        return False
+        # Let the job queue retry; images already uploaded are found in the manifest
+        raise
 
 async def update_item_image(game_id: str, item_name: str, item_type: str, image_url: str):
     """Update character record with generated image URL."""
     try:
-        supabase = get_supabase_client()
-        if item_type == "characters":
-            table = "characters"
-        elif item_type == "locations":
-            table = "locations"
-        elif item_type == "clues":
-            table = "clues"
-
-        if(item_type != "clues"):
-            result = supabase.table(table).update(
-            {"image_url": image_url}
-        ).eq("game_id", game_id).eq("name", item_name).execute()
-        else:
-            result = supabase.table(table).update(
-                {"image_url": image_url}
-            ).eq("game_id", game_id).eq("title", item_name).execute()
+        # item_type is the table name: characters, locations or clues
+        await repository.set_image_url(game_id, item_type, item_name, image_url)
         
     except Exception as e:
         print(f"❌ Error in update_character_image: {str(e)}")
@@ -279,57 +330,120 @@ async def update_item_image(game_id: str, item_name: str, item_type: str, image_
 
 
 
+reference_locks: dict[str, asyncio.Lock] = {}
+
+
 async def bg_process(game_id: str, query_text: str, result: str):
-    """Background process for analyzing for updates and storing game update."""
-    update_result = await analyze_for_updates(game_id, query_text, result)
-    print("Gotten Analysis")
-    await store_game_update(game_id, update_result)
+    """Background process for analyzing for updates and storing game update.
+
+    Turns that pass the update gate go through the game's update actor, which
+    batches bursts into one analysis and applies batches one at a time.
+    """
+    if not await asyncio.to_thread(update_gate.should_analyze, game_id, query_text, result):
+        return
+    await update_actor.submit(game_id, query_text, result)
+
 
 
+async def bg_apply_references(game_id: str, references: dict):
+    """Background process turning structured game master references into updates."""
+    # Serialized per game so two turns cannot both insert the same timeline event
+    async with reference_locks.setdefault(game_id, asyncio.Lock()):
+        snapshot = await repository.load_world(game_id)
+        diff_references = await agent_registry.load("diff_references")
+        analysis = diff_references(snapshot, references)
+        if not analysis.has_changes:
+            return
+        print(f"🔍 Structured turn changes: {analysis.summary}")
+        await store_game_update(game_id, analysis.model_dump_json())
+
 
 async def store_game_update(game_id: str, update_result: str):
-    """Store game update in database."""
+    """Apply a GameUpdateAnalysis in one transaction and return the outcome report.
+
+    Raises when the transaction fails, so the job running it is retried.
+    """
     print(f"🔍 DEBUG: store_game_update STARTED with game_id: {game_id}")
-    
+
     try:
-        
-        supabase = get_supabase_client()
-        print(update_result)
-        updates = json.loads(update_result)
-       
+        updates = json.loads(update_result).get("updates", [])
+        report = await repository.apply_updates(game_id, updates)
 
-        for i, update in enumerate(updates.get("updates", [])):
-            print(f"🔍 DEBUG: Processing update {i+1} - {update['action']} on {update['table']}")
-            
-            table, action, data = update["table"], update["action"], update["data"]
-            
-            # Store the ID before potentially removing it
+        for outcome in report["outcomes"]:
+            if outcome["status"] != "applied":
+                print(f"🔍 DEBUG: Update {outcome['index']+1} {outcome['status']} - {outcome['action']} on {outcome['table']}: {outcome.get('reason', outcome.get('id'))}")
+        if report["error"]:
+            raise RuntimeError(f"update transaction failed: {report['error']}")
+        print(f"🔍 DEBUG: store_game_update FINISHED: {report['applied']}/{len(updates)} applied in {report['statements']} statements ({report['timing_ms']['total']}ms)")
+        return report
 
-            if action == "insert":
-                    if "id" in data:
-                        del data["id"]
-                    data["game_id"] = game_id
-                    result = supabase.table(table).insert(data).execute()
-                    
+    except Exception as e:
+        print(f"❌ ERROR in store_game_update: {str(e)}")
+        import traceback
+        print(f"❌ TRACEBACK: {traceback.format_exc()}")
+        raise
 
-            else:
-                if "id" in data:
-                    record_id = data["id"]
-                    del data["id"]
 
-                    if action == "update":
-                        result = supabase.table(table).update(data).eq("game_id", game_id).eq("id", record_id).execute()
+#------------------------------------------------------------------------------------------------
+
+# Turns folded into the rolling summary before it is rolled up into the story summary
+SUMMARY_CHAPTER_TURNS = int(os.getenv("SUMMARY_CHAPTER_TURNS", "8"))
+summary_locks: dict[str, asyncio.Lock] = {}
+
 
-                    
-                    elif action == "delete":
-                        result = supabase.table(table).delete().eq("game_id", game_id).eq("id", record_id).execute()
+async def get_game_summary(game_id: str) -> str:
+    """Build the conversation context for a turn from the stored summaries."""
+    game = await repository.get_game(game_id, "story_summary, rolling_summary")
+
+    story_summary = game.get("story_summary") or ""
+    rolling_summary = game.get("rolling_summary") or ""
+    if not story_summary and not rolling_summary:
+        # Games without a stored summary yet: fall back to the raw recent turns
+        converstation_text = ""
+        for interaction in await repository.recent_interactions(game_id, limit=5):
+            converstation_text += f"Player: {interaction['user_query']}\nAI: {interaction['agent_response']}\n"
+        return converstation_text
 
-                else:
-                    print(f"🔍 DEBUG: No ID found for update {i+1}")
+    return f"Story so far: {story_summary}\nRecent events: {rolling_summary}"
 
-        print("🔍 DEBUG: store_game_update FINISHED successfully")
 
+async def bg_update_summary(game_id: str, query_text: str, result: str):
+    """Background process folding the newest interaction into the stored summaries."""
+    lock = summary_locks.setdefault(game_id, asyncio.Lock())
+    try:
+        async with lock:
+            game = await repository.get_game(game_id, "story_summary, rolling_summary, summary_turns")
+
+            story_summary = game.get("story_summary") or ""
+            rolling_summary = await run_crew(await agent_registry.load("fold_interaction"), game.get("rolling_summary") or "", query_text, result)
+            summary_turns = (game.get("summary_turns") or 0) + 1
+
+            # Close the chapter so the context handed to the game master stays bounded
+            if summary_turns >= SUMMARY_CHAPTER_TURNS:
+                story_summary = await run_crew(await agent_registry.load("fold_chapter"), story_summary, rolling_summary)
+                rolling_summary = ""
+                summary_turns = 0
+
+            await repository.update_game(game_id, {
+                "story_summary": story_summary,
+                "rolling_summary": rolling_summary,
+                "summary_turns": summary_turns,
+            })
+            print(f"✅ Updated summary for game {game_id}")
     except Exception as e:
-        print(f"❌ ERROR in store_game_update: {str(e)}")
-        import traceback
-        print(f"❌ TRACEBACK: {traceback.format_exc()}")
+        print(f"❌ ERROR in bg_update_summary: {str(e)}")
+        raise
+
+
+async def analyze_turns(game_id: str, turns: list):
+    """Run the update analysis crew (imported on first use) over a batch of turns."""
+    return await (await agent_registry.load("analyze_turns"))(game_id, turns)
+
+
+update_actor = UpdateActor(analyze_turns, store_game_update, UPDATE_DEBOUNCE_SECONDS, UPDATE_MAX_BATCH)
+
+# Background work runs through the durable job queue (started in main.py's lifespan)
+job_queue.register("generate_images", bg_generate_images, concurrency=3)
+job_queue.register("process_updates", bg_process, concurrency=16)
+job_queue.register("update_summary", bg_update_summary, concurrency=4)
+job_queue.register("apply_references", bg_apply_references, concurrency=4)
@@ -0,0 +1,26 @@
+from agents.context import character_lines
+from database.persistence import build_character_record
+from database.worldcache import GameSnapshot
+
+
+def test_only_the_victim_is_stored_dead():
+    victim = build_character_record({"name": "Lord Edmund Ashford", "is_victim": True})
+    suspect = build_character_record({"name": "Thomas Reed", "is_killer": True})
+    explicit = build_character_record({"name": "Clara Finch", "is_alive": False})
+
+    assert victim["is_alive"] is False
+    assert suspect["is_alive"] is True
+    assert explicit["is_alive"] is False
+
+
+def test_roster_has_lie_policies_but_no_killer_or_secrets():
+    characters = [
+        {**build_character_record({"name": "Lord Edmund Ashford", "is_victim": True}), "id": "c1"},
+        {**build_character_record({"name": "Thomas Reed", "is_killer": True, "lie_policy": "deceptive",
+                                   "secrets": ["Forged the will"]}), "id": "c2"},
+    ]
+    lines = character_lines(GameSnapshot("game-1", {"characters": characters}))
+
+    assert lines[0].startswith("- Lord Edmund Ashford [victim] | lie_policy: honest (tells the truth)")
+    assert lines[1].startswith("- Thomas Reed | lie_policy: deceptive (misleads when pressed)")
+    assert not any("killer" in line or "Forged" in line or "dead" in line for line in lines)
@@ -0,0 +1,26 @@
+import json
+
+from agents.toolformat import CHARACTER_COLUMNS, format_record, match_note
+from database.nameindex import NameIndex
+
+CHARACTERS = [{"id": "c1", "name": "Thomas Reed"}, {"id": "c2", "name": "Lady Margaret Ashford"}]
+
+
+def test_best_returns_the_matched_name_and_score():
+    index = NameIndex({"characters": CHARACTERS})
+
+    assert index.best("thomas reed", "character")["score"] == 1.0
+    match = index.best("James Reed", "character")
+    assert (match["name"], match["row"]["id"]) == ("Thomas Reed", "c1")
+    assert match["score"] < 1.0
+
+
+def test_lookups_say_when_they_returned_another_name():
+    index = NameIndex({"characters": CHARACTERS})
+    exact = index.best("Thomas Reed", "character")
+    fuzzy = index.best("James Reed", "character")
+
+    assert "match" not in json.loads(format_record("t", exact["row"], CHARACTER_COLUMNS, extra=match_note(exact, "Thomas Reed")))
+    record = json.loads(format_record("t", fuzzy["row"], CHARACTER_COLUMNS, extra=match_note(fuzzy, "James Reed")))
+    assert record["name"] == "Thomas Reed"
+    assert "not an exact match" in record["match"] and "James Reed" in record["match"]
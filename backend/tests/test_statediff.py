@@ -0,0 +1,111 @@
+from classes import GameMasterOutput
+from database.worldcache import GameSnapshot
+from agents.statediff import diff_references
+
+
+def make_snapshot(timeline_events=None):
+    return GameSnapshot("game-1", {
+        "characters": [
+            {"id": "c1", "name": "Lady Margaret Ashford"},
+            {"id": "c2", "name": "Thomas Reed"},
+        ],
+        "locations": [
+            {"id": "l1", "name": "Library", "is_accessible": True},
+            {"id": "l2", "name": "Study", "is_accessible": False},
+        ],
+        "clues": [
+            {"id": "k1", "title": "Bloody Letter Opener", "location_id": "Study", "is_revealed": False},
+            {"id": "k2", "title": "Torn Will", "location_id": "Library", "is_revealed": True},
+            {"id": "k3", "title": "Broken Pocket Watch", "location_id": "Library", "is_revealed": False},
+        ],
+        "timeline_events": timeline_events or [
+            {"id": "t1", "event_time": "1923-10-12T23:00:00+00:00", "event_description": "The body was found"},
+        ],
+    })
+
+
+def diff(output: GameMasterOutput, snapshot=None):
+    return diff_references(snapshot or make_snapshot(), output.model_dump(exclude={"narration"}))
+
+
+def updates_for(analysis, table: str) -> list:
+    return [u for u in analysis.updates if u.table == table]
+
+
+def test_reveals_only_unrevealed_clues_once():
+    analysis = diff(GameMasterOutput(
+        narration="...",
+        clues_revealed=["bloody letter opener", "Bloody Letter Opener", "Torn Will", "Missing Clue"],
+    ))
+
+    clues = updates_for(analysis, "clues")
+    assert [(u.action, u.data["id"], u.data["is_revealed"]) for u in clues] == [("update", "k1", True)]
+    assert clues[0].data["discovered_by"] == "player"
+
+
+def test_near_miss_references_change_nothing():
+    analysis = diff(GameMasterOutput(
+        narration="...",
+        clues_revealed=["Bloody Knife", "Pocket Knife", "Torn Letter"],
+        characters_questioned=["James Reed"],
+    ))
+
+    assert analysis.updates == []
+    assert not analysis.has_changes
+
+
+def test_close_unambiguous_references_still_match():
+    analysis = diff(GameMasterOutput(narration="...", clues_revealed=["the pocket watch"], characters_questioned=["Ashford"]))
+
+    assert [u.data["id"] for u in updates_for(analysis, "clues")] == ["k3"]
+    assert updates_for(analysis, "timeline_events")[0].data["character_ids"] == ["Lady Margaret Ashford"]
+
+
+def test_entering_a_locked_location_makes_it_accessible():
+    analysis = diff(GameMasterOutput(narration="...", locations_entered=["Library", "study"]))
+
+    locations = updates_for(analysis, "locations")
+    assert [(u.action, u.data) for u in locations] == [("update", {"id": "l2", "is_accessible": True})]
+
+
+def test_questioning_records_one_event_per_character_after_the_latest():
+    analysis = diff(GameMasterOutput(
+        narration="...",
+        locations_entered=["Library"],
+        characters_questioned=["Lady Margaret Ashford", "thomas reed", "Thomas Reed"],
+    ))
+
+    events = updates_for(analysis, "timeline_events")
+    assert [u.data["event_description"] for u in events] == [
+        "The detective questioned Lady Margaret Ashford in the Library",
+        "The detective questioned Thomas Reed in the Library",
+    ]
+    assert [u.data["event_time"] for u in events] == ["1923-10-12T23:01:00+00:00", "1923-10-12T23:02:00+00:00"]
+    assert all(u.action == "insert" and u.data["event_type"] == "conversation" for u in events)
+    assert events[0].data["character_ids"] == ["Lady Margaret Ashford"]
+
+
+def test_already_recorded_events_are_not_duplicated():
+    snapshot = make_snapshot([
+        {"id": "t1", "event_time": "1923-10-12T23:00:00+00:00", "event_description": "The detective questioned Thomas Reed"},
+    ])
+
+    analysis = diff(GameMasterOutput(narration="...", characters_questioned=["Thomas Reed"]), snapshot)
+
+    assert analysis.updates == []
+    assert not analysis.has_changes
+
+
+def test_same_output_gives_the_same_updates():
+    output = GameMasterOutput(
+        narration="...",
+        clues_revealed=["Bloody Letter Opener"],
+        locations_entered=["Study"],
+        characters_questioned=["Thomas Reed"],
+    )
+
+    first, second = diff(output), diff(output)
+
+    strip = lambda analysis: [(u.table, u.action, {k: v for k, v in u.data.items() if k != "discovered_at"}) for u in analysis.updates]
+    assert strip(first) == strip(second)
+    assert len(first.updates) == 3
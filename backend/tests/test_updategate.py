@@ -0,0 +1,14 @@
+from agents.updategate import score_turn
+from database.worldcache import GameSnapshot
+
+SNAPSHOT = GameSnapshot("game-1", {})
+
+
+def test_talk_of_the_dead_victim_is_not_a_state_change():
+    for narration in ("The dead man's study is quiet.", "Lord Ashford is dead, and the house mourns him."):
+        assert "state_change" not in score_turn(SNAPSHOT, "Tell me about the victim", narration)[1]
+
+
+def test_a_new_death_is_a_state_change():
+    for narration in ("The butler is found dead in the cellar.", "Clara drops dead at the table."):
+        assert score_turn(SNAPSHOT, "What happens next?", narration)[1]["state_change"] == 1
@@ -0,0 +1,84 @@
+import asyncio
+
+from agents.toolformat import CHARACTER_COLUMNS, CLUE_COLUMNS, LOCATION_COLUMNS, TIMELINE_COLUMNS
+from database.updates import COLUMN_ALIASES, TABLE_COLUMNS, apply_game_updates, validate_update
+
+CLUE_ID = "5f0c1f38-2a4e-4f53-9a41-3c1f0d3b7e11"
+
+
+def test_short_keys_from_tool_output_map_back_to_columns():
+    table, action, record_id, data, dropped = validate_update({
+        "table": "clues", "action": "update",
+        "data": {"id": CLUE_ID, "revealed": True, "found_by": "Inspector", "sig": 4},
+    })
+
+    assert (table, action, record_id) == ("clues", "update", CLUE_ID)
+    assert data == {"is_revealed": True, "discovered_by": "Inspector", "significance_level": 4}
+    assert dropped == []
+
+
+def test_every_writable_short_key_has_an_alias():
+    tool_columns = {
+        "characters": CHARACTER_COLUMNS, "locations": LOCATION_COLUMNS,
+        "clues": CLUE_COLUMNS, "timeline_events": TIMELINE_COLUMNS,
+    }
+    for table, columns in tool_columns.items():
+        for column, short in columns.items():
+            if column in TABLE_COLUMNS[table] and short != column:
+                assert COLUMN_ALIASES[table].get(short) == column, (table, short)
+
+
+def test_bad_values_reject_only_their_own_update():
+    applied_ops = []
+
+    async def apply_ops(game_id, ops):
+        applied_ops.extend(ops)
+        return [[row["id"] for row in reversed(op["rows"])] or op["ids"] for op in ops]
+
+    updates = [
+        {"table": "timeline_events", "action": "insert", "data": {"event_time": "9:00 PM", "event_description": "A scream"}},
+        {"table": "timeline_events", "action": "insert", "data": {"event_time": "1923-10-12T21:00:00", "event_description": "A shot", "event_type": "Murder"}},
+        {"table": "timeline_events", "action": "insert", "data": {"event_time": "1923-10-12T21:05:00Z", "event_description": "A door", "event_type": "accident"}},
+        {"table": "clues", "action": "update", "data": {"id": CLUE_ID, "sig": 9}},
+        {"table": "clues", "action": "update", "data": {"id": CLUE_ID, "sig": "4"}},
+        {"table": "characters", "action": "update", "data": {"id": CLUE_ID, "lie_policy": "sneaky"}},
+    ]
+    report = asyncio.run(apply_game_updates("game-1", updates, apply_ops))
+
+    assert [o["status"] for o in report["outcomes"]] == ["rejected", "applied", "rejected", "rejected", "applied", "rejected"]
+    assert "event_time" in report["outcomes"][0]["reason"]
+    assert "event_type" in report["outcomes"][2]["reason"]
+    assert "significance_level" in report["outcomes"][3]["reason"]
+    assert "lie_policy" in report["outcomes"][5]["reason"]
+    inserted = next(op for op in applied_ops if op["action"] == "insert")["rows"][0]
+    assert inserted["event_time"] == "1923-10-12T21:00:00+00:00"
+    assert inserted["event_type"] == "murder"
+    assert report["outcomes"][1]["id"] == inserted["id"]
+
+
+def test_insert_outcomes_follow_ids_not_returned_order():
+    names = {}
+
+    async def apply_ops(game_id, ops):
+        names.update({row["id"]: row["name"] for op in ops for row in op["rows"]})
+        return [list(reversed([row["id"] for row in op["rows"]])) for op in ops]
+
+    updates = [
+        {"table": "locations", "action": "insert", "data": {"name": name, "description": "..."}}
+        for name in ("Cellar", "Attic")
+    ]
+    report = asyncio.run(apply_game_updates("game-1", updates, apply_ops))
+
+    assert [o["status"] for o in report["outcomes"]] == ["applied", "applied"]
+    assert [names[o["id"]] for o in report["outcomes"]] == ["Cellar", "Attic"]
+
+
+def test_a_failed_transaction_is_reported_as_an_error():
+    async def apply_ops(game_id, ops):
+        raise RuntimeError("connection reset")
+
+    updates = [{"table": "clues", "action": "update", "data": {"id": CLUE_ID, "revealed": True}}]
+    report = asyncio.run(apply_game_updates("game-1", updates, apply_ops))
+
+    assert report["error"] == "connection reset"
+    assert report["outcomes"][0]["status"] == "failed"